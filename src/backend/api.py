@@ -1,21 +1,19 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import os
 import tempfile
 import json
 import uuid
 from datetime import datetime, date, time
-import pandas as pd
-import random
 import logging
 from urllib.parse import urlparse, urlunparse
-import requests
-import shutil
-from pathlib import Path
 import re
 import time
-from bs4 import BeautifulSoup
 from urllib.parse import unquote
+from trabalhos import TrabalhoAvulso, obter_gerenciador_trabalhos, CANCELADO, ESTADOS_FINAIS
+# pandas, numpy, openpyxl e os módulos de processamento (leitor_planilhas,
+# escritor_planilhas, organizador...) são importados nas funções que os usam,
+# para que a API (e o /api/status) responda logo depois de iniciar
 
 app = Flask(__name__)
 CORS(app)  # Habilitar CORS para todas as rotas
@@ -64,6 +62,64 @@ def serializar_para_json(dados):
         print(f"Erro na serialização JSON: {str(e)}")
         return json.dumps({'status': 'erro', 'mensagem': f'Erro na serialização: {str(e)}'})
 
+def remover_arquivo_temporario(caminho):
+    """Remove um arquivo temporário, se ele ainda existir."""
+    if os.path.exists(caminho):
+        os.remove(caminho)
+
+# Os trabalhos em segundo plano ficam na memória do processo que os criou. Com
+# vários processos atendendo a mesma porta, as consultas de estado, resultado e
+# eventos cairiam em qualquer um deles; o servidor desativa os trabalhos nesse caso
+app.config.setdefault('TRABALHOS_ASSINCRONOS', True)
+MENSAGEM_TRABALHOS_INDISPONIVEIS = ('Trabalhos em segundo plano exigem o servidor com um único processo '
+                                    '(--processos 1). Envie a requisição sem ?assincrono=1.')
+
+def pedido_assincrono():
+    """Indica se a requisição pediu execução em segundo plano (?assincrono=1)."""
+    return request.args.get('assincrono', '').lower() in ('1', 'true', 'sim')
+
+@app.before_request
+def verificar_trabalhos_disponiveis():
+    """Recusa a API de trabalhos quando o servidor roda com mais de um processo."""
+    if not app.config['TRABALHOS_ASSINCRONOS'] and request.path.startswith('/api/trabalhos/'):
+        return jsonify({'status': 'erro', 'mensagem': MENSAGEM_TRABALHOS_INDISPONIVEIS}), 501
+
+def responder_trabalho(tipo, funcao, *args, ao_finalizar=None):
+    """
+    Executa a função de um endpoint dentro da requisição ou como trabalho em segundo plano.
+    
+    Com ?assincrono=1 a resposta é imediata (202) e traz o id do trabalho;
+    o progresso e o resultado ficam em /api/trabalhos/<id>. Se os trabalhos
+    estiverem desativados (servidor com vários processos), a resposta é 501.
+    
+    Args:
+        tipo: Nome do tipo de trabalho
+        funcao: Função chamada como funcao(trabalho, *args), que retorna (resposta, código HTTP)
+        *args: Argumentos da função
+        ao_finalizar: Função chamada quando a execução termina (ex.: remover o arquivo enviado)
+        
+    Returns:
+        Resposta Flask
+    """
+    if pedido_assincrono():
+        if not app.config['TRABALHOS_ASSINCRONOS']:
+            if ao_finalizar:
+                ao_finalizar()
+            return jsonify({'status': 'erro', 'mensagem': MENSAGEM_TRABALHOS_INDISPONIVEIS}), 501
+        trabalho = obter_gerenciador_trabalhos().submeter(tipo, funcao, *args, ao_finalizar=ao_finalizar)
+        return jsonify({
+            'status': 'sucesso',
+            'mensagem': 'Trabalho criado',
+            'trabalho': trabalho.resumo()
+        }), 202
+    
+    try:
+        resposta, codigo = funcao(TrabalhoAvulso(tipo), *args)
+    finally:
+        if ao_finalizar:
+            ao_finalizar()
+    return jsonify(resposta), codigo
+
 @app.route('/api/processar', methods=['POST'])
 def api_processar():
     """Recebe um arquivo Excel, processa e retorna os dados organizados."""
@@ -83,89 +139,133 @@ def api_processar():
         arquivo.save(temp_path)
         print(f"Arquivo salvo em: {temp_path}")
         
-        try:
-            # Verificar se o arquivo existe e pode ser lido
-            if not os.path.exists(temp_path):
-                return jsonify({'status': 'erro', 'mensagem': 'Arquivo não encontrado após upload'}), 400
-            
-            # Processar o arquivo
-            df = pd.read_excel(temp_path)
-            print(f"Arquivo lido: {df.shape[0]} linhas, {df.shape[1]} colunas")
-            
-            # Identificar colunas importantes
-            colunas = {
-                'url': next((col for col in df.columns if 'url' in str(col).lower() or ('link' in str(col).lower() and 'web' not in str(col).lower())), df.columns[0] if len(df.columns) > 0 else None),
-                'link_web_texto': next((col for col in df.columns if 'link web' in str(col).lower() and 'texto' in str(col).lower()), None),
-                'link_web_imagem': next((col for col in df.columns if ('link web' in str(col).lower() and 'imagem' in str(col).lower()) or 'link_web_imagem' in str(col).lower()), None),
-                'tipo_midia': next((col for col in df.columns if 'tipo' in str(col).lower() and 'midia' in str(col).lower()), None)
-            }
-            
-            # Processar linhas e organizar por tipo de mídia
-            tipos_midia = ['Portal', 'Impresso', 'TV', 'Rádio']
-            resultado = {tipo: [] for tipo in tipos_midia}
-            
-            for idx, row in df.iterrows():
-                if idx >= 50:  # Limitar a 50 linhas
-                    break
-                
-                # Obter valores da linha
-                url_base = str(row[colunas['url']]).strip() if colunas['url'] and pd.notna(row[colunas['url']]) else ""
-                link_web_texto = str(row[colunas['link_web_texto']]).strip() if colunas['link_web_texto'] and pd.notna(row[colunas['link_web_texto']]) else ""
-                link_web_imagem = str(row[colunas['link_web_imagem']]).strip() if colunas['link_web_imagem'] and pd.notna(row[colunas['link_web_imagem']]) else ""
-                tipo_midia = str(row[colunas['tipo_midia']]).strip() if colunas['tipo_midia'] and pd.notna(row[colunas['tipo_midia']]) else "Portal"
-                
-                # Determinar Link da Matéria baseado na prioridade correta
-                link_materia = "Materia Não Cadastrada"  # Valor padrão quando não há links
-                
-                # Para qualquer tipo, priorizar link_web_texto
-                if link_web_texto and link_web_texto.startswith(('http://', 'https://')):
-                    link_materia = link_web_texto
-                # Para Impresso, se não há link_web_texto, usar link_web_imagem
-                elif tipo_midia == 'Impresso' and link_web_imagem and link_web_imagem.startswith(('http://', 'https://')):
-                    link_materia = link_web_imagem
-                # Caso contrário, mantém "Materia Não Cadastrada"
-                
-                # Criar registro base
-                registro_base = {
-                    'Nome do Cliente': 'Cliente',
-                    'Data de Inclusão': datetime.now().strftime('%Y-%m-%d'),
-                    'Título da Matéria': f"Matéria {idx+1}",
-                    'Link da Matéria': link_materia,
-                    'Veículo': 'Veículo padrão',
-                    'Tipo de Mídia': tipo_midia
-                }
-                
-                # Adicionar ao resultado
-                if tipo_midia in tipos_midia:
-                    resultado[tipo_midia].append(registro_base)
-                else:
-                    resultado['Portal'].append(registro_base)
-            
-            # Salvar resultado em planilha processada
-            output_path = f"{os.path.splitext(temp_path)[0]}_processado.xlsx"
-            with pd.ExcelWriter(output_path) as writer:
-                for tipo, registros in resultado.items():
-                    if registros:
-                        df_tipo = pd.DataFrame(registros)
-                        df_tipo.to_excel(writer, sheet_name=tipo, index=False)
-            
-            return jsonify({
-                'status': 'sucesso',
-                'mensagem': 'Arquivo processado com sucesso',
-                'dados': resultado
-            })
-            
-        finally:
-            # Remover arquivo temporário
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                
+        # Processar na requisição ou, com ?assincrono=1, como trabalho em segundo plano
+        return responder_trabalho('processar', executar_processar, temp_path,
+                                  ao_finalizar=lambda: remover_arquivo_temporario(temp_path))
+    
     except Exception as e:
         print(f"Erro ao processar: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'status': 'erro', 'mensagem': str(e)}), 500
 
+def executar_processar(trabalho, temp_path):
+    """
+    Processa a planilha enviada para /api/processar (até 50 linhas).
+    
+    Args:
+        trabalho: Trabalho usado para informar o progresso e verificar o cancelamento
+        temp_path: Caminho da planilha salva
+    
+    Returns:
+        Tupla (resposta, código HTTP)
+    """
+    import pandas as pd
+    from leitor_planilhas import LeitorPlanilha
+    
+    # Verificar se o arquivo existe e pode ser lido
+    if not os.path.exists(temp_path):
+        return {'status': 'erro', 'mensagem': 'Arquivo não encontrado após upload'}, 400
+    
+    # Processar o arquivo (em streaming, só as colunas usadas e as linhas exibidas)
+    with LeitorPlanilha(temp_path) as leitor:
+        colunas_planilha = leitor.colunas
+        
+        # Identificar colunas importantes
+        colunas = {
+            'url': next((col for col in colunas_planilha if 'url' in str(col).lower() or ('link' in str(col).lower() and 'web' not in str(col).lower())), colunas_planilha[0] if len(colunas_planilha) > 0 else None),
+            'link_web_texto': next((col for col in colunas_planilha if 'link web' in str(col).lower() and 'texto' in str(col).lower()), None),
+            'link_web_imagem': next((col for col in colunas_planilha if ('link web' in str(col).lower() and 'imagem' in str(col).lower()) or 'link_web_imagem' in str(col).lower()), None),
+            'tipo_midia': next((col for col in colunas_planilha if 'tipo' in str(col).lower() and 'midia' in str(col).lower()), None)
+        }
+        
+        df = leitor.ler([col for col in dict.fromkeys(colunas.values()) if col is not None], limite_linhas=50)
+    print(f"Arquivo lido: {df.shape[0]} linhas, {len(colunas_planilha)} colunas")
+    
+    # Processar linhas e organizar por tipo de mídia
+    tipos_midia = ['Portal', 'Impresso', 'TV', 'Rádio']
+    resultado = {tipo: [] for tipo in tipos_midia}
+    trabalho.atualizar(total=min(len(df), 50))
+    
+    for idx, row in df.iterrows():
+        if idx >= 50:  # Limitar a 50 linhas
+            break
+        trabalho.verificar_cancelamento()
+        
+        # Obter valores da linha
+        url_base = str(row[colunas['url']]).strip() if colunas['url'] and pd.notna(row[colunas['url']]) else ""
+        link_web_texto = str(row[colunas['link_web_texto']]).strip() if colunas['link_web_texto'] and pd.notna(row[colunas['link_web_texto']]) else ""
+        link_web_imagem = str(row[colunas['link_web_imagem']]).strip() if colunas['link_web_imagem'] and pd.notna(row[colunas['link_web_imagem']]) else ""
+        tipo_midia = str(row[colunas['tipo_midia']]).strip() if colunas['tipo_midia'] and pd.notna(row[colunas['tipo_midia']]) else "Portal"
+        
+        # Determinar Link da Matéria baseado na prioridade correta
+        link_materia = "Materia Não Cadastrada"  # Valor padrão quando não há links
+        
+        # Para qualquer tipo, priorizar link_web_texto
+        if link_web_texto and link_web_texto.startswith(('http://', 'https://')):
+            link_materia = link_web_texto
+        # Para Impresso, se não há link_web_texto, usar link_web_imagem
+        elif tipo_midia == 'Impresso' and link_web_imagem and link_web_imagem.startswith(('http://', 'https://')):
+            link_materia = link_web_imagem
+        # Caso contrário, mantém "Materia Não Cadastrada"
+        
+        # Criar registro base
+        registro_base = {
+            'Nome do Cliente': 'Cliente',
+            'Data de Inclusão': datetime.now().strftime('%Y-%m-%d'),
+            'Título da Matéria': f"Matéria {idx+1}",
+            'Link da Matéria': link_materia,
+            'Veículo': 'Veículo padrão',
+            'Tipo de Mídia': tipo_midia
+        }
+        
+        # Adicionar ao resultado
+        if tipo_midia in tipos_midia:
+            resultado[tipo_midia].append(registro_base)
+        else:
+            resultado['Portal'].append(registro_base)
+        trabalho.atualizar(incremento=1)
+        trabalho.publicar('linha', {'tipo_midia': tipo_midia if tipo_midia in tipos_midia else 'Portal',
+                                    'registro': registro_base})
+    
+    # Salvar resultado em planilha processada
+    output_path = f"{os.path.splitext(temp_path)[0]}_processado.xlsx"
+    with pd.ExcelWriter(output_path) as writer:
+        for tipo, registros in resultado.items():
+            if registros:
+                df_tipo = pd.DataFrame(registros)
+                df_tipo.to_excel(writer, sheet_name=tipo, index=False)
+    
+    return {
+        'status': 'sucesso',
+        'mensagem': 'Arquivo processado com sucesso',
+        'dados': resultado
+    }, 200
+
+def textos_coluna(df, valores, coluna):
+    """
+    Texto de cada linha da coluna, como str(valor).strip() nas linhas preenchidas.
+    
+    Args:
+        df: DataFrame da planilha
+        valores: Matriz df.to_numpy(), com os mesmos valores que o iterrows entregaria
+        coluna: Nome da coluna (None quando a coluna não foi encontrada)
+    
+    Returns:
+        Series de textos, com '' nas linhas vazias
+    """
+    import pandas as pd
+    
+    if not coluna:
+        return pd.Series('', index=df.index, dtype=object)
+    serie = pd.Series(valores[:, df.columns.get_loc(coluna)], index=df.index, dtype=object)
+    return serie[serie.notna()].map(str).str.strip().reindex(df.index, fill_value='')
+
+def links_coluna(df, valores, coluna):
+    """Como textos_coluna, mas mantém apenas os links http:// ou https://."""
+    textos = textos_coluna(df, valores, coluna)
+    return textos.where(textos.str.startswith(('http://', 'https://')), '')
+
 @app.route('/api/processar_keywords', methods=['POST'])
 def api_processar_keywords():
     """Recebe um arquivo Excel de palavras-chave e organiza por palavras-chave e tipo de mídia."""
@@ -185,214 +285,218 @@ def api_processar_keywords():
         arquivo.save(temp_path)
         print(f"Arquivo salvo em: {temp_path}")
         
-        try:
-            # Verificar arquivo
-            if not os.path.exists(temp_path):
-                return jsonify({'status': 'erro', 'mensagem': 'Arquivo não encontrado após upload'}), 400
-            
-            # Processar o arquivo
-            df = pd.read_excel(temp_path)
-            print(f"Arquivo lido: {df.shape[0]} linhas, {df.shape[1]} colunas")
-            
-            # Identificar coluna de palavras-chave
-            palavras_chave_col = None
-            for col in df.columns:
-                col_lower = str(col).lower()
-                if any(termo in col_lower for termo in ['palavra', 'chave', 'keyword']):
-                    palavras_chave_col = col
-                    logger.info(f"Coluna de palavras-chave encontrada: {col}")
-                    break
-            
-            # Se não encontrou, usar a primeira coluna
-            if not palavras_chave_col and len(df.columns) > 0:
-                palavras_chave_col = df.columns[0]
-                print(f"Usando primeira coluna como palavras-chave: {palavras_chave_col}")
-            
-            # Identificar outras colunas importantes com verificação mais precisa
-            colunas = {
-                'link': None,
-                'link_web_texto': None,
-                'link_web_imagem': None,
-                'tipo_midia': None
-            }
-            
-            # Buscar todas as colunas por nome mais específico
-            for col in df.columns:
-                col_lower = str(col).lower()
-                
-                # Para link_web_texto
-                if ('link web' in col_lower and 'texto' in col_lower) or 'link_web_texto' in col_lower:
-                    colunas['link_web_texto'] = col
-                    print(f"Coluna Link web - Texto encontrada: {col}")
-                
-                # Para link_web_imagem
-                elif ('link web' in col_lower and 'imagem' in col_lower) or 'link_web_imagem' in col_lower:
-                    colunas['link_web_imagem'] = col
-                    print(f"Coluna Link web - Imagem encontrada: {col}")
-                
-                # Para tipo_midia
-                elif 'tipo' in col_lower and 'midia' in col_lower:
-                    colunas['tipo_midia'] = col
-                    print(f"Coluna Tipo de Mídia encontrada: {col}")
-                
-                # Para link genérico (apenas se não conflitar com as colunas específicas)
-                elif 'link' in col_lower and 'web' not in col_lower and 'texto' not in col_lower and 'imagem' not in col_lower:
-                    colunas['link'] = col
-                    print(f"Coluna Link genérico encontrada: {col}")
-            
-            print(f"Colunas identificadas: {colunas}")
-            
-            # Extrair palavras-chave únicas
-            palavras_unicas = set()
-            for idx, row in df.iterrows():
-                if pd.notna(row[palavras_chave_col]):
-                    palavras_cell = str(row[palavras_chave_col]).strip()
-                    # Dividir a célula por vírgulas e adicionar cada parte como uma palavra-chave
-                    for palavra in palavras_cell.split(','):
-                        palavra_limpa = palavra.strip()
-                        if palavra_limpa:  # Verificar se não está vazia após a limpeza
-                            palavras_unicas.add(palavra_limpa)
-            
-            # Converter para lista sem limitar a quantidade
-            palavras_unicas = list(palavras_unicas)
-            print(f"Palavras-chave encontradas: {len(palavras_unicas)}")
-            print(f"Palavras: {', '.join(palavras_unicas[:5] if len(palavras_unicas) >= 5 else palavras_unicas)}")
-            
-            # Extrair links e tipos de mídia para cada palavra
-            info_palavras = {}
-            for palavra in palavras_unicas:
-                # Buscar linhas que contenham a palavra-chave (não apenas iguais)
-                linhas_palavra = df[df[palavras_chave_col].astype(str).str.contains(palavra, case=False, regex=False)]
-                print(f"Palavra '{palavra}': {len(linhas_palavra)} linhas encontradas")
-                
-                info_palavras[palavra] = {
-                    'links_por_linha': [],  # Armazenar pares (link_texto, link_imagem) por linha
-                    'tipos_midia': []
-                }
-                
-                for idx, row in linhas_palavra.iterrows():
-                    # Extrair links da linha atual
-                    link_texto = ""
-                    link_imagem = ""
-                    
-                    # Obter link_web_texto
-                    if colunas['link_web_texto'] and pd.notna(row[colunas['link_web_texto']]):
-                        link_texto = str(row[colunas['link_web_texto']]).strip()
-                        if not link_texto.startswith(('http://', 'https://')):
-                            link_texto = ""
-                    
-                    # Obter link_web_imagem
-                    if colunas['link_web_imagem'] and pd.notna(row[colunas['link_web_imagem']]):
-                        link_imagem = str(row[colunas['link_web_imagem']]).strip()
-                        if not link_imagem.startswith(('http://', 'https://')):
-                            link_imagem = ""
-                    
-                    # Extrair tipo_midia se disponível
-                    if colunas['tipo_midia'] and pd.notna(row[colunas['tipo_midia']]):
-                        tipo = str(row[colunas['tipo_midia']]).strip()
-                        if tipo:
-                            info_palavras[palavra]['tipos_midia'].append(tipo)
-                    
-                    # Armazenar o par de links desta linha
-                    if link_texto or link_imagem:
-                        info_palavras[palavra]['links_por_linha'].append((link_texto, link_imagem))
-                
-                print(f"Informações para '{palavra}':")
-                print(f"  - Pares de links: {len(info_palavras[palavra]['links_por_linha'])}")
-                print(f"  - Tipos de Mídia: {len(info_palavras[palavra]['tipos_midia'])}")
-            
-            # Preparar dados para Excel
-            # Tipos de mídia padrão (alterando de 'Rádio' para 'Online')
-            tipos_midia = ['Portal', 'Impresso', 'TV', 'Online']
-            registros = []
-            
-            # Para cada palavra-chave, criar exatamente 4 registros (um para cada tipo de mídia)
-            for palavra in palavras_unicas:
-                # Selecionar o melhor par de links para esta palavra-chave
-                melhor_link_texto = ""
-                melhor_link_imagem = ""
-                
-                # Se há algum par de links disponível, use o primeiro
-                if info_palavras[palavra]['links_por_linha']:
-                    melhor_link_texto, melhor_link_imagem = info_palavras[palavra]['links_por_linha'][0]
-                
-                # Determinar compatibilidade de tipos de mídia com base nas extensões
-                tipos_compatíveis = {}
-                
-                if melhor_link_imagem:
-                    link_lower = melhor_link_imagem.lower()
-                    # Verificar extensões para determinar compatibilidade
-                    if link_lower.endswith('.mp4'):
-                        tipos_compatíveis['Online'] = True
-                    elif link_lower.endswith('.mp3'):
-                        tipos_compatíveis['TV'] = True
-                    elif any(link_lower.endswith(ext) for ext in ['.jpg', '.jpeg', '.png']):
-                        tipos_compatíveis['Portal'] = True
-                        tipos_compatíveis['Impresso'] = True
-                
-                # Criar exatamente um registro para cada tipo de mídia
-                for tipo in tipos_midia:
-                    # Determinar o LINK DA MATÉRIA CADASTRADA
-                    if tipo in tipos_compatíveis and melhor_link_texto and melhor_link_texto.lower().startswith(('http://', 'https://')):
-                        link_materia = melhor_link_texto
-                        logger.info(f"[Registro] '{palavra}' tipo '{tipo}': Usando LINK WEB - TEXTO (compatível)")
-                    else:
-                        link_materia = "Materia Não Cadastrada"
-                        if tipo not in tipos_compatíveis:
-                            logger.info(f"[Registro] '{palavra}' tipo '{tipo}': Tipo não compatível com os links disponíveis")
-                        else:
-                            logger.info(f"[Registro] '{palavra}' tipo '{tipo}': Link WEB - TEXTO inválido ou ausente")
-                    
-                    # Criar registro
-                    registro = {
-                        'PALAVRAS-CHAVE': palavra,
-                        'DATA DE INCLUSÃO': datetime.now().strftime('%Y-%m-%d'),
-                        'TÍTULO DA MATÉRIA': f"Matéria sobre {palavra}",
-                        'TIPO DE MÍDIA': tipo,
-                        'LINK DA MATÉRIA CADASTRADA': link_materia
-                    }
-                    registros.append(registro)
-            
-            # Converter para DataFrame
-            df_resultado = pd.DataFrame(registros)
-            logger.info(f"Registros gerados: {len(registros)}")
-            
-            # Salvar em Excel
-            output_path = f"{os.path.splitext(temp_path)[0]}_keywords.xlsx"
-            df_resultado.to_excel(output_path, index=False)
-            logger.info(f"Arquivo Excel salvo em: {output_path}")
-            
-            # Organizar registros por palavra-chave para exportação posterior
-            dados_por_palavra = {}
-            for registro in registros:
-                palavra = registro['PALAVRAS-CHAVE']
-                if palavra not in dados_por_palavra:
-                    dados_por_palavra[palavra] = []
-                dados_por_palavra[palavra].append(registro)
-            
-            return jsonify({
-                'status': 'sucesso',
-                'mensagem': 'Arquivo de palavras-chave processado com sucesso',
-                'total_registros': len(registros),
-                'palavras_processadas': len(palavras_unicas),
-                'output_path': output_path,
-                'dados': dados_por_palavra  # Adiciona dados organizados por palavra-chave
-            })
-            
-        finally:
-            # Remover arquivo temporário
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-        
+        # Processar na requisição ou, com ?assincrono=1, como trabalho em segundo plano
+        return responder_trabalho('processar_keywords', executar_processar_keywords, temp_path,
+                                  ao_finalizar=lambda: remover_arquivo_temporario(temp_path))
+    
     except Exception as e:
         logger.error(f"Erro ao processar keywords: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
         return jsonify({'status': 'erro', 'mensagem': str(e)}), 500
 
+def executar_processar_keywords(trabalho, temp_path):
+    """
+    Processa a planilha de palavras-chave enviada para /api/processar_keywords.
+    
+    Args:
+        trabalho: Trabalho usado para informar o progresso e verificar o cancelamento
+        temp_path: Caminho da planilha salva
+    
+    Returns:
+        Tupla (resposta, código HTTP)
+    """
+    import numpy as np
+    import pandas as pd
+    from leitor_planilhas import LeitorPlanilha
+    from indice_palavras import IndicePalavras
+    
+    # Verificar arquivo
+    if not os.path.exists(temp_path):
+        return {'status': 'erro', 'mensagem': 'Arquivo não encontrado após upload'}, 400
+    
+    # Processar o arquivo (em streaming, só as colunas usadas)
+    with LeitorPlanilha(temp_path) as leitor:
+        colunas_planilha = leitor.colunas
+        
+        # Identificar coluna de palavras-chave
+        palavras_chave_col = None
+        for col in colunas_planilha:
+            col_lower = str(col).lower()
+            if any(termo in col_lower for termo in ['palavra', 'chave', 'keyword']):
+                palavras_chave_col = col
+                logger.info(f"Coluna de palavras-chave encontrada: {col}")
+                break
+        
+        # Se não encontrou, usar a primeira coluna
+        if not palavras_chave_col and len(colunas_planilha) > 0:
+            palavras_chave_col = colunas_planilha[0]
+            logger.info(f"Usando primeira coluna como palavras-chave: {palavras_chave_col}")
+        
+        # Identificar outras colunas importantes com verificação mais precisa
+        colunas = {
+            'link': None,
+            'link_web_texto': None,
+            'link_web_imagem': None,
+            'tipo_midia': None
+        }
+        
+        # Buscar todas as colunas por nome mais específico
+        for col in colunas_planilha:
+            col_lower = str(col).lower()
+            
+            # Para link_web_texto
+            if ('link web' in col_lower and 'texto' in col_lower) or 'link_web_texto' in col_lower:
+                colunas['link_web_texto'] = col
+                logger.info(f"Coluna Link web - Texto encontrada: {col}")
+            
+            # Para link_web_imagem
+            elif ('link web' in col_lower and 'imagem' in col_lower) or 'link_web_imagem' in col_lower:
+                colunas['link_web_imagem'] = col
+                logger.info(f"Coluna Link web - Imagem encontrada: {col}")
+            
+            # Para tipo_midia
+            elif 'tipo' in col_lower and 'midia' in col_lower:
+                colunas['tipo_midia'] = col
+                logger.info(f"Coluna Tipo de Mídia encontrada: {col}")
+            
+            # Para link genérico (apenas se não conflitar com as colunas específicas)
+            elif 'link' in col_lower and 'web' not in col_lower and 'texto' not in col_lower and 'imagem' not in col_lower:
+                colunas['link'] = col
+                logger.info(f"Coluna Link genérico encontrada: {col}")
+        
+        logger.info(f"Colunas identificadas: {colunas}")
+        
+        df = leitor.ler([col for col in dict.fromkeys([palavras_chave_col, *colunas.values()]) if col is not None])
+    logger.info(f"Arquivo lido: {df.shape[0]} linhas, {len(colunas_planilha)} colunas")
+    
+    # Mesmos valores que o iterrows entregaria em cada linha
+    valores = df.to_numpy()
+    
+    # Extrair palavras-chave únicas: dividir cada célula por vírgulas e limpar cada parte
+    palavras_celulas = textos_coluna(df, valores, palavras_chave_col)
+    palavras_explodidas = palavras_celulas[palavras_celulas != ''].str.split(',').explode().str.strip()
+    palavras_unicas = set()
+    palavras_unicas.update(palavras_explodidas[palavras_explodidas != ''])
+    
+    # Converter para lista sem limitar a quantidade
+    palavras_unicas = list(palavras_unicas)
+    logger.info(f"Palavras-chave encontradas: {len(palavras_unicas)}")
+    logger.debug(f"Palavras: {', '.join(palavras_unicas[:5] if len(palavras_unicas) >= 5 else palavras_unicas)}")
+    trabalho.atualizar(total=len(palavras_unicas))
+    
+    # Buscar, em uma única passada pela coluna, as linhas que contêm cada palavra-chave (não apenas iguais)
+    linhas_por_palavra = IndicePalavras(palavras_unicas).linhas_por_palavra(df[palavras_chave_col].astype(str))
+    
+    # Links (apenas URLs http/https) e tipo de mídia de todas as linhas de uma vez
+    links_texto = links_coluna(df, valores, colunas['link_web_texto']).to_numpy()
+    links_imagem = links_coluna(df, valores, colunas['link_web_imagem']).to_numpy()
+    tipos_linhas = textos_coluna(df, valores, colunas['tipo_midia']).to_numpy()
+    linhas_com_link = (links_texto != '') | (links_imagem != '')
+    linhas_com_tipo = tipos_linhas != ''
+    
+    # Reunir os pares de links e os tipos de mídia das linhas de cada palavra
+    info_palavras = {}
+    for palavra in palavras_unicas:
+        trabalho.verificar_cancelamento()
+        linhas = np.asarray(linhas_por_palavra[palavra], dtype=np.intp)
+        com_link = linhas[linhas_com_link[linhas]]
+        info_palavras[palavra] = {
+            'links_por_linha': list(zip(links_texto[com_link], links_imagem[com_link])),  # Pares (link_texto, link_imagem) por linha
+            'tipos_midia': tipos_linhas[linhas[linhas_com_tipo[linhas]]].tolist()
+        }
+        logger.debug(f"Palavra '{palavra}': {len(linhas)} linhas, "
+                     f"{len(info_palavras[palavra]['links_por_linha'])} pares de links, "
+                     f"{len(info_palavras[palavra]['tipos_midia'])} tipos de mídia")
+    
+    # Preparar dados para Excel
+    # Tipos de mídia padrão (alterando de 'Rádio' para 'Online')
+    tipos_midia = ['Portal', 'Impresso', 'TV', 'Online']
+    registros = []
+    
+    # Para cada palavra-chave, criar exatamente 4 registros (um para cada tipo de mídia)
+    for palavra in palavras_unicas:
+        trabalho.verificar_cancelamento()
+        inicio_palavra = len(registros)
+        
+        # Selecionar o melhor par de links para esta palavra-chave
+        melhor_link_texto = ""
+        melhor_link_imagem = ""
+        
+        # Se há algum par de links disponível, use o primeiro
+        if info_palavras[palavra]['links_por_linha']:
+            melhor_link_texto, melhor_link_imagem = info_palavras[palavra]['links_por_linha'][0]
+        
+        # Determinar compatibilidade de tipos de mídia com base nas extensões
+        tipos_compatíveis = {}
+        
+        if melhor_link_imagem:
+            link_lower = melhor_link_imagem.lower()
+            # Verificar extensões para determinar compatibilidade
+            if link_lower.endswith('.mp4'):
+                tipos_compatíveis['Online'] = True
+            elif link_lower.endswith('.mp3'):
+                tipos_compatíveis['TV'] = True
+            elif any(link_lower.endswith(ext) for ext in ['.jpg', '.jpeg', '.png']):
+                tipos_compatíveis['Portal'] = True
+                tipos_compatíveis['Impresso'] = True
+        
+        # Criar exatamente um registro para cada tipo de mídia
+        for tipo in tipos_midia:
+            # Determinar o LINK DA MATÉRIA CADASTRADA
+            if tipo in tipos_compatíveis and melhor_link_texto and melhor_link_texto.lower().startswith(('http://', 'https://')):
+                link_materia = melhor_link_texto
+                logger.info(f"[Registro] '{palavra}' tipo '{tipo}': Usando LINK WEB - TEXTO (compatível)")
+            else:
+                link_materia = "Materia Não Cadastrada"
+                if tipo not in tipos_compatíveis:
+                    logger.info(f"[Registro] '{palavra}' tipo '{tipo}': Tipo não compatível com os links disponíveis")
+                else:
+                    logger.info(f"[Registro] '{palavra}' tipo '{tipo}': Link WEB - TEXTO inválido ou ausente")
+            
+            # Criar registro
+            registro = {
+                'PALAVRAS-CHAVE': palavra,
+                'DATA DE INCLUSÃO': datetime.now().strftime('%Y-%m-%d'),
+                'TÍTULO DA MATÉRIA': f"Matéria sobre {palavra}",
+                'TIPO DE MÍDIA': tipo,
+                'LINK DA MATÉRIA CADASTRADA': link_materia
+            }
+            registros.append(registro)
+        trabalho.atualizar(incremento=1)
+        trabalho.publicar('palavra', {'palavra': palavra, 'registros': registros[inicio_palavra:]})
+    
+    # Converter para DataFrame
+    df_resultado = pd.DataFrame(registros)
+    logger.info(f"Registros gerados: {len(registros)}")
+    
+    # Salvar em Excel
+    output_path = f"{os.path.splitext(temp_path)[0]}_keywords.xlsx"
+    df_resultado.to_excel(output_path, index=False)
+    logger.info(f"Arquivo Excel salvo em: {output_path}")
+    
+    # Organizar registros por palavra-chave para exportação posterior
+    dados_por_palavra = {}
+    for registro in registros:
+        palavra = registro['PALAVRAS-CHAVE']
+        if palavra not in dados_por_palavra:
+            dados_por_palavra[palavra] = []
+        dados_por_palavra[palavra].append(registro)
+    
+    return {
+        'status': 'sucesso',
+        'mensagem': 'Arquivo de palavras-chave processado com sucesso',
+        'total_registros': len(registros),
+        'palavras_processadas': len(palavras_unicas),
+        'output_path': output_path,
+        'dados': dados_por_palavra  # Adiciona dados organizados por palavra-chave
+    }, 200
+
 @app.route('/api/exportar', methods=['POST'])
 def api_exportar():
     """Recebe dados processados e retorna um arquivo Excel."""
+    from escritor_planilhas import EscritorPlanilha, colunas_registros
+    
     if not request.json or 'dados' not in request.json:
         return jsonify({'status': 'erro', 'mensagem': 'Dados não fornecidos'}), 400
     
@@ -416,41 +520,25 @@ def api_exportar():
                     logger.error(f"Registros para {tipo} não é um formato válido")
                     dados[tipo] = []
         
-        # Criar a planilha Excel
-        with pd.ExcelWriter(temp_xlsx) as writer:
+        # Criar a planilha Excel, escrevendo as linhas direto no arquivo
+        with EscritorPlanilha(temp_xlsx, amostra_largura=request.args.get('amostra_largura', type=int)) as escritor:
             abas_escritas = False
             
             for tipo, registros in dados.items():
                 if registros and isinstance(registros, list):
-                    # Convertendo para DataFrame
-                    df_tipo = pd.DataFrame(registros)
+                    colunas = colunas_registros(registros)
                     
                     # Verificando e registrando as colunas para debug
-                    logger.info(f"Colunas no DataFrame para {tipo}: {df_tipo.columns.tolist()}")
-                    
-                    # Limitar o tamanho do nome da aba para evitar erros do Excel
-                    nome_aba = str(tipo)[:31]  # Excel limita o nome da aba a 31 caracteres
-                    nome_aba = nome_aba.replace('/', '_').replace('\\', '_').replace('?', '').replace('*', '')
-                    nome_aba = nome_aba.replace('[', '').replace(']', '').replace(':', '')
+                    logger.info(f"Colunas para {tipo}: {colunas}")
                     
                     # Salvar os dados na aba
-                    df_tipo.to_excel(writer, sheet_name=nome_aba, index=False)
+                    escritor.escrever_aba(tipo, colunas, registros)
                     abas_escritas = True
-                    
-                    # Ajustar largura das colunas
-                    worksheet = writer.sheets[nome_aba]
-                    for idx, col in enumerate(df_tipo.columns):
-                        max_length = max(
-                            df_tipo[col].astype(str).map(len).max(),
-                            len(str(col))
-                        ) + 2
-                        col_letter = chr(65 + idx) if idx < 26 else chr(64 + idx // 26) + chr(65 + idx % 26)
-                        worksheet.column_dimensions[col_letter].width = min(max_length, 100)
             
             # Se nenhuma aba foi escrita, criar uma aba vazia para evitar erro
             if not abas_escritas:
                 logger.warning("Nenhuma aba foi escrita. Criando aba vazia.")
-                pd.DataFrame(columns=['Aviso']).to_excel(writer, sheet_name='Sem Dados', index=False)
+                escritor.escrever_aba('Sem Dados', ['Aviso'], [])
         
         # Verificar se o arquivo foi criado
         if not os.path.exists(temp_xlsx):
@@ -491,6 +579,8 @@ def api_exportar():
 @app.route('/api/exportar_keywords', methods=['POST'])
 def api_exportar_keywords():
     """Recebe dados de palavras-chave processados e retorna um arquivo Excel."""
+    from escritor_planilhas import EscritorPlanilha, colunas_registros
+    
     if not request.json or 'dados' not in request.json:
         return jsonify({'status': 'erro', 'mensagem': 'Dados não fornecidos'}), 400
     
@@ -498,17 +588,15 @@ def api_exportar_keywords():
         dados = request.json['dados']
         temp_xlsx = os.path.join(TEMP_DIR, f"{uuid.uuid4().hex}.xlsx")
         
-        # Criar DataFrame com todas as palavras-chave
         colunas_necessarias = [
             'PALAVRAS-CHAVE', 'DATA DE CADASTRO', 'TÍTULO DA MATÉRIA',
             'TIPO DE MÍDIA', 'LINK DA MATÉRIA CADASTRADA'
         ]
-        df_final = pd.DataFrame(columns=colunas_necessarias)
         
         # Verificar e logar os dados recebidos
         print(f"Dados recebidos para exportação: {len(dados)} palavras-chave")
         
-        # Adicionar todas as palavras-chave ao DataFrame
+        # Reunir os registros de todas as palavras-chave (sem copiá-los)
         registros_totais = []
         for palavra, registros in dados.items():
             print(f"Palavra '{palavra}': {len(registros)} registros")
@@ -517,39 +605,19 @@ def api_exportar_keywords():
                 print(f"Colunas disponíveis: {list(registros[0].keys())}")
             
             for reg in registros:
-                # Garantir que todos os campos necessários existam
-                registro_completo = {col: "" for col in colunas_necessarias}
-                
                 # Converter DATA DE INCLUSÃO para DATA DE CADASTRO se necessário
-                if 'DATA DE INCLUSÃO' in reg and reg['DATA DE INCLUSÃO'] and not reg['DATA DE CADASTRO']:
+                if reg.get('DATA DE INCLUSÃO') and not reg.get('DATA DE CADASTRO'):
                     reg['DATA DE CADASTRO'] = reg['DATA DE INCLUSÃO']
-                
-                registro_completo.update(reg)
-                registros_totais.append(registro_completo)
+                registros_totais.append(reg)
         
         print(f"Total de registros a exportar: {len(registros_totais)}")
-        
-        # Criar DataFrame apenas se houver registros
-        if registros_totais:
-            df_final = pd.DataFrame(registros_totais)
-            print(f"DataFrame criado com {len(df_final)} linhas e {len(df_final.columns)} colunas")
-            print(f"Colunas no DataFrame: {df_final.columns.tolist()}")
-        else:
+        if not registros_totais:
             print("AVISO: Nenhum registro encontrado para exportar!")
         
-        # Salvar para Excel
-        with pd.ExcelWriter(temp_xlsx) as writer:
-            df_final.to_excel(writer, sheet_name='Palavras-Chave', index=False)
-            
-            # Ajustar largura das colunas
-            worksheet = writer.sheets['Palavras-Chave']
-            for idx, col in enumerate(df_final.columns):
-                max_length = max(
-                    df_final[col].astype(str).map(len).max(),
-                    len(str(col))
-                ) + 2
-                col_letter = chr(65 + idx) if idx < 26 else chr(64 + idx // 26) + chr(65 + idx % 26)
-                worksheet.column_dimensions[col_letter].width = min(max_length, 100)
+        # Salvar para Excel; campos ausentes ficam vazios
+        colunas = colunas_registros(registros_totais, iniciais=colunas_necessarias)
+        with EscritorPlanilha(temp_xlsx, amostra_largura=request.args.get('amostra_largura', type=int)) as escritor:
+            escritor.escrever_aba('Palavras-Chave', colunas, registros_totais)
         
         # Verificar se o arquivo foi criado
         if not os.path.exists(temp_xlsx):
@@ -582,6 +650,98 @@ def api_status():
     """Verifica se a API está funcionando."""
     return jsonify({'status': 'online', 'mensagem': 'API do Organizador de Planilhas está funcionando'})
 
+@app.route('/api/trabalhos/<trabalho_id>', methods=['GET'])
+def api_trabalho_status(trabalho_id):
+    """Retorna o estado e o progresso de um trabalho."""
+    trabalho = obter_gerenciador_trabalhos().obter(trabalho_id)
+    if trabalho is None:
+        return jsonify({'status': 'erro', 'mensagem': 'Trabalho não encontrado'}), 404
+    return jsonify({'status': 'sucesso', 'trabalho': trabalho.resumo()})
+
+@app.route('/api/trabalhos/<trabalho_id>/cancelar', methods=['POST'])
+def api_trabalho_cancelar(trabalho_id):
+    """Pede o cancelamento de um trabalho pendente ou em execução."""
+    trabalho = obter_gerenciador_trabalhos().cancelar(trabalho_id)
+    if trabalho is None:
+        return jsonify({'status': 'erro', 'mensagem': 'Trabalho não encontrado'}), 404
+    return jsonify({'status': 'sucesso', 'mensagem': 'Cancelamento solicitado', 'trabalho': trabalho.resumo()})
+
+@app.route('/api/trabalhos/<trabalho_id>/resultado', methods=['GET'])
+def api_trabalho_resultado(trabalho_id):
+    """
+    Retorna o resultado de um trabalho terminado, com o mesmo conteúdo e
+    código HTTP que o endpoint teria retornado na execução direta.
+    """
+    trabalho = obter_gerenciador_trabalhos().obter(trabalho_id)
+    if trabalho is None:
+        return jsonify({'status': 'erro', 'mensagem': 'Trabalho não encontrado'}), 404
+    if trabalho.estado not in ESTADOS_FINAIS:
+        return jsonify({'status': 'pendente', 'mensagem': 'Trabalho ainda em execução', 'trabalho': trabalho.resumo()}), 202
+    if trabalho.estado == CANCELADO:
+        return jsonify({'status': 'erro', 'mensagem': 'Trabalho cancelado', 'trabalho': trabalho.resumo()}), 409
+    return jsonify(trabalho.resultado), trabalho.codigo_http
+
+# Intervalo mínimo entre eventos de progresso e intervalo dos comentários
+# que mantêm a conexão aberta, em segundos (Server-Sent Events)
+INTERVALO_EVENTOS_SSE = 0.5
+INTERVALO_KEEPALIVE_SSE = 15
+
+def evento_sse(tipo, dados, evento_id=None):
+    """Formata um evento no formato Server-Sent Events."""
+    evento = f"id: {evento_id}\n" if evento_id is not None else ''
+    return f"{evento}event: {tipo}\ndata: {serializar_para_json(dados)}\n\n"
+
+@app.route('/api/trabalhos/<trabalho_id>/eventos', methods=['GET'])
+def api_trabalho_eventos(trabalho_id):
+    """
+    Acompanha um trabalho por Server-Sent Events, sem consultas repetidas.
+    
+    Eventos enviados:
+    - progresso: resumo do trabalho (itens concluídos, item atual, contadores
+      como erros e acertos do cache, tempo restante estimado) quando ele muda
+    - linha, palavra, arquivo: resultados parciais publicados pelo trabalho,
+      à medida que ficam prontos; têm id, e ao reconectar com Last-Event-ID
+      (ou ?desde=n) só os posteriores são enviados. Cada trabalho guarda só
+      os últimos BRASPUB_TRABALHOS_MAX_EVENTOS; quem se conecta depois que
+      os mais antigos foram descartados recebe a partir do mais antigo
+      guardado (o salto aparece nos ids)
+    - fim: resumo final; o resultado completo fica em /api/trabalhos/<id>/resultado
+    """
+    trabalho = obter_gerenciador_trabalhos().obter(trabalho_id)
+    if trabalho is None:
+        return jsonify({'status': 'erro', 'mensagem': 'Trabalho não encontrado'}), 404
+    
+    desde = request.headers.get('Last-Event-ID', type=int)
+    if desde is None:
+        desde = request.args.get('desde', 0, type=int)
+    
+    def gerar():
+        posicao = desde
+        versao = 0
+        while True:
+            nova_versao = trabalho.aguardar_mudanca(versao, timeout=INTERVALO_KEEPALIVE_SSE)
+            if nova_versao == versao:
+                yield ": aguardando\n\n"
+                continue
+            versao = nova_versao
+            
+            # O resumo é lido antes dos eventos: se o trabalho já terminou, todos foram publicados
+            resumo = trabalho.resumo()
+            for posicao_evento, (tipo, dados) in trabalho.eventos_desde(posicao):
+                posicao = posicao_evento + 1
+                yield evento_sse(tipo, dados, posicao)
+            
+            if resumo['estado'] in ESTADOS_FINAIS:
+                yield evento_sse('fim', resumo)
+                return
+            yield evento_sse('progresso', resumo)
+            
+            # Agrupar as mudanças seguintes em um único evento de progresso
+            time.sleep(INTERVALO_EVENTOS_SSE)
+    
+    return Response(stream_with_context(gerar()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/processar-planilha-download', methods=['POST'])
 def api_processar_planilha_download():
     """Recebe um arquivo Excel, extrai links para download e retorna os dados organizados."""
@@ -601,31 +761,40 @@ def api_processar_planilha_download():
         arquivo.save(temp_path)
         logger.info(f"Arquivo salvo em: {temp_path}")
         
-        try:
-            # Verificar arquivo
-            if not os.path.exists(temp_path):
-                return jsonify({'status': 'erro', 'mensagem': 'Arquivo não encontrado após upload'}), 400
-            
-            # Processar o arquivo para extrair links
-            resultado = processar_planilha_download(temp_path)
-            
-            return jsonify({
-                'status': 'sucesso',
-                'mensagem': 'Links extraídos com sucesso',
-                'dados': resultado
-            })
-            
-        finally:
-            # Remover arquivo temporário
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-                
+        # Processar na requisição ou, com ?assincrono=1, como trabalho em segundo plano
+        return responder_trabalho('processar_planilha_download', executar_processar_planilha_download, temp_path,
+                                  ao_finalizar=lambda: remover_arquivo_temporario(temp_path))
+    
     except Exception as e:
         logger.error(f"Erro ao processar planilha para download: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
         return jsonify({'status': 'erro', 'mensagem': str(e)}), 500
 
+def executar_processar_planilha_download(trabalho, temp_path):
+    """
+    Extrai os links para download da planilha enviada para /api/processar-planilha-download.
+    
+    Args:
+        trabalho: Trabalho usado para informar o progresso e verificar o cancelamento
+        temp_path: Caminho da planilha salva
+    
+    Returns:
+        Tupla (resposta, código HTTP)
+    """
+    # Verificar arquivo
+    if not os.path.exists(temp_path):
+        return {'status': 'erro', 'mensagem': 'Arquivo não encontrado após upload'}, 400
+    
+    # Processar o arquivo para extrair links
+    resultado = processar_planilha_download(temp_path, trabalho)
+    
+    return {
+        'status': 'sucesso',
+        'mensagem': 'Links extraídos com sucesso',
+        'dados': resultado
+    }, 200
+
 @app.route('/api/processar_planilha_download', methods=['POST'])
 def api_processar_planilha_download_compat():
     """Versão compatível da rota para o frontend."""
@@ -633,7 +802,16 @@ def api_processar_planilha_download_compat():
 
 @app.route('/api/baixar-arquivos', methods=['POST'])
 def api_baixar_arquivos():
-    """Recebe dados com links, baixa os arquivos e organiza em pastas."""
+    """
+    Recebe dados com links, baixa os arquivos e organiza em pastas.
+    
+    Com ?modo=zip os arquivos não são gravados no servidor: a resposta é um
+    ZIP com a árvore data/tipo_midia/titulo.ext, transmitido enquanto os
+    arquivos são baixados. Com ?assincrono=1 o download roda como trabalho
+    em segundo plano (não disponível no modo ZIP). Com ?verificar_links=1
+    os links inativos (404/410, domínio inexistente) são retirados da fila
+    antes do início dos downloads.
+    """
     try:
         # Verificar se há dados
         if not request.json:
@@ -641,14 +819,27 @@ def api_baixar_arquivos():
         
         dados = request.json
         
-        # Baixar arquivos
-        resultado = baixar_arquivos(dados)
+        # Opções do download (parâmetros opcionais da URL)
+        workers = request.args.get('workers', type=int)
+        taxa_por_host = request.args.get('taxa_por_host', type=float)
+        banda_maxima_kbps = request.args.get('banda_maxima_kbps', type=int)
+        banda_maxima = banda_maxima_kbps * 1024 if banda_maxima_kbps is not None else None
+        segmentos = request.args.get('segmentos', type=int)
+        verificar = request.args.get('verificar_links', '').lower() in ('1', 'true', 'sim')
         
-        return jsonify({
-            'status': 'sucesso',
-            'mensagem': 'Arquivos baixados com sucesso',
-            'detalhes': resultado
-        })
+        # Modo ZIP: transmitir os arquivos direto para o cliente
+        if request.args.get('modo') == 'zip':
+            if pedido_assincrono():
+                return jsonify({'status': 'erro', 'mensagem': 'O modo ZIP não pode ser executado em segundo plano'}), 400
+            gerador = transmitir_zip_arquivos(dados, workers=workers, taxa_por_host=taxa_por_host,
+                                              banda_maxima=banda_maxima, verificar=verificar)
+            nome_zip = f"BrasPub_Downloads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+            return Response(stream_with_context(gerador), mimetype='application/zip',
+                            headers={'Content-Disposition': f'attachment; filename="{nome_zip}"'})
+        
+        # Baixar arquivos na requisição ou, com ?assincrono=1, como trabalho em segundo plano
+        return responder_trabalho('baixar_arquivos', executar_baixar_arquivos, dados,
+                                  workers, taxa_por_host, banda_maxima, segmentos, verificar)
             
     except Exception as e:
         logger.error(f"Erro ao baixar arquivos: {str(e)}")
@@ -656,106 +847,212 @@ def api_baixar_arquivos():
         logger.error(traceback.format_exc())
         return jsonify({'status': 'erro', 'mensagem': str(e)}), 500
 
+def executar_baixar_arquivos(trabalho, dados, workers, taxa_por_host, banda_maxima, segmentos, verificar=False):
+    """Baixa os arquivos dos links recebidos em /api/baixar-arquivos."""
+    economia = {}
+    inativos = []
+    resultado = baixar_arquivos(dados, workers=workers, taxa_por_host=taxa_por_host,
+                                banda_maxima=banda_maxima, segmentos=segmentos, economia=economia,
+                                trabalho=trabalho, verificar=verificar, inativos=inativos)
+    
+    resposta = {
+        'status': 'sucesso',
+        'mensagem': 'Arquivos baixados com sucesso',
+        'detalhes': resultado,
+        'economia': economia
+    }
+    if verificar:
+        resposta['links_inativos'] = inativos
+    return resposta, 200
+
 @app.route('/api/baixar_arquivos', methods=['POST'])
 def api_baixar_arquivos_compat():
     """Versão compatível da rota para o frontend."""
     return api_baixar_arquivos()
 
+@app.route('/api/complementar-planilha', methods=['POST'])
+def api_complementar_planilha():
+    """
+    Recebe uma planilha com URLs na coluna A e complementa cada linha com
+    os links de mídia, palavras-chave e tipo de mídia das páginas
+    (organizador.processar_planilha).
+    
+    Parâmetros opcionais da URL: aba, primeira_linha, limite_linhas e workers.
+    Com ?assincrono=1, cada linha resolvida é enviada em
+    /api/trabalhos/<id>/eventos assim que fica pronta.
+    """
+    try:
+        # Verificar se existe um arquivo válido na requisição
+        if 'arquivo' not in request.files:
+            return jsonify({'status': 'erro', 'mensagem': 'Nenhum arquivo enviado'}), 400
+            
+        arquivo = request.files['arquivo']
+        if arquivo.filename == '':
+            return jsonify({'status': 'erro', 'mensagem': 'Nome de arquivo vazio'}), 400
+        if not arquivo.filename.endswith('.xlsx'):
+            return jsonify({'status': 'erro', 'mensagem': 'Formato de arquivo inválido. Use .xlsx'}), 400
+        
+        opcoes = {
+            'aba_nome': request.args.get('aba'),
+            'primeira_linha': request.args.get('primeira_linha', 2, type=int),
+            'limite_linhas': request.args.get('limite_linhas', type=int),
+            'workers': request.args.get('workers', type=int)
+        }
+        
+        # Salvar o arquivo temporariamente
+        temp_path = os.path.join(TEMP_DIR, f"{uuid.uuid4().hex}_{arquivo.filename}")
+        arquivo.save(temp_path)
+        logger.info(f"Arquivo salvo em: {temp_path}")
+        
+        # Processar na requisição ou, com ?assincrono=1, como trabalho em segundo plano
+        return responder_trabalho('complementar_planilha', executar_complementar_planilha, temp_path, opcoes,
+                                  ao_finalizar=lambda: remover_arquivo_temporario(temp_path))
+    
+    except Exception as e:
+        logger.error(f"Erro ao complementar planilha: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return jsonify({'status': 'erro', 'mensagem': str(e)}), 500
+
+def executar_complementar_planilha(trabalho, temp_path, opcoes):
+    """Complementa a planilha enviada para /api/complementar-planilha; a planilha resultante fica em 'arquivo_saida'."""
+    from organizador import processar_planilha
+    
+    resultado = processar_planilha(temp_path, trabalho=trabalho, **opcoes)
+    return resultado, 200 if resultado['status'] == 'sucesso' else 400
+
+# Datas sem fuso no formato ISO (yyyy-mm-dd, com ou sem hora), lidas todas de uma vez
+_DATA_ISO = r'^\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2}(?:\.\d+)?)?$'
+
+def formatar_datas(valores, padrao):
+    """
+    Converte os valores de uma coluna de datas para o formato yyyy-mm-dd.
+    
+    Datas (datetime) são formatadas diretamente. Os demais valores são
+    convertidos para texto e interpretados pelo pd.to_datetime uma única vez
+    por valor distinto: os textos ISO em uma só chamada e os outros
+    formatos um a um, como antes.
+    
+    Args:
+        valores: Series com os valores da coluna
+        padrao: Data usada nas células vazias ou com datas inválidas
+    
+    Returns:
+        Series de textos yyyy-mm-dd
+    """
+    import pandas as pd
+    
+    formatadas = {}
+    textos = {}
+    for valor in pd.unique(valores[valores.notna()]):
+        if isinstance(valor, datetime):
+            try:
+                formatadas[valor] = valor.strftime('%Y-%m-%d')
+            except ValueError:
+                formatadas[valor] = padrao
+        else:
+            textos[valor] = str(valor).strip()
+    
+    # Cada texto distinto é interpretado uma única vez
+    unicos = pd.Series(list(set(textos.values())), dtype=object)
+    convertidos = {}
+    iso = unicos[unicos.str.match(_DATA_ISO)]
+    if len(iso):
+        datas_iso = pd.to_datetime(iso, format='ISO8601', errors='coerce')
+        convertidos.update((texto, data.strftime('%Y-%m-%d')) for texto, data in zip(iso, datas_iso) if pd.notna(data))
+    for texto in unicos:
+        if texto not in convertidos:
+            try:
+                data_obj = pd.to_datetime(texto, errors='coerce')
+                convertidos[texto] = padrao if pd.isna(data_obj) else data_obj.strftime('%Y-%m-%d')
+            except Exception:
+                convertidos[texto] = padrao
+    formatadas.update((valor, convertidos[texto]) for valor, texto in textos.items())
+    
+    return valores.map(formatadas).fillna(padrao)
+
 # Função para processar a planilha e extrair links para download
-def processar_planilha_download(arquivo_path):
+def processar_planilha_download(arquivo_path, trabalho=None):
     """
     Processa a planilha para extrair links para download.
     
     Args:
         arquivo_path: Caminho para o arquivo Excel
+        trabalho: Trabalho opcional que recebe o progresso (linhas da planilha)
         
     Returns:
         Um dicionário com os links organizados por data e tipo de mídia
     """
-    logger.info(f"Processando planilha para download: {arquivo_path}")
+    import pandas as pd
+    from leitor_planilhas import LeitorPlanilha
     
-    # Ler arquivo Excel
-    df = pd.read_excel(arquivo_path)
-    logger.info(f"Planilha lida: {df.shape[0]} linhas, {df.shape[1]} colunas")
-    
-    # Identificar colunas importantes
-    colunas = {}
-    for col in df.columns:
-        col_lower = str(col).lower()
-        # Coluna de título
-        if any(termo in col_lower for termo in ['título', 'titulo', 'title']):
-            colunas['titulo'] = col
-            logger.info(f"Coluna de título encontrada: {col}")
-        
-        # Coluna de data
-        elif any(termo in col_lower for termo in ['data', 'date', 'inclusão', 'inclusao']):
-            colunas['data'] = col
-            logger.info(f"Coluna de data encontrada: {col}")
-        
-        # Coluna de tipo de mídia
-        elif 'tipo' in col_lower and 'mídia' in col_lower:
-            colunas['tipo_midia'] = col
-            logger.info(f"Coluna de tipo de mídia encontrada: {col}")
-        
-        # Coluna de link web imagem
-        elif ('link web' in col_lower and 'imagem' in col_lower) or 'link_web_imagem' in col_lower:
-            colunas['link_web_imagem'] = col
-            logger.info(f"Coluna de link web imagem encontrada: {col}")
-    
-    # Verificar se encontrou as colunas necessárias
-    colunas_obrigatorias = ['titulo', 'data', 'tipo_midia', 'link_web_imagem']
-    colunas_faltando = [col for col in colunas_obrigatorias if col not in colunas]
-    
-    if colunas_faltando:
-        mensagem = f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltando)}"
-        logger.error(mensagem)
-        raise ValueError(mensagem)
-    
-    # Organizar links por data e tipo de mídia
-    resultado = {}
+    logger.info(f"Processando planilha para download: {arquivo_path}")
     
-    for idx, row in df.iterrows():
-        # Obter valores da linha
-        try:
-            titulo = str(row[colunas['titulo']]).strip() if pd.notna(row[colunas['titulo']]) else f"Matéria {idx+1}"
-            data_str = str(row[colunas['data']]).strip() if pd.notna(row[colunas['data']]) else datetime.now().strftime('%Y-%m-%d')
-            tipo_midia = str(row[colunas['tipo_midia']]).strip() if pd.notna(row[colunas['tipo_midia']]) else "Outros"
-            link_web_imagem = str(row[colunas['link_web_imagem']]).strip() if pd.notna(row[colunas['link_web_imagem']]) else ""
+    # Ler o cabeçalho da planilha (as linhas são lidas em streaming mais abaixo)
+    with LeitorPlanilha(arquivo_path) as leitor:
+        colunas_planilha = leitor.colunas
+        
+        # Identificar colunas importantes
+        colunas = {}
+        for col in colunas_planilha:
+            col_lower = str(col).lower()
+            # Coluna de título
+            if any(termo in col_lower for termo in ['título', 'titulo', 'title']):
+                colunas['titulo'] = col
+                logger.info(f"Coluna de título encontrada: {col}")
             
-            # Processar a data para formato yyyy-mm-dd
-            try:
-                if isinstance(row[colunas['data']], datetime):
-                    data_formatada = row[colunas['data']].strftime('%Y-%m-%d')
-                else:
-                    # Tentar converter várias formatações de data
-                    data_obj = pd.to_datetime(data_str, errors='coerce')
-                    if pd.isna(data_obj):
-                        data_formatada = datetime.now().strftime('%Y-%m-%d')
-                    else:
-                        data_formatada = data_obj.strftime('%Y-%m-%d')
-            except:
-                data_formatada = datetime.now().strftime('%Y-%m-%d')
+            # Coluna de data
+            elif any(termo in col_lower for termo in ['data', 'date', 'inclusão', 'inclusao']):
+                colunas['data'] = col
+                logger.info(f"Coluna de data encontrada: {col}")
             
-            # Verificar se o link é válido
-            if link_web_imagem and link_web_imagem.startswith(('http://', 'https://')):
-                # Criar estrutura para a data se não existir
-                if data_formatada not in resultado:
-                    resultado[data_formatada] = {}
-                
-                # Criar estrutura para o tipo de mídia se não existir
-                if tipo_midia not in resultado[data_formatada]:
-                    resultado[data_formatada][tipo_midia] = []
-                
-                # Adicionar link ao resultado
-                arquivo_info = {
-                    'titulo': titulo,
-                    'link': link_web_imagem
-                }
-                resultado[data_formatada][tipo_midia].append(arquivo_info)
-                logger.info(f"Link encontrado para download: {tipo_midia} / {titulo}")
+            # Coluna de tipo de mídia
+            elif 'tipo' in col_lower and 'mídia' in col_lower:
+                colunas['tipo_midia'] = col
+                logger.info(f"Coluna de tipo de mídia encontrada: {col}")
             
-        except Exception as e:
-            logger.error(f"Erro ao processar linha {idx}: {str(e)}")
+            # Coluna de link web imagem
+            elif ('link web' in col_lower and 'imagem' in col_lower) or 'link_web_imagem' in col_lower:
+                colunas['link_web_imagem'] = col
+                logger.info(f"Coluna de link web imagem encontrada: {col}")
+        
+        # Verificar se encontrou as colunas necessárias
+        colunas_obrigatorias = ['titulo', 'data', 'tipo_midia', 'link_web_imagem']
+        colunas_faltando = [col for col in colunas_obrigatorias if col not in colunas]
+        
+        if colunas_faltando:
+            mensagem = f"Colunas obrigatórias não encontradas: {', '.join(colunas_faltando)}"
+            logger.error(mensagem)
+            raise ValueError(mensagem)
+        
+        # Ler só as colunas usadas
+        df = leitor.ler([colunas[nome] for nome in colunas_obrigatorias])
+    logger.info(f"Planilha lida: {df.shape[0]} linhas, {len(colunas_planilha)} colunas")
+    if trabalho:
+        trabalho.atualizar(total=len(df))
+        trabalho.verificar_cancelamento()
+    
+    # Mesmos valores que o iterrows entregaria em cada linha
+    valores = df.to_numpy()
+    hoje = datetime.now().strftime('%Y-%m-%d')
+    
+    # Valores de cada coluna como texto, com o padrão de cada uma nas células vazias
+    titulos = textos_coluna(df, valores, colunas['titulo'])
+    titulos = titulos.where(df[colunas['titulo']].notna(), 'Matéria ' + pd.Series(df.index + 1, index=df.index).astype(str))
+    tipos_midia = textos_coluna(df, valores, colunas['tipo_midia']).where(df[colunas['tipo_midia']].notna(), 'Outros')
+    links = textos_coluna(df, valores, colunas['link_web_imagem'])
+    
+    # Datas no formato yyyy-mm-dd (data de hoje quando vazia ou inválida)
+    datas = formatar_datas(pd.Series(valores[:, df.columns.get_loc(colunas['data'])], index=df.index, dtype=object), hoje)
+    
+    # Manter só as linhas com link válido e agrupar por data e tipo de mídia, na ordem em que aparecem
+    arquivos = pd.DataFrame({'data': datas, 'tipo_midia': tipos_midia, 'titulo': titulos, 'link': links})
+    arquivos = arquivos[arquivos['link'].str.startswith(('http://', 'https://'))]
+    
+    resultado = {}
+    for (data_formatada, tipo_midia), grupo in arquivos.groupby(['data', 'tipo_midia'], sort=False):
+        resultado.setdefault(data_formatada, {})[tipo_midia] = grupo[['titulo', 'link']].to_dict('records')
+        logger.info(f"Links encontrados para download: {data_formatada} / {tipo_midia}: {len(grupo)}")
     
     # Calcular estatísticas
     total_links = 0
@@ -768,50 +1065,44 @@ def processar_planilha_download(arquivo_path):
             total_links += len(resultado[data][tipo])
     
     logger.info(f"Processamento concluído. Encontrados {total_links} links em {total_datas} datas e {total_tipos} tipos de mídia.")
+    if trabalho:
+        trabalho.atualizar(concluidos=len(df), links=total_links)
     
     return resultado
 
-# Função para baixar arquivos e organizá-los em pastas
-def baixar_arquivos(dados):
+# Função para montar a lista de downloads a partir dos links
+def montar_tarefas_download(dados, download_dir=None):
     """
-    Baixa arquivos a partir dos links fornecidos e organiza em pastas.
+    Monta a lista de downloads e as estatísticas iniciais por tipo de mídia.
     
     Args:
         dados: Dicionário com links organizados por data e tipo de mídia
+        download_dir: Diretório base dos downloads (None = sem gravação em disco)
         
     Returns:
-        Um dicionário com estatísticas de download
+        Tupla (tarefas, status). Cada tarefa tem 'link', 'tipo_midia',
+        'arquivo_zip' (caminho data/tipo_midia/nome.ext) e, com download_dir, 'caminho'
     """
-    logger.info("Iniciando processo de download de arquivos")
-    
-    # Criar diretório para downloads
-    download_dir = os.path.join(os.path.expanduser("~"), "Downloads", "BrasPub_Downloads")
-    os.makedirs(download_dir, exist_ok=True)
-    logger.info(f"Diretório para downloads: {download_dir}")
-    
-    # Estatísticas
     status = {}
-    total_arquivos = 0
-    total_baixados = 0
-    total_erros = 0
+    tarefas = []
     
-    # Processar cada data
     for data in dados:
-        data_dir = os.path.join(download_dir, data)
-        os.makedirs(data_dir, exist_ok=True)
+        if download_dir:
+            data_dir = os.path.join(download_dir, data)
+            os.makedirs(data_dir, exist_ok=True)
         
         # Processar cada tipo de mídia
         for tipo_midia in dados[data]:
-            tipo_dir = os.path.join(data_dir, tipo_midia)
-            os.makedirs(tipo_dir, exist_ok=True)
+            if download_dir:
+                tipo_dir = os.path.join(data_dir, tipo_midia)
+                os.makedirs(tipo_dir, exist_ok=True)
             
             # Inicializar estatísticas para este tipo
             if tipo_midia not in status:
-                status[tipo_midia] = {'total': 0, 'baixados': 0, 'erros': 0}
+                status[tipo_midia] = {'total': 0, 'baixados': 0, 'erros': 0, 'pulados': 0, 'deduplicados': 0}
             
             # Processar cada arquivo
             for arquivo_info in dados[data][tipo_midia]:
-                total_arquivos += 1
                 status[tipo_midia]['total'] += 1
                 
                 try:
@@ -825,33 +1116,221 @@ def baixar_arquivos(dados):
                     # Determinar extensão de arquivo baseada no URL
                     extensao = determinar_extensao(link)
                     
-                    # Caminho completo do arquivo
-                    caminho_arquivo = os.path.join(tipo_dir, f"{nome_arquivo}{extensao}")
-                    
-                    # Baixar o arquivo
-                    logger.info(f"Baixando arquivo de {link} para {caminho_arquivo}")
-                    
-                    # Adicionar atraso entre downloads para evitar bloqueios
-                    time.sleep(0.5)
-                    
-                    # Tentar baixar o arquivo
-                    baixar_arquivo(link, caminho_arquivo)
-                    
-                    # Atualizar estatísticas
-                    total_baixados += 1
-                    status[tipo_midia]['baixados'] += 1
-                    logger.info(f"Arquivo baixado com sucesso: {caminho_arquivo}")
+                    tarefa = {
+                        'link': link,
+                        'tipo_midia': tipo_midia,
+                        'arquivo_zip': '/'.join([limpar_componente_zip(data), limpar_componente_zip(tipo_midia),
+                                                 f"{nome_arquivo}{extensao}"])
+                    }
+                    if download_dir:
+                        # Caminho completo do arquivo
+                        tarefa['caminho'] = os.path.join(tipo_dir, f"{nome_arquivo}{extensao}")
+                    tarefas.append(tarefa)
                     
                 except Exception as e:
-                    total_erros += 1
                     status[tipo_midia]['erros'] += 1
                     logger.error(f"Erro ao baixar arquivo: {str(e)}")
     
+    return tarefas, status
+
+def criar_gerenciador_downloads(workers=None, taxa_por_host=None, banda_maxima=None, segmentos=None):
+    """Cria o gerenciador de downloads, usando os padrões para as opções não informadas."""
+    from gerenciador_downloads import GerenciadorDownloads
+    
+    opcoes = {}
+    if workers is not None:
+        opcoes['workers'] = workers
+    if taxa_por_host is not None:
+        opcoes['taxa_por_host'] = taxa_por_host
+    if banda_maxima is not None:
+        opcoes['banda_maxima'] = banda_maxima or None
+    if segmentos is not None:
+        opcoes['segmentos'] = segmentos
+    return GerenciadorDownloads(**opcoes)
+
+def contabilizar_download(status, resultado):
+    """Atualiza as estatísticas por tipo de mídia com o resultado de um download."""
+    tipo_midia = resultado['tarefa']['tipo_midia']
+    if resultado['sucesso']:
+        status[tipo_midia]['baixados'] += 1
+        if resultado.get('pulado'):
+            # Já baixado em uma execução anterior e sem alterações no servidor
+            status[tipo_midia]['pulados'] += 1
+        if resultado.get('deduplicado'):
+            # Obtido de outro arquivo do job (mesma URL ou mesmo conteúdo)
+            status[tipo_midia]['deduplicados'] += 1
+    else:
+        status[tipo_midia]['erros'] += 1
+
+def resumir_downloads(status):
+    """Registra no log o resumo das estatísticas de download."""
+    total_arquivos = sum(item['total'] for item in status.values())
+    total_baixados = sum(item['baixados'] for item in status.values())
+    total_pulados = sum(item['pulados'] for item in status.values())
+    total_erros = sum(item['erros'] for item in status.values())
+    logger.info(f"Download concluído. Total: {total_arquivos}, Baixados: {total_baixados} "
+                f"({total_pulados} sem alterações), Erros: {total_erros}")
+
+def descartar_links_inativos(tarefas, status):
+    """
+    Verifica os links antes do download (HEAD ou GET do primeiro byte) e
+    retira da fila os que não existem mais (404/410, domínio inexistente).
+    Os links retirados contam como erro nas estatísticas do tipo de mídia.
+    
+    Args:
+        tarefas: Lista de downloads montada por montar_tarefas_download
+        status: Estatísticas por tipo de mídia
+        
+    Returns:
+        Tupla (tarefas com links ativos, lista de {'link', 'tipo_midia', 'arquivo_zip', 'erro'}
+        dos links retirados)
+    """
+    from classificador_midia import verificar_links
+    
+    verificacoes = verificar_links([tarefa['link'] for tarefa in tarefas])
+    ativas = []
+    inativos = []
+    for tarefa in tarefas:
+        verificacao = verificacoes[tarefa['link']]
+        if verificacao['ativo'] is False:
+            status[tarefa['tipo_midia']]['erros'] += 1
+            inativos.append({'link': tarefa['link'], 'tipo_midia': tarefa['tipo_midia'],
+                             'arquivo_zip': tarefa['arquivo_zip'],
+                             'erro': f"Link inativo: {verificacao['status'] or verificacao['erro']}"})
+        else:
+            ativas.append(tarefa)
+    if inativos:
+        logger.warning(f"{len(inativos)} links inativos retirados da fila de download")
+    return ativas, inativos
+
+# Função para baixar arquivos e organizá-los em pastas
+def baixar_arquivos(dados, workers=None, taxa_por_host=None, banda_maxima=None, segmentos=None, economia=None,
+                    trabalho=None, verificar=False, inativos=None):
+    """
+    Baixa arquivos a partir dos links fornecidos e organiza em pastas.
+    
+    Os downloads rodam em paralelo, com limite de requisições por host no
+    lugar do atraso fixo entre downloads. Links repetidos são baixados uma
+    só vez e os demais arquivos viram hardlinks (ou cópias) do primeiro.
+    
+    Args:
+        dados: Dicionário com links organizados por data e tipo de mídia
+        workers: Quantidade máxima de downloads simultâneos
+        taxa_por_host: Requisições por segundo permitidas para cada host
+        banda_maxima: Limite de banda total em bytes por segundo (None = sem limite)
+        segmentos: Conexões paralelas por arquivo grande (1 = sem download segmentado)
+        economia: Dicionário opcional preenchido com a economia da deduplicação
+                  ('requisicoes', 'bytes_transferencia', 'bytes_disco')
+        trabalho: Trabalho opcional que recebe o progresso (arquivos concluídos)
+        verificar: Se True, retira da fila os links inativos antes de começar
+        inativos: Lista opcional preenchida com os links retirados pela verificação
+        
+    Returns:
+        Um dicionário com estatísticas de download
+    """
+    logger.info("Iniciando processo de download de arquivos")
+    
+    # Criar diretório para downloads
+    download_dir = os.path.join(os.path.expanduser("~"), "Downloads", "BrasPub_Downloads")
+    os.makedirs(download_dir, exist_ok=True)
+    logger.info(f"Diretório para downloads: {download_dir}")
+    
+    # Montar a lista de downloads
+    tarefas, status = montar_tarefas_download(dados, download_dir)
+    if verificar:
+        tarefas, descartados = descartar_links_inativos(tarefas, status)
+        if inativos is not None:
+            inativos.extend(descartados)
+    
+    # Baixar em paralelo
+    gerenciador = criar_gerenciador_downloads(workers, taxa_por_host, banda_maxima, segmentos)
+    logger.info(f"{len(tarefas)} arquivos na fila de download ({gerenciador.workers} simultâneos)")
+    
+    if trabalho:
+        trabalho.atualizar(total=len(tarefas))
+    downloads = gerenciador.baixar(tarefas)
+    try:
+        for resultado in downloads:
+            contabilizar_download(status, resultado)
+            if trabalho:
+                tarefa = resultado['tarefa']
+                trabalho.atualizar(incremento=1, atual=tarefa['link'], erros=0 if resultado['sucesso'] else 1,
+                                   pulados=1 if resultado.get('pulado') else 0,
+                                   deduplicados=1 if resultado.get('deduplicado') else 0)
+                trabalho.publicar('arquivo', {
+                    'link': tarefa['link'],
+                    'tipo_midia': tarefa['tipo_midia'],
+                    'caminho': tarefa['caminho'],
+                    'sucesso': resultado['sucesso'],
+                    'pulado': bool(resultado.get('pulado')),
+                    'deduplicado': bool(resultado.get('deduplicado')),
+                    'erro': resultado.get('erro')
+                })
+                trabalho.verificar_cancelamento()
+    finally:
+        # No cancelamento, descarta os downloads que ainda estão na fila
+        downloads.close()
+    
     # Resumo
-    logger.info(f"Download concluído. Total: {total_arquivos}, Baixados: {total_baixados}, Erros: {total_erros}")
+    resumir_downloads(status)
+    logger.info(f"Deduplicação: {gerenciador.economia['requisicoes']} requisições e "
+                f"{gerenciador.economia['bytes_transferencia']} bytes de transferência economizados, "
+                f"{gerenciador.economia['bytes_disco']} bytes em disco")
+    if economia is not None:
+        economia.update(gerenciador.economia)
     
     return status
 
+# Função para transmitir os arquivos em um ZIP, sem gravá-los no servidor
+def transmitir_zip_arquivos(dados, workers=None, taxa_por_host=None, banda_maxima=None, verificar=False):
+    """
+    Gera um ZIP com os arquivos dos links, organizado por data e tipo de mídia.
+    
+    Os arquivos são baixados em paralelo e escritos no ZIP à medida que
+    chegam, em blocos, sem passar pelo disco. As estatísticas de download
+    vão no próprio ZIP, em relatorio_download.json; um arquivo truncado por
+    falha no meio do download vem acompanhado da entrada <nome>.INCOMPLETO.
+    
+    Args:
+        dados: Dicionário com links organizados por data e tipo de mídia
+        workers: Quantidade máxima de downloads simultâneos
+        taxa_por_host: Requisições por segundo permitidas para cada host
+        banda_maxima: Limite de banda total em bytes por segundo (None = sem limite)
+        verificar: Se True, retira da fila os links inativos antes de começar
+        
+    Yields:
+        Blocos de bytes do arquivo ZIP
+    """
+    logger.info("Iniciando download de arquivos em modo ZIP")
+    tarefas, status = montar_tarefas_download(dados)
+    gerenciador = criar_gerenciador_downloads(workers, taxa_por_host, banda_maxima)
+    erros = []
+    if verificar:
+        tarefas, descartados = descartar_links_inativos(tarefas, status)
+        erros.extend({'arquivo': item['arquivo_zip'], 'link': item['link'], 'erro': item['erro']}
+                     for item in descartados)
+    
+    def ao_concluir(resultado):
+        contabilizar_download(status, resultado)
+        if not resultado['sucesso']:
+            erros.append({'arquivo': resultado['tarefa']['arquivo_zip'], 'link': resultado['tarefa']['link'],
+                          'erro': resultado['erro']})
+    
+    def relatorio():
+        resumir_downloads(status)
+        conteudo = json.dumps({'detalhes': status, 'erros': erros}, ensure_ascii=False, indent=2)
+        return [('relatorio_download.json', conteudo.encode('utf-8'))]
+    
+    yield from gerenciador.transmitir_zip(tarefas, ao_concluir=ao_concluir, arquivos_finais=relatorio)
+
+# Função para limpar um componente de caminho dentro do ZIP
+def limpar_componente_zip(nome):
+    """Remove separadores e caracteres inválidos de um nome de pasta do ZIP."""
+    nome_limpo = re.sub(r'[\\/*?:"<>|]', "", str(nome)).strip()
+    if nome_limpo in ('', '.', '..'):
+        return '_'
+    return nome_limpo
+
 # Função para limpar nome de arquivo
 def limpar_nome_arquivo(nome):
     """Remove caracteres inválidos do nome do arquivo."""
@@ -895,20 +1374,10 @@ def determinar_extensao(url):
 # Função para baixar arquivo
 def baixar_arquivo(url, caminho_destino):
     """Baixa arquivo da URL para o destino especificado."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    from gerenciador_downloads import baixar_para_arquivo
     
     try:
-        # Fazer requisição
-        response = requests.get(url, headers=headers, stream=True, timeout=30)
-        response.raise_for_status()
-        
-        # Salvar arquivo
-        with open(caminho_destino, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
+        baixar_para_arquivo(url, caminho_destino)
         return True
     except Exception as e:
         logger.error(f"Erro ao baixar {url}: {str(e)}")
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import requests
+from openpyxl import Workbook
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+def gerar_planilha(caminho, linhas=20):
+    """Gera a planilha enviada na primeira requisição de processamento (sempre a mesma)."""
+    book = Workbook(write_only=True)
+    aba = book.create_sheet('Planilha')
+    aba.append(['URL', 'Link web - Texto', 'Link web - Imagem', 'Tipo de Mídia'])
+    tipos = ['Portal', 'Impresso', 'TV', 'Rádio']
+    for i in range(linhas):
+        aba.append([f'https://exemplo.com.br/{i}', f'https://exemplo.com.br/materia/{i}',
+                    f'https://exemplo.com.br/imagem/{i}.jpg', tipos[i % len(tipos)]])
+    book.save(caminho)
+
+def medir_inicializacao(comando, porta, planilha, cwd, limite=120):
+    """
+    Inicia o backend e mede os tempos desde o início do processo.
+    
+    Returns:
+        Tupla (segundos até o primeiro /api/status, segundos até a primeira
+        resposta de /api/processar com linhas processadas)
+    """
+    url = f'http://127.0.0.1:{porta}'
+    sessao = requests.Session()
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(comando, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # Mesmo critério do electron.js: o backend está pronto quando /api/status responde
+        while True:
+            if processo.poll() is not None:
+                raise RuntimeError(f"Backend terminou ao iniciar (código {processo.returncode})")
+            if time.perf_counter() - inicio > limite:
+                raise RuntimeError("Backend não respondeu a tempo")
+            try:
+                if sessao.get(f'{url}/api/status', timeout=1).ok:
+                    break
+            except requests.RequestException:
+                time.sleep(0.01)
+        primeiro_status = time.perf_counter() - inicio
+        
+        with open(planilha, 'rb') as f:
+            resposta = sessao.post(f'{url}/api/processar', files={'arquivo': ('inicio.xlsx', f)}, timeout=limite)
+        dados = resposta.json()
+        if resposta.status_code != 200 or not any(dados.get('dados', {}).values()):
+            raise RuntimeError(f"Processamento falhou: {resposta.status_code} {dados.get('mensagem')}")
+        primeira_linha = time.perf_counter() - inicio
+        return primeiro_status, primeira_linha
+    finally:
+        processo.terminate()
+        try:
+            processo.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            processo.kill()
+            processo.wait()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede o tempo de inicialização do backend: até o primeiro /api/status e até a primeira linha processada")
+    parser.add_argument('--repeticoes', type=int, default=5, help='Inicializações medidas (padrão: 5)')
+    parser.add_argument('--porta', type=int, default=5078, help='Porta usada pelo backend durante a medição')
+    parser.add_argument('--executavel', help='Executável do PyInstaller a medir (padrão: python servidor.py)')
+    parser.add_argument('--sem-precarga', action='store_true', help='Iniciar o servidor sem pré-carregar os módulos')
+    args = parser.parse_args()
+    
+    if args.executavel:
+        comando = [os.path.abspath(args.executavel)]
+    else:
+        comando = [sys.executable, os.path.join(DIRETORIO_BACKEND, 'servidor.py')]
+    comando += ['--porta', str(args.porta)]
+    if args.sem_precarga:
+        comando.append('--sem-precarga')
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = os.path.join(diretorio, 'inicio.xlsx')
+        gerar_planilha(planilha)
+        print(f"Comando: {' '.join(comando)}")
+        
+        # Uma inicialização descartada, para que todas as medidas partam do cache de disco aquecido
+        medir_inicializacao(comando, args.porta, planilha, diretorio)
+        medidas = [medir_inicializacao(comando, args.porta, planilha, diretorio) for _ in range(args.repeticoes)]
+    
+    for nome, valores in (('primeiro /api/status', [m[0] for m in medidas]),
+                          ('primeira linha processada', [m[1] for m in medidas])):
+        print(f"{nome:>26}: mediana {statistics.median(valores) * 1000:6.0f} ms   "
+              f"mín {min(valores) * 1000:6.0f} ms   máx {max(valores) * 1000:6.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+import logging
+import requests
+from sessao_http import obter_sessao
+
+logger = logging.getLogger("ExtractorMidia")
+
+# Configurações padrão do cache (podem ser alteradas por variáveis de ambiente)
+CACHE_CAMINHO_PADRAO = os.environ.get(
+    'BRASPUB_CACHE_CAMINHO',
+    os.path.join(tempfile.gettempdir(), 'organizador_planilhas', 'cache_http.sqlite3')
+)
+CACHE_TTL_PADRAO = int(os.environ.get('BRASPUB_CACHE_TTL', 24 * 60 * 60))  # segundos
+CACHE_TAMANHO_MAXIMO_PADRAO = int(os.environ.get('BRASPUB_CACHE_MAX_MB', 512)) * 1024 * 1024
+CACHE_ATIVO_PADRAO = os.environ.get('BRASPUB_CACHE_DESATIVADO', '') not in ('1', 'true', 'sim')
+
+# Cabeçalhos da resposta guardados junto com o corpo
+_CABECALHOS_GUARDADOS = ['Content-Type', 'ETag', 'Last-Modified']
+
+# Tipos de conteúdo tratados como página HTML (respostas sem Content-Type também são aceitas)
+_TIPOS_HTML = ('text/html', 'application/xhtml+xml')
+
+# Tamanho dos blocos lidos do corpo das respostas
+_TAMANHO_BLOCO = 64 * 1024
+
+# Corpo não lido de até este tamanho é descartado para a conexão voltar ao pool
+_LIMITE_DESCARTE = 64 * 1024
+
+def content_type_html(content_type):
+    """Indica se o Content-Type é de uma página HTML (ou está ausente)."""
+    tipo = (content_type or '').split(';')[0].strip().lower()
+    return not tipo or tipo in _TIPOS_HTML
+
+def conteudo_html(response):
+    """Indica, pelo Content-Type, se a resposta é uma página HTML."""
+    return content_type_html(response.headers.get('Content-Type'))
+
+def descartar_corpo(response, limite=_LIMITE_DESCARTE):
+    """
+    Lê e descarta o restante do corpo de uma resposta em streaming, para que
+    a conexão keep-alive volte ao pool (respostas 304, erros, corpos curtos).
+    
+    Returns:
+        True se o corpo foi lido até o fim; False se ele passa do limite
+        (a conexão deve então ser fechada)
+    """
+    tamanho = response.headers.get('Content-Length', '')
+    if tamanho.isdigit() and int(tamanho) > limite:
+        return False
+    lidos = 0
+    try:
+        for bloco in response.iter_content(_TAMANHO_BLOCO):
+            lidos += len(bloco)
+            if lidos > limite:
+                return False
+    except requests.exceptions.RequestException:
+        return False
+    return True
+
+def baixar(cliente, url, headers=None, timeout=15, limite_bytes=None, somente_html=False, parar=None):
+    """
+    Faz um GET lendo o corpo em blocos, com limite de tamanho.
+    
+    Os cabeçalhos chegam antes do corpo: respostas que não são 200 e, com
+    somente_html, respostas que não são HTML (um vídeo, um PDF) são
+    devolvidas sem que o corpo seja lido. A leitura termina ao passar de
+    limite_bytes ou quando parar(corpo lido até agora) retornar True; nesses
+    casos a resposta fica marcada como truncada e não é gravada no cache.
+    
+    Args:
+        cliente: Sessão HTTP usada na requisição
+        url: URL a ser baixada
+        headers: Cabeçalhos da requisição
+        timeout: Tempo limite da requisição em segundos
+        limite_bytes: Máximo de bytes do corpo lidos (None: sem limite)
+        somente_html: Se True, não lê o corpo de respostas que não são HTML
+        parar: Função que recebe o bytearray lido até o momento e retorna
+               True para encerrar a leitura
+    
+    Returns:
+        requests.Response com o corpo já lido em content e o atributo
+        truncada indicando se o corpo ficou incompleto
+    """
+    response = cliente.get(url, headers=headers, timeout=timeout, stream=True)
+    corpo = bytearray()
+    truncada = False
+    completa = False
+    erro = True
+    try:
+        if response.status_code == 200 and (not somente_html or conteudo_html(response)):
+            for bloco in response.iter_content(_TAMANHO_BLOCO):
+                corpo += bloco
+                if limite_bytes is not None and len(corpo) > limite_bytes:
+                    del corpo[limite_bytes:]
+                    truncada = True
+                    break
+                if parar is not None and parar(corpo):
+                    truncada = True
+                    break
+            else:
+                completa = True
+        elif response.status_code == 200:
+            # Conteúdo que não é HTML: o corpo não é lido e a resposta não vai para o cache
+            response.do_cache = False
+        erro = False
+    finally:
+        if not completa and (erro or not descartar_corpo(response)):
+            # Restante do corpo grande (ou leitura com erro): a conexão é descartada em vez de voltar ao pool
+            response.raw.close()
+        response.close()
+    
+    response._content = bytes(corpo)
+    response._content_consumed = True
+    response.truncada = truncada
+    if truncada:
+        response.do_cache = False
+    return response
+
+class RespostaCache:
+    """
+    Resposta HTTP reconstruída a partir do cache.
+    Expõe os mesmos atributos de requests.Response usados pelo extrator.
+    """
+    
+    def __init__(self, url, status_code, headers, content, encoding):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.encoding = encoding
+        self.do_cache = True
+        self.truncada = False
+    
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+class CacheHTTP:
+    """
+    Cache HTTP persistente em SQLite.
+    
+    Guarda o corpo comprimido das respostas 200 junto com ETag e
+    Last-Modified. Dentro do TTL a resposta é servida sem acessar a rede;
+    depois disso é revalidada com um GET condicional (If-None-Match /
+    If-Modified-Since). Quando o tamanho total ultrapassa o limite, as
+    entradas acessadas há mais tempo são removidas (LRU).
+    """
+    
+    def __init__(self, caminho=CACHE_CAMINHO_PADRAO, ttl=CACHE_TTL_PADRAO,
+                 tamanho_maximo=CACHE_TAMANHO_MAXIMO_PADRAO, ativo=CACHE_ATIVO_PADRAO):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.tamanho_maximo = tamanho_maximo
+        self.ativo = ativo
+        self.estatisticas = {'acertos': 0, 'revalidados': 0, 'faltas': 0}
+        self._lock = threading.Lock()
+        self._conexao = None
+    
+    def _contar(self, estatistica):
+        """Incrementa uma estatística (o cache é compartilhado entre threads e trabalhos)."""
+        with self._lock:
+            self.estatisticas[estatistica] += 1
+    
+    def _conectar(self):
+        """Abre (uma única vez) a conexão com o banco do cache."""
+        if self._conexao is None:
+            os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('''
+                CREATE TABLE IF NOT EXISTS respostas (
+                    url TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    content_type TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    encoding TEXT,
+                    corpo BLOB NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    armazenado_em REAL NOT NULL,
+                    acessado_em REAL NOT NULL
+                )
+            ''')
+            conexao.execute('CREATE INDEX IF NOT EXISTS idx_respostas_acesso ON respostas (acessado_em)')
+            conexao.commit()
+            self._conexao = conexao
+        return self._conexao
+    
+    def obter(self, url, sessao=None, headers=None, timeout=15, ignorar_cache=False,
+              limite_bytes=None, somente_html=False, parar=None):
+        """
+        Faz um GET passando pelo cache.
+        
+        Args:
+            url: URL a ser baixada
+            sessao: Sessão HTTP usada nas requisições (padrão: sessão compartilhada)
+            headers: Cabeçalhos da requisição
+            timeout: Tempo limite da requisição em segundos
+            ignorar_cache: Se True, vai direto à rede sem ler nem gravar no cache
+            limite_bytes: Máximo de bytes do corpo lidos da rede (None: sem limite)
+            somente_html: Se True, não lê o corpo de respostas que não são HTML
+            parar: Função que encerra a leitura do corpo antes do fim (ver baixar)
+        
+        Returns:
+            requests.Response (vinda da rede) ou RespostaCache
+        """
+        cliente = sessao or obter_sessao()
+        opcoes = {'limite_bytes': limite_bytes, 'somente_html': somente_html, 'parar': parar}
+        if not self.ativo or ignorar_cache:
+            return baixar(cliente, url, headers=headers, timeout=timeout, **opcoes)
+        
+        try:
+            entrada = self._ler(url)
+        except sqlite3.Error as e:
+            logger.warning(f"Cache HTTP indisponível ({str(e)}). Acessando a rede: {url}")
+            return baixar(cliente, url, headers=headers, timeout=timeout, **opcoes)
+        
+        agora = time.time()
+        if entrada and agora - entrada['armazenado_em'] < self.ttl:
+            self._registrar_acesso(url, agora)
+            self._contar('acertos')
+            logger.info(f"Página servida pelo cache: {url}")
+            return self._montar_resposta(url, entrada)
+        
+        # Entrada vencida: revalidar com um GET condicional
+        headers_requisicao = dict(headers or {})
+        if entrada:
+            if entrada['etag']:
+                headers_requisicao['If-None-Match'] = entrada['etag']
+            if entrada['last_modified']:
+                headers_requisicao['If-Modified-Since'] = entrada['last_modified']
+        
+        response = baixar(cliente, url, headers=headers_requisicao, timeout=timeout, **opcoes)
+        
+        if entrada and response.status_code == 304:
+            self._registrar_acesso(url, agora, revalidada=True)
+            self._contar('revalidados')
+            logger.info(f"Página revalidada no cache (304): {url}")
+            return self._montar_resposta(url, entrada)
+        
+        self._contar('faltas')
+        if response.status_code == 200 and getattr(response, 'do_cache', True):
+            try:
+                self._gravar(url, response, agora)
+            except sqlite3.Error as e:
+                logger.warning(f"Não foi possível gravar no cache HTTP: {str(e)}")
+        return response
+    
+    def _ler(self, url):
+        """Lê a entrada do cache para a URL, se existir."""
+        with self._lock:
+            linha = self._conectar().execute(
+                'SELECT status, content_type, etag, last_modified, encoding, corpo, armazenado_em '
+                'FROM respostas WHERE url = ?', (url,)
+            ).fetchone()
+        if not linha:
+            return None
+        return {
+            'status': linha[0],
+            'content_type': linha[1],
+            'etag': linha[2],
+            'last_modified': linha[3],
+            'encoding': linha[4],
+            'corpo': linha[5],
+            'armazenado_em': linha[6]
+        }
+    
+    def _montar_resposta(self, url, entrada):
+        """Reconstrói a resposta a partir de uma entrada do cache."""
+        headers = {}
+        for nome, chave in zip(_CABECALHOS_GUARDADOS, ['content_type', 'etag', 'last_modified']):
+            if entrada[chave]:
+                headers[nome] = entrada[chave]
+        return RespostaCache(url, entrada['status'], headers, zlib.decompress(entrada['corpo']), entrada['encoding'])
+    
+    def _registrar_acesso(self, url, agora, revalidada=False):
+        """Atualiza a data do último acesso (e do armazenamento, se revalidada)."""
+        with self._lock:
+            conexao = self._conectar()
+            if revalidada:
+                conexao.execute('UPDATE respostas SET acessado_em = ?, armazenado_em = ? WHERE url = ?',
+                                (agora, agora, url))
+            else:
+                conexao.execute('UPDATE respostas SET acessado_em = ? WHERE url = ?', (agora, url))
+            conexao.commit()
+    
+    def _gravar(self, url, response, agora):
+        """Grava a resposta comprimida e aplica o limite de tamanho do cache."""
+        corpo = zlib.compress(response.content, 6)
+        encoding = response.encoding or getattr(response, 'apparent_encoding', None)
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute(
+                'INSERT OR REPLACE INTO respostas '
+                '(url, status, content_type, etag, last_modified, encoding, corpo, tamanho, armazenado_em, acessado_em) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, response.status_code, response.headers.get('Content-Type'), response.headers.get('ETag'),
+                 response.headers.get('Last-Modified'), encoding, corpo, len(corpo), agora, agora)
+            )
+            self._aplicar_limite(conexao)
+            conexao.commit()
+    
+    def _aplicar_limite(self, conexao):
+        """Remove as entradas menos usadas até o cache voltar a caber no limite."""
+        total = conexao.execute('SELECT COALESCE(SUM(tamanho), 0) FROM respostas').fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+        
+        # Liberar um pouco além do necessário para não remover a cada gravação
+        alvo = self.tamanho_maximo * 0.9
+        removidas = 0
+        for url, tamanho in conexao.execute('SELECT url, tamanho FROM respostas ORDER BY acessado_em').fetchall():
+            if total <= alvo:
+                break
+            conexao.execute('DELETE FROM respostas WHERE url = ?', (url,))
+            total -= tamanho
+            removidas += 1
+        logger.info(f"Cache HTTP acima do limite. {removidas} entradas antigas removidas.")
+    
+    def limpar(self):
+        """Remove todas as entradas do cache."""
+        with self._lock:
+            conexao = self._conectar()
+            conexao.execute('DELETE FROM respostas')
+            conexao.commit()
+
+# Instância compartilhada do cache
+_cache = None
+_cache_lock = threading.Lock()
+
+def obter_cache():
+    """Retorna a instância compartilhada do cache HTTP."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheHTTP()
+        return _cache
+
+def configurar_cache(caminho=None, ttl=None, tamanho_maximo=None, ativo=None):
+    """
+    Altera a configuração do cache HTTP compartilhado.
+    
+    Args:
+        caminho: Caminho do arquivo SQLite do cache
+        ttl: Tempo (em segundos) em que uma página é servida sem revalidação
+        tamanho_maximo: Tamanho máximo (em bytes) dos corpos comprimidos
+        ativo: False para ignorar o cache em todas as requisições
+    
+    Returns:
+        A instância do cache já configurada
+    """
+    global _cache
+    with _cache_lock:
+        atual = _cache or CacheHTTP()
+        if atual._conexao is not None:
+            atual._conexao.close()
+        _cache = CacheHTTP(
+            caminho=caminho if caminho is not None else atual.caminho,
+            ttl=ttl if ttl is not None else atual.ttl,
+            tamanho_maximo=tamanho_maximo if tamanho_maximo is not None else atual.tamanho_maximo,
+            ativo=ativo if ativo is not None else atual.ativo
+        )
+        return _cache
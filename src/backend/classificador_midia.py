@@ -0,0 +1,164 @@
+import os
+import threading
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+import requests
+from sessao_http import obter_sessao
+from cache_http import descartar_corpo
+
+logger = logging.getLogger("ExtractorMidia")
+
+# Configuração padrão da verificação de links (pode ser alterada por variáveis de ambiente)
+VERIFICACAO_TIMEOUT_PADRAO = float(os.environ.get('BRASPUB_VERIFICACAO_TIMEOUT', 10))  # segundos
+VERIFICACAO_WORKERS_PADRAO = int(os.environ.get('BRASPUB_VERIFICACAO_WORKERS', 16))
+VERIFICACAO_POR_HOST_PADRAO = int(os.environ.get('BRASPUB_VERIFICACAO_POR_HOST', 4))
+
+# Tipo de mídia de cada extensão de arquivo
+TIPO_POR_EXTENSAO = {
+    '.pdf': 'Portal',
+    '.jpg': 'Impresso', '.jpeg': 'Impresso', '.png': 'Impresso', '.gif': 'Impresso',
+    '.webp': 'Impresso', '.bmp': 'Impresso', '.tif': 'Impresso', '.tiff': 'Impresso',
+    '.mp4': 'TV', '.m4v': 'TV', '.mov': 'TV', '.webm': 'TV', '.avi': 'TV', '.mkv': 'TV', '.wmv': 'TV',
+    '.mp3': 'Rádio', '.m4a': 'Rádio', '.aac': 'Rádio', '.wav': 'Rádio', '.oga': 'Rádio',
+    '.ogg': 'Rádio', '.opus': 'Rádio', '.wma': 'Rádio'
+}
+
+# Hosts de vídeo: o link é de TV mesmo sem extensão
+HOSTS_VIDEO = ('youtube.com', 'youtu.be', 'vimeo.com')
+
+# Extensões de páginas: o tipo só pode ser descoberto analisando o HTML
+EXTENSOES_PAGINA = {'.html', '.htm', '.shtml', '.php', '.asp', '.aspx', '.jsp'}
+
+# Tipo de mídia pelo início do Content-Type
+_TIPO_POR_CONTENT_TYPE = [
+    ('video/', 'TV'),
+    ('audio/', 'Rádio'),
+    ('image/', 'Impresso'),
+    ('application/pdf', 'Portal')
+]
+
+# Respostas que indicam que o link não existe mais
+_STATUS_INATIVO = {404, 410}
+
+def extensao_url(url):
+    """Extensão (em minúsculas) do caminho da URL, ou '' se não houver."""
+    caminho = unquote(urlparse(url).path)
+    return posixpath.splitext(posixpath.basename(caminho))[1].lower()
+
+def tipo_por_url(url):
+    """
+    Classifica o link só pela URL (extensão do arquivo ou host de vídeo).
+    
+    Args:
+        url: Link a classificar
+    
+    Returns:
+        Tipo de mídia ('Portal', 'Impresso', 'TV', 'Rádio') ou None se a URL não basta
+    """
+    if not isinstance(url, str):
+        return None
+    tipo = TIPO_POR_EXTENSAO.get(extensao_url(url))
+    if tipo:
+        return tipo
+    host = urlparse(url).netloc.lower().split(':')[0]
+    if any(host == dominio or host.endswith('.' + dominio) for dominio in HOSTS_VIDEO):
+        return 'TV'
+    return None
+
+def tipo_por_content_type(content_type):
+    """
+    Classifica o conteúdo pelo Content-Type da resposta.
+    
+    Returns:
+        Tipo de mídia ou None para HTML, conteúdo desconhecido ou cabeçalho ausente
+    """
+    tipo_conteudo = (content_type or '').split(';')[0].strip().lower()
+    for prefixo, tipo in _TIPO_POR_CONTENT_TYPE:
+        if tipo_conteudo.startswith(prefixo):
+            return tipo
+    return None
+
+def verificar_link(url, sessao=None, timeout=VERIFICACAO_TIMEOUT_PADRAO):
+    """
+    Consulta o link sem baixar o conteúdo: HEAD e, se o servidor recusar o
+    HEAD, um GET só do primeiro byte (Range: bytes=0-0).
+    
+    Args:
+        url: Link a verificar
+        sessao: Sessão HTTP usada nas requisições (padrão: sessão compartilhada)
+        timeout: Tempo limite de cada requisição em segundos
+    
+    Returns:
+        Dicionário com 'url', 'ativo' (True, False ou None quando não foi
+        possível concluir), 'status', 'content_type', 'tipo_midia' (pelo
+        Content-Type) e 'erro'
+    """
+    verificacao = {'url': url, 'ativo': None, 'status': None, 'content_type': None,
+                   'tipo_midia': None, 'erro': None}
+    if not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+        verificacao.update(ativo=False, erro='URL inválida')
+        return verificacao
+    
+    cliente = sessao or obter_sessao()
+    try:
+        response = cliente.head(url, timeout=timeout, allow_redirects=True)
+        if response.status_code >= 400:
+            # Vários servidores não aceitam HEAD (405, 403, 501...): confirmar com um GET mínimo
+            response = cliente.get(url, headers={'Range': 'bytes=0-0'}, timeout=timeout, stream=True)
+            if not descartar_corpo(response):
+                response.raw.close()
+            response.close()
+    except requests.exceptions.ConnectionError as e:
+        # Domínio inexistente, conexão recusada
+        verificacao.update(ativo=False, erro=str(e))
+        return verificacao
+    except requests.exceptions.RequestException as e:
+        verificacao['erro'] = str(e)
+        return verificacao
+    
+    content_type = response.headers.get('Content-Type')
+    verificacao.update(status=response.status_code, content_type=content_type,
+                       tipo_midia=tipo_por_content_type(content_type))
+    if response.status_code < 400:
+        verificacao['ativo'] = True
+    elif response.status_code in _STATUS_INATIVO:
+        verificacao['ativo'] = False
+    return verificacao
+
+def verificar_links(urls, limite_global=VERIFICACAO_WORKERS_PADRAO, limite_por_host=VERIFICACAO_POR_HOST_PADRAO,
+                    timeout=VERIFICACAO_TIMEOUT_PADRAO):
+    """
+    Verifica vários links em paralelo, cada URL uma única vez.
+    
+    Args:
+        urls: Links a verificar (podem se repetir)
+        limite_global: Máximo de verificações simultâneas
+        limite_por_host: Máximo de verificações simultâneas por host
+        timeout: Tempo limite de cada requisição em segundos
+    
+    Returns:
+        Dicionário {url: verificação} (ver verificar_link)
+    """
+    unicas = list(dict.fromkeys(urls))
+    if not unicas:
+        return {}
+    
+    semaforos_hosts = {}
+    semaforos_lock = threading.Lock()
+    
+    def verificar(url):
+        host = urlparse(url).netloc.lower() if isinstance(url, str) else ''
+        with semaforos_lock:
+            if host not in semaforos_hosts:
+                semaforos_hosts[host] = threading.Semaphore(max(1, limite_por_host))
+        with semaforos_hosts[host]:
+            return verificar_link(url, timeout=timeout)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(limite_global, len(unicas)))) as executor:
+        verificacoes = dict(zip(unicas, executor.map(verificar, unicas)))
+    
+    inativos = sum(1 for verificacao in verificacoes.values() if verificacao['ativo'] is False)
+    logger.info(f"Verificação de links: {len(verificacoes)} links, {inativos} inativos")
+    return verificacoes
@@ -28,24 +28,27 @@ def compilar_backend():
     os.makedirs(output_dir, exist_ok=True)
     
     # Comando do PyInstaller - usando o Python do ambiente virtual
+    # (o executável inicia o servidor de produção; a API é importada por ele).
+    # Em pasta (--onedir) e não em arquivo único: o --onefile extrai todas as
+    # bibliotecas para uma pasta temporária a cada vez que o aplicativo abre.
     cmd = [
         sys.executable, "-m", "PyInstaller",
         "--name=OrganizadorPlanilhas",
-        "--onefile",
+        "--onedir",
         "--windowed",
         "--add-data=organizador.py;.",
         "--clean",
-        "api.py"
+        "servidor.py"
     ]
     
     # Executar o comando
     subprocess.check_call(cmd)
     
-    # Mover o executável para o diretório de saída
-    shutil.copy(
-        os.path.join("dist", "OrganizadorPlanilhas.exe"),
-        os.path.join(output_dir, "OrganizadorPlanilhas.exe")
-    )
+    # Copiar a pasta do executável para o diretório de saída
+    destino = os.path.join(output_dir, "OrganizadorPlanilhas")
+    if os.path.exists(destino):
+        shutil.rmtree(destino)
+    shutil.copytree(os.path.join("dist", "OrganizadorPlanilhas"), destino)
     
     print(f"Backend compilado com sucesso! Executável disponível em: {os.path.abspath(output_dir)}")
 
@@ -0,0 +1,156 @@
+import os
+import math
+from datetime import datetime, date, time
+from itertools import chain, islice
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+# Linhas usadas para calcular a largura das colunas (0 = todas as linhas)
+AMOSTRA_LARGURA_PADRAO = int(os.environ.get('BRASPUB_EXPORTAR_AMOSTRA_LARGURA', 0))
+
+# Largura máxima de uma coluna e espaço extra além do maior valor
+LARGURA_MAXIMA_COLUNA = 100
+FOLGA_LARGURA = 2
+
+# Mesmo estilo de cabeçalho usado pelo DataFrame.to_excel
+_LADO_CABECALHO = Side(style='thin')
+FONTE_CABECALHO = Font(bold=True)
+BORDA_CABECALHO = Border(left=_LADO_CABECALHO, right=_LADO_CABECALHO, top=_LADO_CABECALHO, bottom=_LADO_CABECALHO)
+ALINHAMENTO_CABECALHO = Alignment(horizontal='center', vertical='top')
+
+# Tipos gravados como estão; os demais viram texto
+_TIPOS_NATIVOS = (str, int, float, bool, datetime, date, time)
+
+def nome_aba_valido(nome):
+    """Ajusta o nome para uma aba do Excel (até 31 caracteres, sem / \\ ? * [ ] :)."""
+    nome_aba = str(nome)[:31]  # Excel limita o nome da aba a 31 caracteres
+    nome_aba = nome_aba.replace('/', '_').replace('\\', '_').replace('?', '').replace('*', '')
+    return nome_aba.replace('[', '').replace(']', '').replace(':', '')
+
+def colunas_registros(registros, iniciais=()):
+    """
+    Lista as colunas de uma lista de dicionários na ordem em que aparecem,
+    como pd.DataFrame(registros).columns.
+    
+    Args:
+        registros: Lista de dicionários
+        iniciais: Colunas que vêm primeiro, mesmo que não apareçam nos registros
+    
+    Returns:
+        Lista com os nomes das colunas
+    """
+    colunas = dict.fromkeys(iniciais)
+    for registro in registros:
+        colunas.update(dict.fromkeys(registro))
+    return list(colunas)
+
+def _valor_celula(valor):
+    """Converte o valor para a célula: vazio para None/NaN e texto para tipos que o Excel não aceita."""
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    if isinstance(valor, _TIPOS_NATIVOS):
+        return valor
+    return str(valor)
+
+def _texto_celula(valor):
+    """Texto exibido na célula, usado para medir a largura da coluna."""
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    return str(valor)
+
+class EscritorPlanilha:
+    """
+    Escrita em streaming de planilhas Excel (openpyxl write-only).
+    
+    As linhas vão direto para o arquivo, sem montar DataFrames nem manter a
+    planilha na memória. A largura das colunas é calculada a partir do texto
+    de cada célula; como o formato write-only exige as larguras antes da
+    primeira linha, elas são medidas antes da escrita: em uma passada
+    extra pelos registros ou, com amostra_largura, só nas primeiras linhas.
+    """
+    
+    def __init__(self, caminho, amostra_largura=None):
+        self.caminho = caminho
+        self.amostra_largura = AMOSTRA_LARGURA_PADRAO if amostra_largura is None else amostra_largura
+        self._book = Workbook(write_only=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, tipo_erro, *args):
+        if tipo_erro is None:
+            self.salvar()
+    
+    def _linhas(self, registros, colunas):
+        """Itera os registros (dicionários ou sequências) como listas de valores das colunas."""
+        for registro in registros:
+            if isinstance(registro, dict):
+                yield [_valor_celula(registro.get(coluna)) for coluna in colunas]
+            else:
+                yield [_valor_celula(valor) for valor in registro]
+    
+    def _medir_larguras(self, colunas, linhas):
+        """Calcula a largura de cada coluna a partir do cabeçalho e das linhas."""
+        maiores = [len(str(coluna)) for coluna in colunas]
+        for linha in linhas:
+            for idx, valor in enumerate(linha):
+                tamanho = len(_texto_celula(valor))
+                if tamanho > maiores[idx]:
+                    maiores[idx] = tamanho
+        return [min(maior + FOLGA_LARGURA, LARGURA_MAXIMA_COLUNA) for maior in maiores]
+    
+    def escrever_aba(self, nome, colunas, registros):
+        """
+        Escreve uma aba com cabeçalho, linhas e colunas ajustadas ao conteúdo.
+        
+        Args:
+            nome: Nome da aba (ajustado com nome_aba_valido)
+            colunas: Nomes das colunas, na ordem em que serão escritas
+            registros: Dicionários (valores buscados pelo nome da coluna) ou
+                sequências de valores na ordem das colunas. Uma lista é
+                percorrida duas vezes (larguras e escrita); um iterador é
+                guardado na memória, a não ser que haja amostra_largura.
+        
+        Returns:
+            Quantidade de linhas de dados escritas
+        """
+        colunas = list(colunas)
+        if self.amostra_largura:
+            linhas = self._linhas(registros, colunas)
+            amostra = list(islice(linhas, self.amostra_largura))
+            larguras = self._medir_larguras(colunas, amostra)
+            linhas = chain(amostra, linhas)
+        else:
+            if iter(registros) is registros:
+                registros = list(registros)
+            larguras = self._medir_larguras(colunas, self._linhas(registros, colunas))
+            linhas = self._linhas(registros, colunas)
+        
+        aba = self._book.create_sheet(nome_aba_valido(nome))
+        for idx, largura in enumerate(larguras, start=1):
+            aba.column_dimensions[get_column_letter(idx)].width = largura
+        
+        if colunas:
+            aba.append([self._celula_cabecalho(aba, coluna) for coluna in colunas])
+        escritas = 0
+        for linha in linhas:
+            aba.append(linha)
+            escritas += 1
+        return escritas
+    
+    def _celula_cabecalho(self, aba, coluna):
+        celula = WriteOnlyCell(aba, value=_valor_celula(coluna))
+        celula.font = FONTE_CABECALHO
+        celula.border = BORDA_CABECALHO
+        celula.alignment = ALINHAMENTO_CABECALHO
+        return celula
+    
+    def salvar(self):
+        """Finaliza e grava o arquivo. Uma planilha sem abas recebe uma aba vazia."""
+        if not self._book.worksheets:
+            self._book.create_sheet('Sheet1')
+        self._book.save(self.caminho)
@@ -0,0 +1,856 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import shutil
+import logging
+import zipfile
+import requests
+from queue import Queue, Full
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, urlunparse
+from sessao_http import obter_sessao
+
+logger = logging.getLogger('braspub_api')
+
+# Configuração padrão dos downloads (pode ser alterada por variáveis de ambiente)
+WORKERS_DOWNLOAD_PADRAO = int(os.environ.get('BRASPUB_DOWNLOAD_WORKERS', 8))
+TAXA_POR_HOST_PADRAO = float(os.environ.get('BRASPUB_DOWNLOAD_TAXA_POR_HOST', 2.0))  # requisições por segundo
+RAJADA_POR_HOST_PADRAO = int(os.environ.get('BRASPUB_DOWNLOAD_RAJADA_POR_HOST', 2))
+BANDA_MAXIMA_PADRAO = int(os.environ.get('BRASPUB_DOWNLOAD_BANDA_MAXIMA', 0)) or None  # bytes por segundo
+
+TENTATIVAS_DOWNLOAD_PADRAO = int(os.environ.get('BRASPUB_DOWNLOAD_TENTATIVAS', 3))
+
+# Download segmentado (várias conexões por arquivo), desativado com 1 segmento
+SEGMENTOS_PADRAO = int(os.environ.get('BRASPUB_DOWNLOAD_SEGMENTOS', 1))
+LIMIAR_SEGMENTADO_PADRAO = int(os.environ.get('BRASPUB_DOWNLOAD_LIMIAR_SEGMENTADO_MB', 32)) * 1024 * 1024
+
+# Tamanho dos blocos lidos da resposta
+TAMANHO_BLOCO = 64 * 1024
+
+# Blocos em memória por arquivo no modo ZIP (limita o uso de memória por worker)
+BLOCOS_EM_FILA_ZIP = 16
+
+# Arquivos auxiliares gravados nos diretórios de download
+NOME_MANIFESTO = '.braspub_manifesto.json'
+SUFIXO_PARCIAL = '.part'
+SUFIXO_INCOMPLETO_ZIP = '.INCOMPLETO'  # marcador, no ZIP, de entrada truncada por falha no download
+
+class DownloadIncompleto(Exception):
+    """O download terminou antes do tamanho esperado ou não pôde ser retomado."""
+
+class ArquivoAlterado(DownloadIncompleto):
+    """O arquivo mudou no servidor durante um download segmentado."""
+
+class LimitadorTaxa:
+    """
+    Limitador do tipo token bucket.
+    
+    Os tokens são repostos continuamente na taxa configurada, até a
+    capacidade do balde. Quem pede mais tokens do que há disponível fica em
+    débito e espera o tempo necessário para quitá-lo, o que mantém a taxa
+    média mesmo para pedidos maiores que a capacidade.
+    """
+    
+    def __init__(self, taxa, capacidade=None):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade if capacidade is not None else taxa)
+        self._tokens = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def aguardar(self, quantidade=1):
+        """Consome a quantidade de tokens, esperando se for preciso."""
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+            self._ultimo = agora
+            self._tokens -= quantidade
+            espera = -self._tokens / self.taxa if self._tokens < 0 else 0
+        if espera > 0:
+            time.sleep(espera)
+
+class LimitadorPorHost:
+    """Um token bucket de requisições para cada host."""
+    
+    def __init__(self, taxa, rajada):
+        self.taxa = taxa
+        self.rajada = rajada
+        self._limitadores = {}
+        self._lock = threading.Lock()
+    
+    def aguardar(self, url):
+        """Espera até que uma nova requisição ao host da URL seja permitida."""
+        if not self.taxa:
+            return
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            limitador = self._limitadores.get(host)
+            if limitador is None:
+                limitador = LimitadorTaxa(self.taxa, self.rajada)
+                self._limitadores[host] = limitador
+        limitador.aguardar()
+
+def normalizar_url(url):
+    """
+    Normaliza a URL para identificar downloads repetidos.
+    
+    Esquema e host em minúsculas, sem porta padrão, caminho vazio como '/'
+    e sem fragmento. A query é mantida como está.
+    """
+    partes = urlparse(url.strip())
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or '').lower()
+    if partes.port and (esquema, partes.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{partes.port}"
+    if partes.username:
+        credenciais = partes.username + (f":{partes.password}" if partes.password else '')
+        host = f"{credenciais}@{host}"
+    return urlunparse((esquema, host, partes.path or '/', partes.params, partes.query, ''))
+
+def materializar_arquivo(origem, destino):
+    """
+    Cria o destino com o conteúdo da origem, como hardlink ou, se não for
+    possível (outro sistema de arquivos, sem suporte), como cópia.
+    O destino é substituído de forma atômica.
+    
+    Returns:
+        'existente' (já é o mesmo arquivo), 'hardlink' ou 'copia'
+    """
+    if os.path.exists(destino) and os.path.samefile(origem, destino):
+        return 'existente'
+    temporario = destino + SUFIXO_PARCIAL
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    try:
+        os.link(origem, temporario)
+        modo = 'hardlink'
+    except OSError:
+        shutil.copyfile(origem, temporario)
+        modo = 'copia'
+    os.replace(temporario, destino)
+    return modo
+
+class ManifestoDiretorio:
+    """
+    Registro dos arquivos baixados em um diretório.
+    
+    Para cada arquivo guarda a URL de origem, o tamanho, o ETag, o
+    Last-Modified e o SHA-256. Downloads em andamento também são
+    registrados (com concluido=False), para que o arquivo .part possa ser
+    retomado na próxima execução.
+    """
+    
+    def __init__(self, diretorio):
+        self.caminho = os.path.join(diretorio, NOME_MANIFESTO)
+        self._lock = threading.Lock()
+        self._entradas = self._ler()
+    
+    def _ler(self):
+        """Lê o manifesto do disco (vazio se não existir ou estiver corrompido)."""
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+            return dict(dados.get('arquivos', {}))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Manifesto de downloads ignorado ({str(e)}): {self.caminho}")
+            return {}
+    
+    def obter(self, nome):
+        """Retorna uma cópia da entrada do arquivo, ou None."""
+        with self._lock:
+            entrada = self._entradas.get(nome)
+            return dict(entrada) if entrada else None
+    
+    def registrar(self, nome, entrada):
+        """Grava a entrada do arquivo e salva o manifesto."""
+        with self._lock:
+            self._entradas[nome] = entrada
+            self._salvar()
+    
+    def _salvar(self):
+        """Salva o manifesto de forma atômica (arquivo temporário + rename)."""
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': 1, 'arquivos': self._entradas}, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho)
+
+# Um manifesto por diretório, compartilhado entre os workers
+_manifestos = {}
+_manifestos_lock = threading.Lock()
+
+def obter_manifesto(diretorio):
+    """Retorna o manifesto do diretório, carregando-o na primeira chamada."""
+    chave = os.path.normcase(os.path.abspath(diretorio))
+    with _manifestos_lock:
+        manifesto = _manifestos.get(chave)
+        if manifesto is None:
+            manifesto = ManifestoDiretorio(diretorio)
+            _manifestos[chave] = manifesto
+        return manifesto
+
+def _validador_if_range(entrada):
+    """Valor para o cabeçalho If-Range (ETags fracos não são aceitos pelo protocolo)."""
+    etag = entrada.get('etag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return entrada.get('last_modified')
+
+def _tamanho_anunciado(response):
+    """Tamanho do corpo informado pelo servidor, se confiável."""
+    try:
+        return int(response.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return None
+
+def _sem_alteracoes(response, entrada):
+    """Indica se a resposta confirma que o arquivo registrado não mudou."""
+    if response.status_code == 304:
+        return True
+    if response.status_code != 200:
+        return False
+    etag = response.headers.get('ETag')
+    if entrada.get('etag') or etag:
+        return etag == entrada.get('etag')
+    last_modified = response.headers.get('Last-Modified')
+    if entrada.get('last_modified') or last_modified:
+        return last_modified == entrada.get('last_modified')
+    # Servidor sem validadores: comparar apenas o tamanho
+    return _tamanho_anunciado(response) == entrada.get('tamanho')
+
+def _hash_arquivo(caminho, hash_obj, limite=None):
+    """Atualiza o hash com o conteúdo do arquivo (até o limite de bytes)."""
+    restante = limite
+    with open(caminho, 'rb') as f:
+        while restante is None or restante > 0:
+            bloco = f.read(TAMANHO_BLOCO if restante is None else min(TAMANHO_BLOCO, restante))
+            if not bloco:
+                break
+            hash_obj.update(bloco)
+            if restante is not None:
+                restante -= len(bloco)
+    return hash_obj
+
+def baixar_para_arquivo(url, caminho_destino, limitador_banda=None, timeout=30,
+                        tentativas=TENTATIVAS_DOWNLOAD_PADRAO, segmentos=SEGMENTOS_PADRAO,
+                        limiar_segmentado=LIMIAR_SEGMENTADO_PADRAO, limitador_hosts=None):
+    """
+    Baixa a URL para o caminho de destino, com retomada.
+    
+    O conteúdo é gravado em um arquivo .part, renomeado para o destino
+    só quando o download termina. Um download interrompido é retomado com
+    uma requisição Range, tanto nas novas tentativas desta chamada quanto
+    em execuções posteriores. Arquivos já baixados e sem alterações no
+    servidor (conforme o manifesto do diretório) não são transferidos de novo.
+    
+    Arquivos a partir do limiar, de servidores que aceitam Range, podem ser
+    baixados em vários segmentos paralelos gravados no mesmo arquivo.
+    
+    Args:
+        url: URL do arquivo
+        caminho_destino: Caminho onde o arquivo será salvo
+        limitador_banda: LimitadorTaxa em bytes por segundo (opcional)
+        timeout: Tempo limite da requisição em segundos
+        tentativas: Quantidade de tentativas em caso de falha de conexão
+        segmentos: Conexões paralelas por arquivo grande (1 = sem segmentação)
+        limiar_segmentado: Tamanho mínimo (em bytes) para baixar em segmentos
+        limitador_hosts: LimitadorPorHost aplicado às requisições dos segmentos (opcional)
+    
+    Returns:
+        Dicionário com 'bytes' (transferidos), 'tamanho', 'sha256', 'pulado' e 'retomado'
+    """
+    diretorio, nome = os.path.split(os.path.abspath(caminho_destino))
+    manifesto = obter_manifesto(diretorio)
+    
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return _baixar_uma_vez(url, caminho_destino, nome, manifesto, limitador_banda, timeout,
+                                   segmentos, limiar_segmentado, limitador_hosts)
+        except (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, DownloadIncompleto) as e:
+            if tentativa == tentativas:
+                raise
+            logger.warning(f"Download interrompido ({str(e)}). Tentando novamente {url} "
+                           f"({tentativa + 1}/{tentativas})")
+
+def _baixar_uma_vez(url, caminho_destino, nome, manifesto, limitador_banda, timeout,
+                    segmentos, limiar_segmentado, limitador_hosts):
+    """Uma tentativa de download (condicional, retomada ou completa)."""
+    parcial = caminho_destino + SUFIXO_PARCIAL
+    entrada = manifesto.obter(nome)
+    mesma_origem = bool(entrada) and entrada.get('url') == url
+    
+    # Sem compressão no transporte: os intervalos (Range) se referem aos bytes do arquivo
+    headers = {'Accept-Encoding': 'identity'}
+    inicio = 0
+    
+    completo = (mesma_origem and entrada.get('concluido') and os.path.exists(caminho_destino)
+                and os.path.getsize(caminho_destino) == entrada.get('tamanho'))
+    if completo:
+        # Arquivo já baixado: GET condicional
+        if entrada.get('etag'):
+            headers['If-None-Match'] = entrada['etag']
+        if entrada.get('last_modified'):
+            headers['If-Modified-Since'] = entrada['last_modified']
+    elif mesma_origem and not entrada.get('concluido') and os.path.exists(parcial):
+        # Download interrompido: pedir só o restante, se o arquivo não mudou (If-Range)
+        validador = _validador_if_range(entrada)
+        if entrada.get('segmentos'):
+            # O .part segmentado é pré-alocado; o progresso fica no manifesto
+            if validador:
+                return _baixar_segmentado(url, caminho_destino, nome, manifesto, entrada,
+                                          limitador_banda, limitador_hosts, timeout)
+        elif validador and os.path.getsize(parcial) > 0:
+            inicio = os.path.getsize(parcial)
+            headers['Range'] = f'bytes={inicio}-'
+            headers['If-Range'] = validador
+    
+    with obter_sessao().get(url, stream=True, timeout=timeout, headers=headers) as response:
+        if completo and _sem_alteracoes(response, entrada):
+            logger.info(f"Arquivo já baixado e sem alterações: {caminho_destino}")
+            return {'bytes': 0, 'tamanho': entrada['tamanho'], 'sha256': entrada.get('sha256'),
+                    'pulado': True, 'retomado': False}
+        
+        if response.status_code == 416 and inicio:
+            # Intervalo inválido: descartar o parcial e recomeçar
+            os.remove(parcial)
+            raise DownloadIncompleto(f"Não foi possível retomar o download de {url}")
+        response.raise_for_status()
+        
+        hash_obj = hashlib.sha256()
+        if response.status_code == 206 and inicio:
+            intervalo = re.match(r'bytes (\d+)-\d+/(\d+|\*)', response.headers.get('Content-Range', ''))
+            if not intervalo or int(intervalo.group(1)) != inicio:
+                os.remove(parcial)
+                raise DownloadIncompleto(f"Intervalo inesperado ao retomar {url}")
+            total = int(intervalo.group(2)) if intervalo.group(2) != '*' else None
+            _hash_arquivo(parcial, hash_obj, inicio)
+            modo = 'ab'
+            logger.info(f"Retomando download a partir de {inicio} bytes: {caminho_destino}")
+        else:
+            inicio = 0
+            total = _tamanho_anunciado(response)
+            modo = 'wb'
+        
+        # Registrar o download em andamento para que possa ser retomado
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        
+        # Arquivo grande em servidor que aceita Range: baixar em segmentos.
+        # O validador (If-Range) garante que todos os segmentos sejam do mesmo arquivo.
+        if (segmentos > 1 and not inicio and total and total >= limiar_segmentado
+                and response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+                and _validador_if_range({'etag': etag, 'last_modified': last_modified})):
+            entrada = {'url': url, 'tamanho': total, 'etag': etag, 'last_modified': last_modified,
+                       'concluido': False, 'segmentos': _dividir_segmentos(total, segmentos)}
+            manifesto.registrar(nome, entrada)
+            return _baixar_segmentado(url, caminho_destino, nome, manifesto, entrada,
+                                      limitador_banda, limitador_hosts, timeout, response)
+        
+        manifesto.registrar(nome, {'url': url, 'tamanho': total, 'etag': etag,
+                                   'last_modified': last_modified, 'concluido': False})
+        
+        gravados = inicio
+        with open(parcial, modo) as f:
+            for chunk in response.iter_content(chunk_size=TAMANHO_BLOCO):
+                if not chunk:
+                    continue
+                if limitador_banda:
+                    limitador_banda.aguardar(len(chunk))
+                f.write(chunk)
+                hash_obj.update(chunk)
+                gravados += len(chunk)
+    
+    if total is not None and gravados != total:
+        raise DownloadIncompleto(f"Download incompleto de {url}: {gravados} de {total} bytes")
+    
+    os.replace(parcial, caminho_destino)
+    manifesto.registrar(nome, {'url': url, 'tamanho': gravados, 'etag': etag, 'last_modified': last_modified,
+                               'sha256': hash_obj.hexdigest(), 'concluido': True, 'baixado_em': time.time()})
+    return {'bytes': gravados - inicio, 'tamanho': gravados, 'sha256': hash_obj.hexdigest(),
+            'pulado': False, 'retomado': inicio > 0}
+
+def _dividir_segmentos(total, quantidade):
+    """Divide [0, total) em intervalos [inicio, fim, baixados] de tamanhos próximos."""
+    tamanho = -(-total // quantidade)
+    return [[inicio, min(inicio + tamanho, total) - 1, 0] for inicio in range(0, total, tamanho)]
+
+def _baixar_segmentado(url, caminho_destino, nome, manifesto, entrada, limitador_banda,
+                       limitador_hosts, timeout, resposta_inicial=None):
+    """
+    Baixa os segmentos pendentes da entrada em paralelo e conclui o arquivo.
+    
+    Cada segmento é gravado na sua posição do arquivo .part pré-alocado, com
+    um arquivo aberto e seek por thread (funciona também no Windows, que não
+    tem os.pwrite). O primeiro segmento aproveita a resposta inicial, se houver.
+    A resposta de cada segmento precisa trazer o intervalo pedido, o tamanho
+    total e os validadores (ETag, Last-Modified) do arquivo registrado; caso
+    contrário, o arquivo mudou e o download recomeça do zero (ArquivoAlterado).
+    O progresso de cada segmento fica no manifesto quando o download falha.
+    """
+    parcial = caminho_destino + SUFIXO_PARCIAL
+    segmentos = entrada['segmentos']
+    total = entrada['tamanho']
+    validador = _validador_if_range(entrada)
+    ja_baixados = sum(segmento[2] for segmento in segmentos)
+    
+    if resposta_inicial is not None or not os.path.exists(parcial):
+        # Pré-alocar o arquivo com o tamanho final
+        with open(parcial, 'wb') as f:
+            f.truncate(total)
+    
+    pendentes = [segmento for segmento in segmentos if segmento[2] < segmento[1] - segmento[0] + 1]
+    logger.info(f"Baixando em {len(pendentes)} segmentos ({total} bytes): {caminho_destino}")
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(pendentes))) as executor:
+            futuros = []
+            for segmento in pendentes:
+                resposta = resposta_inicial if segmento[0] == 0 and segmento[2] == 0 else None
+                futuros.append(executor.submit(_baixar_segmento, url, parcial, segmento, validador,
+                                               entrada, resposta, limitador_banda,
+                                               limitador_hosts, timeout))
+            erros = [futuro.exception() for futuro in futuros if futuro.exception()]
+        if erros:
+            raise erros[0]
+    except ArquivoAlterado:
+        # Os segmentos já baixados não servem mais: recomeçar do zero
+        os.remove(parcial)
+        manifesto.registrar(nome, {'url': url, 'concluido': False})
+        raise
+    except Exception:
+        manifesto.registrar(nome, entrada)
+        raise
+    
+    # Cada segmento já foi conferido (intervalo, tamanho total e validadores); falta ver se todos terminaram
+    if any(segmento[2] != segmento[1] - segmento[0] + 1 for segmento in segmentos):
+        manifesto.registrar(nome, entrada)
+        raise DownloadIncompleto(f"Download segmentado incompleto de {url}")
+    sha256 = _hash_arquivo(parcial, hashlib.sha256()).hexdigest()
+    
+    os.replace(parcial, caminho_destino)
+    manifesto.registrar(nome, {'url': url, 'tamanho': total, 'etag': entrada.get('etag'),
+                               'last_modified': entrada.get('last_modified'), 'sha256': sha256,
+                               'concluido': True, 'baixado_em': time.time()})
+    return {'bytes': total - ja_baixados, 'tamanho': total, 'sha256': sha256,
+            'pulado': False, 'retomado': ja_baixados > 0}
+
+def _mesmo_arquivo_segmento(resposta, entrada):
+    """
+    Confere se a resposta de um segmento é do arquivo registrado na entrada.
+    
+    O tamanho total do Content-Range precisa ser o da entrada, e o ETag e o
+    Last-Modified, quando a resposta os informa, precisam ser os registrados.
+    """
+    intervalo = re.match(r'bytes \d+-\d+/(\d+|\*)', resposta.headers.get('Content-Range', ''))
+    if intervalo and intervalo.group(1) != '*' and int(intervalo.group(1)) != entrada['tamanho']:
+        return False
+    for cabecalho, chave in (('ETag', 'etag'), ('Last-Modified', 'last_modified')):
+        valor = resposta.headers.get(cabecalho)
+        if valor is not None and valor != entrada.get(chave):
+            return False
+    return True
+
+def _baixar_segmento(url, parcial, segmento, validador, entrada, resposta, limitador_banda,
+                     limitador_hosts, timeout):
+    """Baixa o restante de um segmento [inicio, fim, baixados] do arquivo registrado na entrada."""
+    inicio, fim = segmento[0], segmento[1]
+    if resposta is not None:
+        # Resposta completa já aberta: ler só os bytes do primeiro segmento
+        _gravar_segmento(resposta, parcial, segmento, limitador_banda)
+        return
+    
+    if limitador_hosts:
+        limitador_hosts.aguardar(url)
+    posicao = inicio + segmento[2]
+    headers = {'Accept-Encoding': 'identity', 'Range': f'bytes={posicao}-{fim}', 'If-Range': validador}
+    with obter_sessao().get(url, stream=True, timeout=timeout, headers=headers) as resposta:
+        if resposta.status_code == 200:
+            raise ArquivoAlterado(f"O arquivo mudou no servidor: {url}")
+        resposta.raise_for_status()
+        intervalo = re.match(r'bytes (\d+)-\d+/', resposta.headers.get('Content-Range', ''))
+        if resposta.status_code != 206 or not intervalo or int(intervalo.group(1)) != posicao:
+            raise DownloadIncompleto(f"Intervalo inesperado no segmento {posicao}-{fim} de {url}")
+        if not _mesmo_arquivo_segmento(resposta, entrada):
+            raise ArquivoAlterado(f"O arquivo mudou no servidor: {url}")
+        _gravar_segmento(resposta, parcial, segmento, limitador_banda)
+
+def _gravar_segmento(resposta, parcial, segmento, limitador_banda):
+    """Grava o corpo da resposta na posição do segmento, atualizando o progresso."""
+    inicio, fim = segmento[0], segmento[1]
+    with open(parcial, 'r+b') as f:
+        f.seek(inicio + segmento[2])
+        for chunk in resposta.iter_content(chunk_size=TAMANHO_BLOCO):
+            restante = fim + 1 - (inicio + segmento[2])
+            if restante <= 0:
+                break
+            chunk = chunk[:restante]
+            if not chunk:
+                continue
+            if limitador_banda:
+                limitador_banda.aguardar(len(chunk))
+            f.write(chunk)
+            segmento[2] += len(chunk)
+
+class _SaidaZip:
+    """
+    Destino do zipfile sem posicionamento (sem tell/seek).
+    
+    Os bytes escritos ficam acumulados até serem consumidos pelo gerador
+    da resposta. Sem tell(), o zipfile grava cada entrada com data
+    descriptor, sem precisar voltar ao cabeçalho.
+    """
+    
+    def __init__(self):
+        self._partes = []
+    
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        return len(dados)
+    
+    def flush(self):
+        pass
+    
+    def consumir(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+class _TransmissaoCancelada(Exception):
+    """O cliente deixou de consumir o ZIP."""
+
+class GerenciadorDownloads:
+    """
+    Executa downloads em paralelo com limite global de workers, limite de
+    requisições por host (token bucket) e limite opcional de banda total.
+    """
+    
+    def __init__(self, workers=WORKERS_DOWNLOAD_PADRAO, taxa_por_host=TAXA_POR_HOST_PADRAO,
+                 rajada_por_host=RAJADA_POR_HOST_PADRAO, banda_maxima=BANDA_MAXIMA_PADRAO,
+                 segmentos=SEGMENTOS_PADRAO, limiar_segmentado=LIMIAR_SEGMENTADO_PADRAO):
+        self.workers = max(1, int(workers))
+        self.segmentos = max(1, int(segmentos))
+        self.limiar_segmentado = limiar_segmentado
+        
+        # Deduplicação: arquivos já baixados por SHA-256 e economia obtida
+        self.economia = {'requisicoes': 0, 'bytes_transferencia': 0, 'bytes_disco': 0}
+        self._por_conteudo = {}
+        self._dedup_lock = threading.Lock()
+        self.limitador_hosts = LimitadorPorHost(taxa_por_host, rajada_por_host)
+        self.limitador_banda = LimitadorTaxa(banda_maxima, banda_maxima) if banda_maxima else None
+    
+    def _executar(self, tarefa):
+        """Baixa uma tarefa respeitando os limites e devolve o resultado."""
+        try:
+            self.limitador_hosts.aguardar(tarefa['link'])
+            logger.info(f"Baixando arquivo de {tarefa['link']} para {tarefa['caminho']}")
+            resultado = baixar_para_arquivo(tarefa['link'], tarefa['caminho'], self.limitador_banda,
+                                            segmentos=self.segmentos,
+                                            limiar_segmentado=self.limiar_segmentado,
+                                            limitador_hosts=self.limitador_hosts)
+            if not resultado['pulado']:
+                logger.info(f"Arquivo baixado com sucesso: {tarefa['caminho']}")
+            resultado.update({'tarefa': tarefa, 'sucesso': True})
+            return resultado
+        except Exception as e:
+            logger.error(f"Erro ao baixar arquivo: {str(e)}")
+            return {'tarefa': tarefa, 'sucesso': False, 'erro': str(e)}
+    
+    def _deduplicar_conteudo(self, resultado):
+        """
+        Substitui o arquivo baixado por um hardlink de outro já baixado
+        neste job com o mesmo conteúdo (mesmo SHA-256).
+        """
+        caminho = resultado['tarefa']['caminho']
+        sha256 = resultado.get('sha256')
+        if not sha256:
+            return
+        with self._dedup_lock:
+            existente = self._por_conteudo.setdefault(sha256, caminho)
+        if existente == caminho or not os.path.exists(existente):
+            return
+        try:
+            modo = materializar_arquivo(existente, caminho)
+        except OSError as e:
+            logger.warning(f"Não foi possível deduplicar {caminho}: {str(e)}")
+            return
+        if modo == 'hardlink':
+            resultado['deduplicado'] = 'conteudo'
+            with self._dedup_lock:
+                self.economia['bytes_disco'] += resultado['tamanho']
+            logger.info(f"Conteúdo repetido, hardlink criado: {caminho} -> {existente}")
+    
+    def _materializar_repetidas(self, resultado, repetidas):
+        """Cria as cópias das tarefas com a mesma URL a partir do arquivo baixado."""
+        origem = resultado['tarefa']['caminho']
+        resultados = []
+        for tarefa in repetidas:
+            if not resultado['sucesso']:
+                resultados.append({'tarefa': tarefa, 'sucesso': False, 'erro': resultado['erro']})
+                continue
+            try:
+                modo = materializar_arquivo(origem, tarefa['caminho'])
+                diretorio, nome = os.path.split(os.path.abspath(tarefa['caminho']))
+                entrada = obter_manifesto(os.path.dirname(origem)).obter(os.path.basename(origem))
+                if entrada:
+                    entrada['url'] = tarefa['link']
+                    obter_manifesto(diretorio).registrar(nome, entrada)
+                with self._dedup_lock:
+                    self.economia['requisicoes'] += 1
+                    if not resultado['pulado']:
+                        self.economia['bytes_transferencia'] += resultado['tamanho']
+                    if modo != 'copia':
+                        self.economia['bytes_disco'] += resultado['tamanho']
+                logger.info(f"URL repetida, {modo} criado: {tarefa['caminho']}")
+                resultados.append({'tarefa': tarefa, 'sucesso': True, 'pulado': modo == 'existente', 'bytes': 0,
+                                   'tamanho': resultado['tamanho'], 'sha256': resultado.get('sha256'),
+                                   'retomado': False, 'deduplicado': 'url'})
+            except Exception as e:
+                logger.error(f"Erro ao copiar arquivo repetido: {str(e)}")
+                resultados.append({'tarefa': tarefa, 'sucesso': False, 'erro': str(e)})
+        return resultados
+    
+    def _executar_unica(self, tarefa, repetidas):
+        """Baixa uma URL uma única vez e materializa as demais tarefas com a mesma URL."""
+        resultado = self._executar(tarefa)
+        if resultado['sucesso']:
+            self._deduplicar_conteudo(resultado)
+        return [resultado] + self._materializar_repetidas(resultado, repetidas)
+    
+    def baixar(self, tarefas):
+        """
+        Baixa todas as tarefas.
+        
+        Cada URL (normalizada) é baixada uma única vez por chamada; as outras
+        tarefas com a mesma URL viram hardlinks (ou cópias) do arquivo
+        baixado, assim como arquivos de URLs diferentes com o mesmo conteúdo.
+        A economia obtida fica em self.economia. Se o mesmo caminho aparecer
+        mais de uma vez, só a última tarefa é baixada, pois é ela que define
+        o arquivo final.
+        
+        Args:
+            tarefas: Lista de dicionários com 'link' e 'caminho' (outras chaves são preservadas)
+        
+        Yields:
+            Dicionários com 'tarefa', 'sucesso' e o resultado de baixar_para_arquivo ou 'erro',
+            conforme terminam ('deduplicado' indica arquivos obtidos sem download próprio)
+        """
+        ultimas = OrderedDict()
+        for tarefa in tarefas:
+            chave = os.path.normcase(os.path.abspath(tarefa['caminho']))
+            ultimas.pop(chave, None)
+            ultimas[chave] = tarefa
+        
+        por_url = OrderedDict()
+        for tarefa in ultimas.values():
+            por_url.setdefault(normalizar_url(tarefa['link']), []).append(tarefa)
+        
+        # Tarefas substituídas por outra com o mesmo caminho
+        for tarefa in tarefas:
+            if ultimas[os.path.normcase(os.path.abspath(tarefa['caminho']))] is not tarefa:
+                yield {'tarefa': tarefa, 'sucesso': True, 'pulado': False, 'bytes': 0, 'retomado': False}
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futuros = [executor.submit(self._executar_unica, grupo[0], grupo[1:]) for grupo in por_url.values()]
+            try:
+                for futuro in as_completed(futuros):
+                    for resultado in futuro.result():
+                        yield resultado
+            finally:
+                # Se a iteração for interrompida, os downloads ainda na fila não começam
+                for futuro in futuros:
+                    futuro.cancel()
+    
+    def _colocar(self, fila, item, cancelado):
+        """Coloca um item na fila, desistindo se a transmissão for cancelada."""
+        while True:
+            if cancelado.is_set():
+                raise _TransmissaoCancelada()
+            try:
+                fila.put(item, timeout=0.5)
+                return
+            except Full:
+                continue
+    
+    def _produzir_zip(self, tarefa, fila, cancelado, tentativas=TENTATIVAS_DOWNLOAD_PADRAO):
+        """
+        Baixa uma tarefa colocando os blocos na fila do ZIP.
+        
+        Itens da fila: ('inicio', tamanho), ('dados', bloco), ('fim', total) ou ('erro', mensagem).
+        O 'inicio' é enviado uma única vez, junto com o primeiro bloco (ou com
+        o 'fim', para arquivos vazios): uma tentativa que falha antes do
+        primeiro byte é repetida sem que o ZIP perceba, já com o tamanho
+        anunciado na nova resposta. Uma conexão interrompida depois disso é
+        retomada com Range a partir do último bloco enviado.
+        """
+        url = tarefa['link']
+        enviados = 0
+        total = None
+        validador = None
+        iniciado = False
+        try:
+            self.limitador_hosts.aguardar(url)
+            logger.info(f"Baixando arquivo de {url} para o ZIP ({tarefa['arquivo_zip']})")
+            for tentativa in range(1, tentativas + 1):
+                headers = {'Accept-Encoding': 'identity'}
+                if enviados:
+                    headers['Range'] = f'bytes={enviados}-'
+                    headers['If-Range'] = validador
+                try:
+                    with obter_sessao().get(url, stream=True, timeout=30, headers=headers) as response:
+                        if enviados:
+                            intervalo = re.match(r'bytes (\d+)-', response.headers.get('Content-Range', ''))
+                            if response.status_code != 206 or not intervalo or int(intervalo.group(1)) != enviados:
+                                raise DownloadIncompleto(f"Não foi possível retomar o download de {url}")
+                        else:
+                            response.raise_for_status()
+                            total = _tamanho_anunciado(response)
+                            validador = _validador_if_range({'etag': response.headers.get('ETag'),
+                                                             'last_modified': response.headers.get('Last-Modified')})
+                        
+                        for chunk in response.iter_content(chunk_size=TAMANHO_BLOCO):
+                            if not chunk:
+                                continue
+                            if self.limitador_banda:
+                                self.limitador_banda.aguardar(len(chunk))
+                            if not iniciado:
+                                self._colocar(fila, ('inicio', total), cancelado)
+                                iniciado = True
+                            self._colocar(fila, ('dados', chunk), cancelado)
+                            enviados += len(chunk)
+                    
+                    if total is not None and enviados != total:
+                        raise DownloadIncompleto(f"Download incompleto de {url}: {enviados} de {total} bytes")
+                    if not iniciado:
+                        self._colocar(fila, ('inicio', total), cancelado)
+                    self._colocar(fila, ('fim', enviados), cancelado)
+                    return
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError, DownloadIncompleto) as e:
+                    # Sem validador não é seguro continuar de onde parou
+                    if tentativa == tentativas or (enviados and not validador):
+                        raise
+                    logger.warning(f"Download interrompido ({str(e)}). Tentando novamente {url} "
+                                   f"({tentativa + 1}/{tentativas})")
+        except _TransmissaoCancelada:
+            pass
+        except Exception as e:
+            logger.error(f"Erro ao baixar arquivo: {str(e)}")
+            try:
+                self._colocar(fila, ('erro', str(e)), cancelado)
+            except _TransmissaoCancelada:
+                pass
+    
+    def transmitir_zip(self, tarefas, ao_concluir=None, arquivos_finais=None):
+        """
+        Baixa as tarefas e gera um ZIP com elas, em blocos, sem usar o disco.
+        
+        Os downloads rodam nos workers, cada um com uma fila limitada de
+        blocos; as entradas são escritas no ZIP na ordem das tarefas. A
+        memória usada fica limitada a cerca de workers × BLOCOS_EM_FILA_ZIP
+        blocos. Se o mesmo caminho aparecer mais de uma vez, só a última
+        tarefa é baixada, como no download em disco, em que ela sobrescreve
+        as anteriores. Se um download falhar depois que a entrada já começou
+        a ser transmitida, ela fica truncada e o ZIP recebe, logo em seguida,
+        a entrada <nome>.INCOMPLETO com o erro.
+        
+        Args:
+            tarefas: Lista de dicionários com 'link' e 'arquivo_zip' (caminho dentro do ZIP)
+            ao_concluir: Função chamada com o resultado de cada tarefa
+            arquivos_finais: Função que devolve uma lista de (nome, bytes) adicionados ao fim do ZIP
+        
+        Yields:
+            Blocos de bytes do arquivo ZIP
+        """
+        ultimas = OrderedDict()
+        for tarefa in tarefas:
+            ultimas.pop(tarefa['arquivo_zip'], None)
+            ultimas[tarefa['arquivo_zip']] = tarefa
+        substituidas = [tarefa for tarefa in tarefas if ultimas[tarefa['arquivo_zip']] is not tarefa]
+        
+        saida = _SaidaZip()
+        cancelado = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        pendentes = iter(ultimas.values())
+        em_andamento = deque()
+        
+        def enviar_proxima():
+            tarefa = next(pendentes, None)
+            if tarefa is not None:
+                fila = Queue(maxsize=BLOCOS_EM_FILA_ZIP)
+                executor.submit(self._produzir_zip, tarefa, fila, cancelado)
+                em_andamento.append((tarefa, fila))
+        
+        def concluir(resultado):
+            if ao_concluir:
+                ao_concluir(resultado)
+        
+        try:
+            for _ in range(self.workers * 2):
+                enviar_proxima()
+            
+            with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for tarefa in substituidas:
+                    concluir({'tarefa': tarefa, 'sucesso': True, 'pulado': False, 'bytes': 0})
+                
+                while em_andamento:
+                    tarefa, fila = em_andamento.popleft()
+                    enviar_proxima()
+                    
+                    tipo, valor = fila.get()
+                    if tipo == 'erro':
+                        concluir({'tarefa': tarefa, 'sucesso': False, 'erro': valor})
+                        continue
+                    
+                    # Arquivos de tamanho desconhecido ou grandes precisam de ZIP64
+                    info = zipfile.ZipInfo(tarefa['arquivo_zip'], date_time=time.localtime()[:6])
+                    info.external_attr = 0o644 << 16
+                    zip64 = valor is None or valor >= zipfile.ZIP64_LIMIT
+                    tamanho = valor
+                    escritos = 0
+                    resultado = None
+                    with zf.open(info, 'w', force_zip64=zip64) as entrada:
+                        while True:
+                            tipo, valor = fila.get()
+                            if tipo == 'dados':
+                                entrada.write(valor)
+                                escritos += len(valor)
+                                dados = saida.consumir()
+                                if dados:
+                                    yield dados
+                            elif tipo == 'fim':
+                                resultado = {'tarefa': tarefa, 'sucesso': True, 'pulado': False, 'bytes': valor}
+                                break
+                            else:
+                                # Falha depois de iniciar a entrada: ela fica truncada no ZIP
+                                resultado = {'tarefa': tarefa, 'sucesso': False, 'erro': f"Arquivo incompleto: {valor}"}
+                                break
+                    if not resultado['sucesso']:
+                        # A entrada já foi transmitida: marcar no próprio ZIP que ela está incompleta
+                        recebido = f"{escritos} de {tamanho}" if tamanho is not None else f"{escritos}"
+                        marcador = zipfile.ZipInfo(tarefa['arquivo_zip'] + SUFIXO_INCOMPLETO_ZIP,
+                                                   date_time=time.localtime()[:6])
+                        marcador.external_attr = 0o644 << 16
+                        zf.writestr(marcador, f"O arquivo {tarefa['arquivo_zip']} está incompleto: o download "
+                                              f"falhou depois de {recebido} bytes.\n{valor}\n".encode('utf-8'))
+                    concluir(resultado)
+                    dados = saida.consumir()
+                    if dados:
+                        yield dados
+                
+                for nome, conteudo in (arquivos_finais() if arquivos_finais else []):
+                    info = zipfile.ZipInfo(nome, date_time=time.localtime()[:6])
+                    info.external_attr = 0o644 << 16
+                    zf.writestr(info, conteudo, compress_type=zipfile.ZIP_DEFLATED)
+            
+            dados = saida.consumir()
+            if dados:
+                yield dados
+        finally:
+            # Cliente desconectado ou fim da transmissão: liberar os workers
+            cancelado.set()
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,89 @@
+from collections import deque
+
+class IndicePalavras:
+    """
+    Índice de várias palavras-chave (autômato de Aho-Corasick).
+    
+    Encontra todas as palavras contidas em um texto em uma única passada,
+    com a mesma regra de Series.str.contains(palavra, case=False, regex=False):
+    a palavra aparece em qualquer posição do texto, comparando as versões
+    em maiúsculas dos dois.
+    """
+    
+    def __init__(self, palavras):
+        self.palavras = list(dict.fromkeys(palavras))
+        self._transicoes = [{}]
+        self._falhas = [0]
+        self._saidas = [()]
+        # Palavra vazia está contida em qualquer texto
+        self._sempre = tuple(i for i, palavra in enumerate(self.palavras) if not palavra)
+        
+        for i, palavra in enumerate(self.palavras):
+            if not palavra:
+                continue
+            no = 0
+            for caractere in palavra.upper():
+                proximo = self._transicoes[no].get(caractere)
+                if proximo is None:
+                    proximo = len(self._transicoes)
+                    self._transicoes[no][caractere] = proximo
+                    self._transicoes.append({})
+                    self._falhas.append(0)
+                    self._saidas.append(())
+                no = proximo
+            self._saidas[no] += (i,)
+        
+        self._calcular_falhas()
+    
+    def _calcular_falhas(self):
+        """Liga cada estado ao maior sufixo que também é prefixo de alguma palavra."""
+        transicoes, falhas, saidas = self._transicoes, self._falhas, self._saidas
+        fila = deque(transicoes[0].values())
+        while fila:
+            no = fila.popleft()
+            for caractere, filho in transicoes[no].items():
+                falha = falhas[no]
+                while falha and caractere not in transicoes[falha]:
+                    falha = falhas[falha]
+                destino = transicoes[falha].get(caractere, 0)
+                falhas[filho] = destino if destino != filho else 0
+                # Palavras que terminam no sufixo também terminam aqui
+                saidas[filho] += saidas[falhas[filho]]
+                fila.append(filho)
+    
+    def buscar(self, texto):
+        """Retorna o conjunto de índices (em self.palavras) das palavras contidas no texto."""
+        transicoes, falhas, saidas = self._transicoes, self._falhas, self._saidas
+        encontradas = set(self._sempre)
+        no = 0
+        for caractere in texto.upper():
+            while no and caractere not in transicoes[no]:
+                no = falhas[no]
+            no = transicoes[no].get(caractere, 0)
+            if saidas[no]:
+                encontradas.update(saidas[no])
+        return encontradas
+    
+    def linhas_por_palavra(self, textos):
+        """
+        Localiza as linhas em que cada palavra aparece.
+        
+        Args:
+            textos: Textos das linhas, na ordem (ex.: df[coluna].astype(str))
+        
+        Returns:
+            Dicionário {palavra: [posições das linhas, em ordem crescente]}
+        """
+        # Textos repetidos são buscados uma vez só
+        posicoes_por_texto = {}
+        for posicao, texto in enumerate(textos):
+            posicoes_por_texto.setdefault(texto, []).append(posicao)
+        
+        linhas = {palavra: [] for palavra in self.palavras}
+        por_indice = [linhas[palavra] for palavra in self.palavras]
+        for texto, posicoes in posicoes_por_texto.items():
+            for i in self.buscar(texto):
+                por_indice[i].extend(posicoes)
+        for posicoes in linhas.values():
+            posicoes.sort()
+        return linhas
@@ -0,0 +1,149 @@
+import logging
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+logger = logging.getLogger('braspub_api')
+
+def abrir_planilha_leitura(caminho):
+    """
+    Abre a planilha em modo somente leitura.
+
+    As linhas são lidas do arquivo sob demanda, sem carregar a planilha
+    inteira na memória. Como no pd.read_excel, as fórmulas vêm com o último
+    valor calculado.
+    """
+    return load_workbook(caminho, read_only=True, data_only=True, keep_links=False)
+
+def _converter_celula(celula):
+    """Converte a célula como o pd.read_excel (engine openpyxl)."""
+    if celula.value is None:
+        return ''
+    elif celula.data_type == TYPE_ERROR:
+        return np.nan
+    elif celula.data_type == TYPE_NUMERIC:
+        valor = int(celula.value)
+        if valor == celula.value:
+            return valor
+        return float(celula.value)
+    return celula.value
+
+def _linha_vazia(linha):
+    return all(celula.value is None or celula.value == '' for celula in linha)
+
+class LeitorPlanilha:
+    """
+    Leitura em streaming da primeira aba de uma planilha Excel.
+
+    Entrega um DataFrame com apenas as colunas pedidas, com os mesmos
+    nomes de colunas, índices e valores que o pd.read_excel teria gerado
+    (células vazias viram NaN, linhas vazias no fim são ignoradas). Os
+    tipos são inferidos na coluna inteira, como no pandas, por isso as
+    linhas não são entregues em blocos.
+    Arquivos .xls, que o openpyxl não lê, são lidos pelo pandas.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._book = None
+        if not str(caminho).lower().endswith('.xls'):
+            try:
+                self._book = abrir_planilha_leitura(caminho)
+            except Exception as e:
+                logger.warning(f"Leitura em streaming indisponível ({str(e)}). Usando pandas: {caminho}")
+        try:
+            self.colunas = self._ler_cabecalho()
+        except Exception:
+            self.fechar()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def fechar(self):
+        """Fecha o arquivo da planilha."""
+        if self._book is not None:
+            self._book.close()
+            self._book = None
+
+    def _linhas(self):
+        """Itera as linhas (tuplas de células) da primeira aba."""
+        aba = self._book.worksheets[0]
+        # Alguns geradores gravam dimensões erradas; ignorá-las como o pandas
+        aba.reset_dimensions()
+        return aba.rows
+
+    def _ler_cabecalho(self):
+        """Lê os nomes das colunas (primeira linha), com as regras de nomes do pandas."""
+        if self._book is None:
+            return list(pd.read_excel(self.caminho, nrows=0).columns)
+
+        cabecalho = []
+        for linha in self._linhas():
+            cabecalho = [_converter_celula(celula) for celula in linha]
+            break
+        while cabecalho and cabecalho[-1] == '':
+            cabecalho.pop()
+        if not cabecalho:
+            return []
+        # Nomes vazios viram "Unnamed: n" e repetidos ganham sufixo ".1", ".2"...
+        return list(TextParser([cabecalho], header=0, skip_blank_lines=False).read().columns)
+
+    def _montar_bloco(self, linhas, colunas, inicio):
+        """Monta o DataFrame das linhas com a mesma inferência de tipos do pd.read_excel."""
+        indice = pd.RangeIndex(inicio, inicio + len(linhas))
+        if not colunas:
+            return pd.DataFrame(index=indice, columns=pd.Index([], dtype=object))
+        bloco = TextParser(linhas, names=colunas, header=None, skip_blank_lines=False).read()
+        bloco.index = indice
+        return bloco
+
+    def _valores(self, colunas, limite_linhas=None):
+        """Itera as linhas de dados com os valores convertidos das colunas pedidas."""
+        indices = [self.colunas.index(coluna) for coluna in colunas]
+        vazias_pendentes = 0
+        lidas = 0
+
+        iterador = iter(self._linhas())
+        next(iterador, None)  # cabeçalho
+        for linha in iterador:
+            # Linhas vazias só contam se houver dados depois delas
+            if _linha_vazia(linha):
+                vazias_pendentes += 1
+                continue
+            # Vazias que completariam o limite ficariam no fim e seriam ignoradas
+            if limite_linhas is not None and lidas + vazias_pendentes >= limite_linhas:
+                return
+            while vazias_pendentes:
+                yield [''] * len(indices)
+                vazias_pendentes -= 1
+                lidas += 1
+            if limite_linhas is not None and lidas >= limite_linhas:
+                return
+            yield [_converter_celula(linha[i]) if i < len(linha) else '' for i in indices]
+            lidas += 1
+
+    def _ler_pandas(self, colunas, limite_linhas=None):
+        """Leitura pelo pandas, para arquivos que o openpyxl não abre (.xls)."""
+        df = pd.read_excel(self.caminho, usecols=colunas or None, nrows=limite_linhas)
+        return df[colunas]
+
+    def ler(self, colunas=None, limite_linhas=None):
+        """
+        Lê as colunas pedidas em um único DataFrame, igual a pd.read_excel(caminho)[colunas].
+
+        A planilha é percorrida em streaming e só os valores das colunas
+        pedidas ficam na memória.
+        """
+        colunas = list(self.colunas if colunas is None else colunas)
+        if self._book is None:
+            return self._ler_pandas(colunas, limite_linhas)
+        linhas = list(self._valores(colunas, limite_linhas))
+        if not linhas:
+            return pd.DataFrame(columns=colunas)
+        return self._montar_bloco(linhas, colunas, 0)
@@ -1,13 +1,25 @@
 from venv import logger
-import pandas as pd
 import os
 import json
 import sys
 from datetime import datetime, date, time
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from leitor_planilhas import abrir_planilha_leitura
+from escritor_planilhas import EscritorPlanilha, colunas_registros
 from organizador_keywords import (obter_link_por_tipo_midia,
-                                extrair_keywords_da_pagina, detectar_tipo_midia)
+                                extrair_keywords_da_pagina, detectar_tipo_midia,
+                                AnalisesPaginas)
+from cache_http import configurar_cache, obter_cache
+from trabalhos import TrabalhoCancelado
 import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Planilhas com até esse número de linhas são copiadas em modo completo (mantendo
+# estilos, larguras, mesclagens...); acima dele, a cópia é gravada em streaming
+LIMITE_LINHAS_COPIA_COMPLETA_PADRAO = int(os.environ.get('BRASPUB_LIMITE_LINHAS_COPIA_COMPLETA', 10000))
+COPIA_COMPLETA_PADRAO = os.environ.get('BRASPUB_COPIA_COMPLETA', '') in ('1', 'true', 'sim')  # também acima do limite
 
 def json_serial(obj):
     """
@@ -20,7 +32,8 @@ def json_serial(obj):
         return obj.isoformat()
     raise TypeError(f"Tipo não serializável: {type(obj)}")
 
-def processar_planilha(caminho_planilha, aba_nome=None, primeira_linha=2, limite_linhas=None):
+def processar_planilha(caminho_planilha, aba_nome=None, primeira_linha=2, limite_linhas=None, workers=None,
+                       trabalho=None):
     """
     Processa a planilha Excel para extrair informações e complementá-las.
     
@@ -29,6 +42,9 @@ def processar_planilha(caminho_planilha, aba_nome=None, primeira_linha=2, limite
         aba_nome: Nome da aba a ser processada (opcional)
         primeira_linha: Número da primeira linha a ser processada (começando em 1)
         limite_linhas: Número máximo de linhas a processar (opcional)
+        workers: Número de linhas resolvidas em paralelo (opcional, padrão: sequencial)
+        trabalho: Trabalho opcional que recebe o progresso (linhas resolvidas, URL
+                  em andamento, acertos do cache e erros) e o resultado de cada linha
         
     Returns:
         Dict com status e resultados da operação
@@ -39,135 +55,114 @@ def processar_planilha(caminho_planilha, aba_nome=None, primeira_linha=2, limite
             logger.error(f"Arquivo não encontrado: {caminho_planilha}")
             return {'status': 'erro', 'mensagem': 'Arquivo não encontrado'}
         
-        # Carregar planilha
-        book = load_workbook(caminho_planilha, data_only=True)
-        if aba_nome:
-            if aba_nome not in book.sheetnames:
-                logger.error(f"Aba '{aba_nome}' não encontrada na planilha")
-                return {'status': 'erro', 'mensagem': f"Aba '{aba_nome}' não encontrada na planilha"}
-            aba = book[aba_nome]
-        else:
-            aba = book.active
-        
-        # Definir número total de linhas a processar
-        max_row = aba.max_row
-        ultima_linha = min(max_row, primeira_linha + limite_linhas - 1) if limite_linhas else max_row
+        # Abrir a planilha em modo somente leitura (linhas lidas em streaming)
+        book = abrir_planilha_leitura(caminho_planilha)
+        try:
+            if aba_nome:
+                if aba_nome not in book.sheetnames:
+                    logger.error(f"Aba '{aba_nome}' não encontrada na planilha")
+                    return {'status': 'erro', 'mensagem': f"Aba '{aba_nome}' não encontrada na planilha"}
+                aba = book[aba_nome]
+            else:
+                aba = book.active
+            nome_aba_processada = aba.title
+            linhas_aba = aba.max_row  # pela dimensão gravada no arquivo (None se ausente)
+            
+            # Verificar se existem colunas para link web imagem e texto
+            colunas = next(aba.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            col_link_web_imagem = None
+            col_link_web_texto = None
+            
+            for idx, col_name in enumerate(colunas, 1):
+                if col_name and 'link web' in str(col_name).lower() and 'imagem' in str(col_name).lower():
+                    col_link_web_imagem = idx
+                    logger.info(f"Encontrada coluna Link web - Imagem: {col_name} (índice {idx})")
+                elif col_name and (('link web' in str(col_name).lower() and 'texto' in str(col_name).lower()) or
+                                  ('link materia' in str(col_name).lower())):  # Adicionar suporte para "Link Materia"
+                    col_link_web_texto = idx
+                    logger.info(f"Encontrada coluna {col_name} (índice {idx}) - tratando como Link web - Texto")
+            
+            # Ler os dados de cada linha antes de resolver os links
+            # (só as três colunas usadas ficam na memória)
+            ultima_linha_limite = primeira_linha + limite_linhas - 1 if limite_linhas else None
+            ultima_linha = primeira_linha - 1
+            linhas = []
+            erros_leitura = {}
+            valores_linhas = aba.iter_rows(min_row=primeira_linha, max_row=ultima_linha_limite, values_only=True)
+            for idx, (row_num, valores) in enumerate(zip(range(primeira_linha, sys.maxsize), valores_linhas)):
+                ultima_linha = row_num
+                try:
+                    url_base = valores[0] if valores else None
+                    
+                    if not url_base:
+                        logger.warning(f"URL não encontrada na linha {row_num}")
+                        continue
+                    
+                    # Verificar se temos links web específicos
+                    link_web_imagem = _valor_coluna(valores, col_link_web_imagem)
+                    link_web_texto = _valor_coluna(valores, col_link_web_texto)
+                    linhas.append((idx, row_num, url_base, link_web_imagem, link_web_texto))
+                    
+                except Exception as e:
+                    logger.error(f"Erro ao processar linha {row_num}: {str(e)}", exc_info=True)
+                    erros_leitura[row_num] = str(e)
+                    linhas.append((idx, row_num, f"Linha {row_num}", None, None))
+        finally:
+            book.close()
         
         resultados = []
         total_itens = ultima_linha - primeira_linha + 1
         
-        # Verificar se existem colunas para link web imagem e texto
-        colunas = [cell.value for cell in aba[1]]
-        col_link_web_imagem = None
-        col_link_web_texto = None
+        # Cada página é baixada e analisada uma única vez nesta execução
+        analises = AnalisesPaginas()
         
-        for idx, col_name in enumerate(colunas, 1):
-            if col_name and 'link web' in str(col_name).lower() and 'imagem' in str(col_name).lower():
-                col_link_web_imagem = idx
-                logger.info(f"Encontrada coluna Link web - Imagem: {col_name} (índice {idx})")
-            elif col_name and (('link web' in str(col_name).lower() and 'texto' in str(col_name).lower()) or
-                              ('link materia' in str(col_name).lower())):  # Adicionar suporte para "Link Materia"
-                col_link_web_texto = idx
-                logger.info(f"Encontrada coluna {col_name} (índice {idx}) - tratando como Link web - Texto")
+        estatisticas_cache = obter_cache().estatisticas
+        acertos_cache = estatisticas_cache['acertos'] + estatisticas_cache['revalidados']
+        if trabalho:
+            trabalho.atualizar(total=len(linhas))
         
-        for idx, row_num in enumerate(range(primeira_linha, ultima_linha + 1)):
-            try:
-                # Status de progresso 
-                progresso = int((idx / total_itens) * 100)
-                logger.info(f"Processando linha {row_num} ({progresso}%)")
-                
-                # Ler dados da linha
-                url_base = aba.cell(row=row_num, column=1).value
-                
-                if not url_base:
-                    logger.warning(f"URL não encontrada na linha {row_num}")
-                    continue
-                
-                # Verificar se temos links web específicos
-                link_web_imagem = aba.cell(row=row_num, column=col_link_web_imagem).value if col_link_web_imagem else None
-                link_web_texto = aba.cell(row=row_num, column=col_link_web_texto).value if col_link_web_texto else None
-                
-                if link_web_imagem:
-                    logger.info(f"Link web - Imagem na linha {row_num}: {link_web_imagem}")
-                if link_web_texto:
-                    logger.info(f"Link web - Texto na linha {row_num}: {link_web_texto}")
-                
-                # Usar valores padrão para os campos que não conseguimos extrair
-                titulo = "Título não disponível"
-                publicacao = "Publicação não disponível"
-                data = datetime.now().strftime("%Y-%m-%d")
-                
-                # Para Portal, verificar se existe link_web_texto
-                if link_web_texto and link_web_texto.startswith(('http://', 'https://')):
-                    # Tentar buscar o link de PDF específicamente para o tipo Portal
-                    portal_link = obter_link_por_tipo_midia(link_web_texto, 'Portal')
-                    logger.info(f"Portal link extraído de link_web_texto: {portal_link}")
-                else:
-                    # Se não temos link web texto, tentar URL base para Portal
-                    portal_link = obter_link_por_tipo_midia(url_base, 'Portal')
-                    logger.info(f"Portal link extraído de url_base: {portal_link}")
-                
-                # Para Impresso, usar link_web_imagem ou processar URL para imagem
-                if link_web_imagem and link_web_imagem.startswith(('http://', 'https://')):
-                    # Para Impresso, usar diretamente o link_web_imagem
-                    imagem_link = link_web_imagem
-                    logger.info(f"Impresso link direto do link_web_imagem: {imagem_link}")
-                else:
-                    # Processar URL para encontrar imagem
-                    imagem_link = obter_link_por_tipo_midia(url_base, 'Impresso')
-                    logger.info(f"Impresso link extraído de url_base: {imagem_link}")
-                
-                # Para TV, processar URL para vídeo (não usar link_web_imagem)
-                video_link = obter_link_por_tipo_midia(url_base, 'TV')
-                logger.info(f"TV link extraído de url_base: {video_link}")
-                
-                # Para Rádio, processar URL para áudio (não usar link_web_imagem)
-                audio_link = obter_link_por_tipo_midia(url_base, 'Rádio')
-                logger.info(f"Rádio link extraído de url_base: {audio_link}")
-                
-                # Extrair palavras-chave
-                keywords = extrair_keywords_da_pagina(url_base)
-                
-                # Detectar tipo de mídia
-                tipo_midia = detectar_tipo_midia(url_base)
-                
-                # Armazenar resultados com informações detalhadas sobre os links web
-                resultados.append({
-                    'url': url_base,
-                    'titulo': titulo,
-                    'publicacao': publicacao,
-                    'data': data,
-                    'tipo_midia': tipo_midia,
-                    'keywords': keywords,
-                    'pdf': portal_link,
-                    'imagem': imagem_link,
-                    'video': video_link,
-                    'audio': audio_link,
-                    'link_web_imagem': link_web_imagem,
-                    'link_web_texto': link_web_texto
-                })
-                
-                # Atualizar células na planilha
-                aba.cell(row=row_num, column=2, value=titulo)
-                aba.cell(row=row_num, column=3, value=publicacao)
-                aba.cell(row=row_num, column=4, value=data)
-                aba.cell(row=row_num, column=5, value=tipo_midia)
-                aba.cell(row=row_num, column=6, value=', '.join(keywords) if keywords else '')
-                aba.cell(row=row_num, column=7, value=portal_link)
-                aba.cell(row=row_num, column=8, value=imagem_link)
-                aba.cell(row=row_num, column=9, value=video_link)
-                aba.cell(row=row_num, column=10, value=audio_link)
-                
-            except Exception as e:
-                logger.error(f"Erro ao processar linha {row_num}: {str(e)}", exc_info=True)
-                resultados.append({
-                    'url': url_base if 'url_base' in locals() else f"Linha {row_num}",
-                    'erro': str(e)
-                })
+        def resolver(linha):
+            row_num = linha[1]
+            if row_num in erros_leitura:
+                return row_num, {'url': linha[2], 'erro': erros_leitura[row_num]}
+            if trabalho:
+                trabalho.verificar_cancelamento()
+                trabalho.atualizar(atual=linha[2])
+            return _processar_linha(*linha, total_itens, analises)
+        
+        # Resolver as linhas (em paralelo se houver workers), na ordem original
+        atualizacoes = {}
+        for row_num, resultado in _mapear_em_ordem(resolver, linhas, workers):
+            resultados.append(resultado)
+            if trabalho:
+                # Acertos do cache desde a linha anterior (inclui outros usos simultâneos do cache)
+                acertos_anteriores = acertos_cache
+                acertos_cache = estatisticas_cache['acertos'] + estatisticas_cache['revalidados']
+                trabalho.atualizar(incremento=1, erros=1 if 'erro' in resultado else 0,
+                                   acertos_cache=acertos_cache - acertos_anteriores)
+                trabalho.publicar('linha', {'linha': row_num, **resultado})
+            if 'erro' in resultado:
+                continue
+            
+            # Valores das colunas 2 a 10 da linha
+            atualizacoes[row_num] = [
+                resultado['titulo'],
+                resultado['publicacao'],
+                resultado['data'],
+                resultado['tipo_midia'],
+                ', '.join(resultado['keywords']) if resultado['keywords'] else '',
+                resultado['pdf'],
+                resultado['imagem'],
+                resultado['video'],
+                resultado['audio']
+            ]
         
         # Salvar planilha com os resultados
         output_path = f"{os.path.splitext(caminho_planilha)[0]}_processado.xlsx"
-        book.save(output_path)
+        copia_completa = COPIA_COMPLETA_PADRAO or (linhas_aba is not None and
+                                                   linhas_aba <= LIMITE_LINHAS_COPIA_COMPLETA_PADRAO)
+        _salvar_planilha_processada(caminho_planilha, nome_aba_processada, atualizacoes, output_path,
+                                    completa=copia_completa)
         logger.info(f"Planilha processada salva em: {output_path}")
         
         return {
@@ -176,10 +171,216 @@ def processar_planilha(caminho_planilha, aba_nome=None, primeira_linha=2, limite
             'arquivo_saida': output_path
         }
         
+    except TrabalhoCancelado:
+        raise
     except Exception as e:
         logger.error(f"Erro ao processar planilha: {str(e)}", exc_info=True)
         return {'status': 'erro', 'mensagem': str(e)}
 
+def _valor_coluna(valores, coluna):
+    """Valor da coluna (começando em 1) na tupla de valores da linha, ou None."""
+    if coluna and coluna <= len(valores):
+        return valores[coluna - 1]
+    return None
+
+def _salvar_planilha_processada(caminho_planilha, nome_aba, atualizacoes, caminho_saida, completa=False):
+    """
+    Grava a cópia da planilha com as colunas 2 a 10 das linhas processadas atualizadas.
+    
+    Por padrão a cópia é feita em streaming: as linhas de todas as abas são
+    lidas em modo somente leitura e gravadas em modo somente escrita, sem
+    carregar a planilha na memória. Essa cópia mantém os valores e os
+    formatos de número (datas, percentuais...), mas não os demais estilos,
+    larguras de coluna, células mescladas, hiperlinks, comentários e
+    validações. Com completa=True, a planilha é carregada em modo completo
+    e tudo isso é mantido, ao custo de memória proporcional ao tamanho.
+    
+    Args:
+        caminho_planilha: Caminho da planilha original
+        nome_aba: Nome da aba processada
+        atualizacoes: Dicionário {número da linha: valores das colunas 2 a 10}
+        caminho_saida: Caminho da planilha de saída
+        completa: Carregar a planilha inteira para manter a formatação
+    """
+    if completa:
+        book = load_workbook(caminho_planilha, data_only=True)
+        try:
+            aba = book[nome_aba]
+            for row_num, valores in atualizacoes.items():
+                for coluna, valor in enumerate(valores, 2):
+                    aba.cell(row=row_num, column=coluna, value=valor)
+            book.save(caminho_saida)
+        finally:
+            book.close()
+        return
+    
+    origem = abrir_planilha_leitura(caminho_planilha)
+    try:
+        saida = Workbook(write_only=True)
+        for aba_origem in origem.worksheets:
+            aba_saida = saida.create_sheet(aba_origem.title)
+            atualizacoes_aba = atualizacoes if aba_origem.title == nome_aba else {}
+            proxima_linha = 1
+            # A leitura preenche as linhas ausentes do arquivo com células vazias
+            for row_num, linha in enumerate(aba_origem.iter_rows(min_row=1), 1):
+                aba_saida.append(_linha_copia(linha, atualizacoes_aba.get(row_num), aba_saida))
+                proxima_linha = row_num + 1
+            # Linhas processadas depois da última linha gravada na aba
+            for row_num in sorted(n for n in atualizacoes_aba if n >= proxima_linha):
+                for row_vazia in range(proxima_linha, row_num):
+                    aba_saida.append([])
+                aba_saida.append(_linha_copia((), atualizacoes_aba[row_num], aba_saida))
+                proxima_linha = row_num + 1
+        saida.save(caminho_saida)
+    finally:
+        origem.close()
+
+def _linha_copia(celulas, valores_atualizados, aba_saida):
+    """
+    Valores da linha para a cópia em streaming, com as colunas 2 a 10 substituídas se houver atualização.
+    
+    As células com formato de número diferente do geral viram WriteOnlyCell
+    para manter o formato; as demais são gravadas só com o valor.
+    """
+    linha = []
+    for celula in celulas:
+        formato = getattr(celula, 'number_format', None)
+        if celula.value is not None and formato and formato != 'General':
+            copia = WriteOnlyCell(aba_saida, value=celula.value)
+            copia.number_format = formato
+            linha.append(copia)
+        else:
+            linha.append(celula.value)
+    if valores_atualizados is not None:
+        linha.extend([None] * (1 + len(valores_atualizados) - len(linha)))
+        linha[1:1 + len(valores_atualizados)] = valores_atualizados
+    return linha
+
+def _processar_linha(idx, row_num, url_base, link_web_imagem, link_web_texto, total_itens, analises=None):
+    """
+    Resolve os links, palavras-chave e tipo de mídia de uma linha da planilha.
+    Não acessa a planilha, podendo ser executada em paralelo.
+    
+    Args:
+        idx: Posição da linha entre as linhas processadas
+        row_num: Número da linha na planilha
+        url_base: URL da matéria (coluna A)
+        link_web_imagem: Valor da coluna Link web - Imagem (ou None)
+        link_web_texto: Valor da coluna Link web - Texto (ou None)
+        total_itens: Total de linhas a processar, para o cálculo do progresso
+        analises: AnalisesPaginas da execução (páginas compartilhadas entre as linhas)
+        
+    Returns:
+        Tupla (row_num, resultado), onde resultado contém 'erro' em caso de falha
+    """
+    try:
+        # Status de progresso 
+        progresso = int((idx / total_itens) * 100)
+        logger.info(f"Processando linha {row_num} ({progresso}%)")
+        
+        if link_web_imagem:
+            logger.info(f"Link web - Imagem na linha {row_num}: {link_web_imagem}")
+        if link_web_texto:
+            logger.info(f"Link web - Texto na linha {row_num}: {link_web_texto}")
+        
+        # Usar valores padrão para os campos que não conseguimos extrair
+        titulo = "Título não disponível"
+        publicacao = "Publicação não disponível"
+        data = datetime.now().strftime("%Y-%m-%d")
+        
+        # Para Portal, verificar se existe link_web_texto
+        if link_web_texto and link_web_texto.startswith(('http://', 'https://')):
+            # Tentar buscar o link de PDF específicamente para o tipo Portal
+            portal_link = obter_link_por_tipo_midia(link_web_texto, 'Portal', analises)
+            logger.info(f"Portal link extraído de link_web_texto: {portal_link}")
+        else:
+            # Se não temos link web texto, tentar URL base para Portal
+            portal_link = obter_link_por_tipo_midia(url_base, 'Portal', analises)
+            logger.info(f"Portal link extraído de url_base: {portal_link}")
+        
+        # Para Impresso, usar link_web_imagem ou processar URL para imagem
+        if link_web_imagem and link_web_imagem.startswith(('http://', 'https://')):
+            # Para Impresso, usar diretamente o link_web_imagem
+            imagem_link = link_web_imagem
+            logger.info(f"Impresso link direto do link_web_imagem: {imagem_link}")
+        else:
+            # Processar URL para encontrar imagem
+            imagem_link = obter_link_por_tipo_midia(url_base, 'Impresso', analises)
+            logger.info(f"Impresso link extraído de url_base: {imagem_link}")
+        
+        # Para TV, processar URL para vídeo (não usar link_web_imagem)
+        video_link = obter_link_por_tipo_midia(url_base, 'TV', analises)
+        logger.info(f"TV link extraído de url_base: {video_link}")
+        
+        # Para Rádio, processar URL para áudio (não usar link_web_imagem)
+        audio_link = obter_link_por_tipo_midia(url_base, 'Rádio', analises)
+        logger.info(f"Rádio link extraído de url_base: {audio_link}")
+        
+        # Extrair palavras-chave
+        keywords = extrair_keywords_da_pagina(url_base, analises)
+        
+        # Detectar tipo de mídia
+        tipo_midia = detectar_tipo_midia(url_base, analises)
+        
+        # Resultado com informações detalhadas sobre os links web
+        return row_num, {
+            'url': url_base,
+            'titulo': titulo,
+            'publicacao': publicacao,
+            'data': data,
+            'tipo_midia': tipo_midia,
+            'keywords': keywords,
+            'pdf': portal_link,
+            'imagem': imagem_link,
+            'video': video_link,
+            'audio': audio_link,
+            'link_web_imagem': link_web_imagem,
+            'link_web_texto': link_web_texto
+        }
+        
+    except Exception as e:
+        logger.error(f"Erro ao processar linha {row_num}: {str(e)}", exc_info=True)
+        return row_num, {
+            'url': url_base,
+            'erro': str(e)
+        }
+
+def _mapear_em_ordem(funcao, itens, workers=None):
+    """
+    Aplica a função a cada item e devolve os resultados na ordem original.
+    
+    Com mais de um worker, os itens são executados em um pool de threads com
+    no máximo `workers` tarefas em execução e uma pequena janela de tarefas
+    enviadas à frente, para não enfileirar a planilha inteira de uma vez.
+    
+    Args:
+        funcao: Função aplicada a cada item
+        itens: Iterável de itens
+        workers: Número de threads (None ou 1 para processamento sequencial)
+        
+    Returns:
+        Gerador com os resultados, na mesma ordem dos itens
+    """
+    if not workers or workers <= 1:
+        for item in itens:
+            yield funcao(item)
+        return
+    
+    janela = workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pendentes = deque()
+        try:
+            for item in itens:
+                pendentes.append(executor.submit(funcao, item))
+                if len(pendentes) >= janela:
+                    yield pendentes.popleft().result()
+            while pendentes:
+                yield pendentes.popleft().result()
+        finally:
+            # Se a iteração for interrompida, as tarefas ainda na fila não começam
+            for futuro in pendentes:
+                futuro.cancel()
+
 def exportar_planilha(dados, caminho_saida):
     """
     Exporta os dados processados para uma planilha Excel com abas separadas por tipo de mídia.
@@ -209,51 +410,18 @@ def exportar_planilha(dados, caminho_saida):
             'Tipo de Mídia'
         ]
         
-        # Criar um objeto ExcelWriter
-        with pd.ExcelWriter(caminho_saida, engine='openpyxl') as writer:
+        # Escrever as linhas direto no arquivo, sem montar DataFrames
+        with EscritorPlanilha(caminho_saida) as escritor:
             # Para cada tipo de mídia, criar uma aba
             for tipo, registros in dados.items():
-                # Converter a lista de dicionários de volta para DataFrame
-                df = pd.DataFrame(registros)
-                
                 # Organizar as colunas na ordem desejada (apenas as que existem)
-                colunas_finais = [col for col in ordem_colunas if col in df.columns]
+                colunas = colunas_registros(registros)
+                colunas_finais = [col for col in ordem_colunas if col in colunas]
                 if colunas_finais:
-                    df = df[colunas_finais]
-                
-                # Substituir o nome da aba por algo válido
-                nome_aba = str(tipo)[:31]  # Excel limita o nome da aba a 31 caracteres
-                nome_aba = nome_aba.replace('/', '_').replace('\\', '_').replace('?', '').replace('*', '')
-                nome_aba = nome_aba.replace('[', '').replace(']', '').replace(':', '')
-                
-                # Escrever na aba
-                df.to_excel(writer, sheet_name=nome_aba, index=False)
-                
-                # Ajustar a largura das colunas automaticamente
-                worksheet = writer.sheets[nome_aba]
+                    colunas = colunas_finais
                 
-                # Dicionário para armazenar a largura máxima de cada coluna
-                max_width = {}
-                
-                # Inicializar o dicionário com os tamanhos dos cabeçalhos
-                for idx, col in enumerate(df.columns):
-                    max_width[idx] = len(str(col)) + 2  # +2 para dar um pouco de espaço extra
-                
-                # Calcular a largura máxima para cada coluna baseada nos dados
-                for idx, col in enumerate(df.columns):
-                    # Converter todos os valores para string e obter o comprimento
-                    column_width = max(
-                        df[col].astype(str).map(len).max(),  # Maior valor dos dados
-                        max_width[idx]  # Largura atual (cabeçalho)
-                    )
-                    
-                    # Limitar a uma largura máxima razoável (opcional)
-                    max_width[idx] = min(column_width + 2, 100)  # +2 para espaço e limite de 100
-                
-                # Aplicar as larguras às colunas
-                for idx, width in max_width.items():
-                    col_letter = chr(65 + idx) if idx < 26 else chr(64 + idx // 26) + chr(65 + idx % 26)
-                    worksheet.column_dimensions[col_letter].width = width
+                # Escrever na aba, com a largura das colunas ajustada ao conteúdo
+                escritor.escrever_aba(tipo, colunas, registros)
         
         return {'status': 'sucesso', 'mensagem': f'Planilha salva com sucesso em {caminho_saida}'}
         
@@ -268,7 +436,7 @@ def main():
     python organizador.py --json arquivo.json --saida resultado.xlsx
     
     Para processar uma planilha Excel:
-    python organizador.py --planilha arquivo.xlsx [--aba "Nome da Aba"] [--primeira-linha 2] [--limite-linhas 100]
+    python organizador.py --planilha arquivo.xlsx [--aba "Nome da Aba"] [--primeira-linha 2] [--limite-linhas 100] [--workers 16] [--sem-cache]
     
     Returns:
         String JSON com o resultado da operação
@@ -289,9 +457,19 @@ def main():
                        help='Número da primeira linha a processar (padrão: 2)')
     parser.add_argument('--limite-linhas', type=int,
                        help='Número máximo de linhas a processar (opcional)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Número de linhas resolvidas em paralelo (padrão: 1)')
+    parser.add_argument('--sem-cache', action='store_true',
+                       help='Ignorar o cache HTTP e baixar todas as páginas novamente')
+    parser.add_argument('--cache-ttl', type=int,
+                       help='Tempo em segundos em que uma página do cache é usada sem revalidação')
     
     args = parser.parse_args()
     
+    # Configurar o cache HTTP das páginas
+    if args.sem_cache or args.cache_ttl is not None:
+        configurar_cache(ttl=args.cache_ttl, ativo=False if args.sem_cache else None)
+    
     resultado = None
     
     # Validar argumentos
@@ -314,7 +492,8 @@ def main():
                 args.planilha, 
                 aba_nome=args.aba,
                 primeira_linha=args.primeira_linha,
-                limite_linhas=args.limite_linhas
+                limite_linhas=args.limite_linhas,
+                workers=args.workers
             )
         except Exception as e:
             logger.error(f"Erro ao processar planilha: {str(e)}", exc_info=True)
@@ -4,10 +4,19 @@ import json
 import sys
 import re
 import logging
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from datetime import datetime, date, time
-import requests
-from bs4 import BeautifulSoup
+from bs4 import Tag, SoupStrainer
 from urllib.parse import urljoin, urlparse
+from cache_http import obter_cache, conteudo_html, content_type_html
+from sessao_http import obter_sessao
+from parser_html import analisar_html, parse_parcial_ativo
+from classificador_midia import (tipo_por_url, tipo_por_content_type, verificar_link,
+                                 extensao_url, EXTENSOES_PAGINA)
+from escritor_planilhas import EscritorPlanilha, colunas_registros
 
 # Configurar logging
 logging.basicConfig(
@@ -49,7 +58,198 @@ def converter_para_url_absoluta(url, base_url):
     # Converter URL relativa para absoluta
     return urljoin(base_url, url)
 
-def obter_link_por_tipo_midia(url_base, tipo_midia):
+# Tipos de mídia para os quais a análise da página extrai um link
+TIPOS_MIDIA_ANALISE = ['Portal', 'Impresso', 'TV', 'Rádio']
+
+# Quantidade máxima de análises mantidas em memória durante uma execução
+MAX_ANALISES_EM_MEMORIA = 2048
+
+# Máximo de bytes lidos de cada página; o restante de páginas maiores é ignorado
+LIMITE_BYTES_PAGINA = int(os.environ.get('BRASPUB_LIMITE_PAGINA_MB', 5)) * 1024 * 1024
+
+class AnalisePagina:
+    """
+    Análise completa de uma página de matéria.
+    
+    A página é baixada e interpretada uma única vez; em seguida são extraídos
+    os links de cada tipo de mídia (Portal, Impresso, TV, Rádio), as
+    palavras-chave e o tipo de mídia predominante. O HTML e a árvore DOM são
+    descartados após a extração, restando apenas as respostas.
+    """
+    
+    def __init__(self, url_base):
+        self.url_base = url_base
+        self._lock = threading.Lock()
+        self.carregada = False
+        self.sucesso = False
+        self.status_code = None
+        self.content_type = None
+        self.links = {}
+        self.keywords = []
+        self.tipo_detectado = 'Portal'
+    
+    def carregar(self, sessao=None):
+        """
+        Baixa e analisa a página, caso ainda não tenha sido feito.
+        
+        Args:
+            sessao: Sessão HTTP usada na requisição (padrão: sessão compartilhada)
+            
+        Returns:
+            True se a página foi acessada e analisada com sucesso
+        """
+        # Workers concorrentes que pedem a mesma página aguardam a primeira carga
+        with self._lock:
+            if not self.carregada:
+                self._carregar(sessao)
+                self.carregada = True
+        return self.sucesso
+    
+    def _carregar(self, sessao=None):
+        """Baixa a página e extrai todas as respostas."""
+        logger.info(f"Fazendo requisição para: {self.url_base}")
+        try:
+            # O corpo é lido em blocos: links diretos para arquivos não são baixados
+            # e páginas muito grandes são lidas só até LIMITE_BYTES_PAGINA
+            response = obter_cache().obter(self.url_base, sessao=sessao or obter_sessao(), timeout=15,
+                                           limite_bytes=LIMITE_BYTES_PAGINA, somente_html=True)
+            self.status_code = response.status_code
+            self.content_type = response.headers.get('Content-Type')
+            if response.status_code != 200:
+                logger.warning(f"Falha ao acessar URL: {self.url_base}, status: {response.status_code}")
+                return False
+            
+            if not conteudo_html(response):
+                # Sem HTML para interpretar: as respostas são as de uma página sem mídia,
+                # e o tipo de mídia é o do arquivo
+                logger.warning(f"Conteúdo não é HTML ({self.content_type}): {self.url_base}")
+                self.analisar('')
+                self.tipo_detectado = tipo_por_content_type(self.content_type) or self.tipo_detectado
+                return True
+            
+            if getattr(response, 'truncada', False):
+                logger.warning(f"Página maior que {LIMITE_BYTES_PAGINA // (1024 * 1024)} MB; "
+                               f"analisando apenas o início: {self.url_base}")
+            logger.info(f"Página acessada com sucesso. Analisando HTML: {self.url_base}")
+            html = response.text
+        except Exception as e:
+            logger.error(f"Erro ao acessar URL: {str(e)}")
+            return False
+        
+        return self.analisar(html)
+    
+    def analisar(self, html, parser=None, parcial=None):
+        """
+        Extrai todas as respostas a partir do HTML já baixado da página.
+        
+        Args:
+            html: Conteúdo HTML da página
+            parser: Parser HTML usado (padrão: o configurado em parser_html)
+            parcial: Montar só os elementos usados pelos extratores (padrão: o configurado)
+            
+        Returns:
+            True se o HTML foi analisado
+        """
+        try:
+            candidatos = coletar_candidatos(html, parser, parcial)
+        except Exception as e:
+            logger.error(f"Erro ao analisar HTML: {str(e)}")
+            return False
+        
+        # Responder todas as perguntas sobre a página com a mesma árvore DOM
+        for tipo_midia in TIPOS_MIDIA_ANALISE:
+            try:
+                self.links[tipo_midia] = _EXTRATORES_LINK[tipo_midia](candidatos, self.url_base)
+            except Exception as e:
+                logger.error(f"Erro ao extrair link para {tipo_midia}: {str(e)}", exc_info=True)
+                self.links[tipo_midia] = self.url_base
+        
+        try:
+            self.keywords = _extrair_keywords(candidatos)
+        except Exception as e:
+            logger.error(f"Erro ao extrair keywords: {str(e)}", exc_info=True)
+            self.keywords = []
+        
+        try:
+            self.tipo_detectado = _detectar_tipo(candidatos, html)
+        except Exception as e:
+            logger.error(f"Erro ao detectar tipo de mídia: {str(e)}", exc_info=True)
+            self.tipo_detectado = 'Portal'
+        
+        self.sucesso = True
+        return True
+    
+    def link_por_tipo(self, tipo_midia):
+        """Retorna o link do tipo de mídia informado ou a URL base se não houver."""
+        if not self.carregar():
+            return self.url_base
+        if tipo_midia not in self.links:
+            logger.warning(f"Tipo de mídia não reconhecido: {tipo_midia}")
+            return self.url_base
+        return self.links[tipo_midia]
+    
+    def palavras_chave(self):
+        """Retorna a lista de palavras-chave encontradas na página."""
+        if not self.carregar():
+            return []
+        return list(self.keywords)
+    
+    def tipo_midia(self):
+        """Retorna o tipo de mídia predominante na página."""
+        if not self.carregar():
+            return 'Portal'
+        return self.tipo_detectado
+
+class AnalisesPaginas:
+    """
+    Análises das páginas feitas em uma execução (uma planilha, um trabalho).
+    
+    Cada execução cria a sua e a repassa às funções de extração, de modo que
+    execuções simultâneas não interferem umas nas outras e cada nova
+    execução volta a passar pelo cache HTTP (e pelo TTL dele). Só as
+    análises bem-sucedidas são reaproveitadas: uma página que falhou é
+    baixada de novo na próxima consulta.
+    """
+    
+    def __init__(self, maximo=MAX_ANALISES_EM_MEMORIA):
+        self.maximo = maximo
+        self._analises = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def obter(self, url_base):
+        """
+        Retorna a análise da página, reaproveitando a já feita nesta execução.
+        
+        Args:
+            url_base: URL da página
+            
+        Returns:
+            Objeto AnalisePagina associado à URL
+        """
+        with self._lock:
+            analise = self._analises.get(url_base)
+            if analise is not None and (analise.sucesso or not analise.carregada):
+                self._analises.move_to_end(url_base)
+                return analise
+            
+            analise = AnalisePagina(url_base)
+            self._analises[url_base] = analise
+            self._analises.move_to_end(url_base)
+            if len(self._analises) > self.maximo:
+                self._analises.popitem(last=False)
+            return analise
+    
+    def carregada(self, url_base):
+        """Retorna a análise da página se ela já foi carregada com sucesso (sem criá-la)."""
+        with self._lock:
+            analise = self._analises.get(url_base)
+        return analise if analise is not None and analise.carregada and analise.sucesso else None
+
+def _analise_pagina(url_base, analises=None):
+    """Análise da página na execução informada ou, sem execução, só para esta consulta."""
+    return analises.obter(url_base) if analises is not None else AnalisePagina(url_base)
+
+def obter_link_por_tipo_midia(url_base, tipo_midia, analises=None):
     """
     Obtém o link correto para o tipo de mídia a partir da página.
     Busca especificamente elementos dentro das divs na estrutura DOM da página.
@@ -57,6 +257,7 @@ def obter_link_por_tipo_midia(url_base, tipo_midia):
     Args:
         url_base: URL base da matéria
         tipo_midia: Tipo de mídia (Portal, Impresso, TV, Rádio)
+        analises: AnalisesPaginas da execução, para baixar cada página uma única vez (opcional)
         
     Returns:
         URL para o arquivo de mídia adequado ou URL base se não conseguir extrair
@@ -75,256 +276,7 @@ def obter_link_por_tipo_midia(url_base, tipo_midia):
             return url_base + extensoes.get(tipo_midia, '')
         
         logger.info(f"Buscando mídia para: {tipo_midia} na URL: {url_base}")
-        
-        # Fazer requisição para a página
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        logger.info(f"Fazendo requisição para: {url_base}")
-        try:
-            response = requests.get(url_base, headers=headers, timeout=15)
-            if response.status_code != 200:
-                logger.warning(f"Falha ao acessar URL: {url_base}, status: {response.status_code}")
-                return url_base
-            
-            logger.info(f"Página acessada com sucesso. Analisando HTML para o tipo: {tipo_midia}")
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Dependendo do tipo de mídia, buscar elementos diferentes
-            if tipo_midia == 'Portal':
-                # Buscar elementos <a> com href que contenha "getPDF"
-                pdf_links = []
-                for link in soup.find_all('a', href=True):
-                    href = link['href']
-                    if 'getpdf' in href.lower():
-                        pdf_links.append(href)
-                        logger.info(f"Encontrado link PDF com getPDF: {href}")
-                
-                # Se encontrou algum link com getPDF, retornar o primeiro
-                if pdf_links:
-                    # Converter URL relativa para absoluta se necessário
-                    result = converter_para_url_absoluta(pdf_links[0], url_base)
-                    logger.info(f"Retornando link PDF direto: {result}")
-                    return result
-                
-                # Se não encontrou link com getPDF, buscar outros links de PDF
-                for link in soup.find_all('a', href=True):
-                    href = link['href'].lower()
-                    if '.pdf' in href:
-                        pdf_links.append(link['href'])
-                        logger.info(f"Encontrado link PDF: {link['href']}")
-                
-                # Buscar também em iframes ou objetos embed que possam conter PDFs
-                for embed in soup.find_all(['embed', 'iframe', 'object'], src=True):
-                    src = embed['src'].lower()
-                    if '.pdf' in src:
-                        pdf_links.append(embed['src'])
-                        logger.info(f"Encontrado embed PDF: {embed['src']}")
-                
-                # Se encontrou algum PDF, retornar o primeiro
-                if pdf_links:
-                    # Converter URL relativa para absoluta
-                    result = converter_para_url_absoluta(pdf_links[0], url_base)
-                    logger.info(f"Retornando link PDF: {result}")
-                    return result
-                
-                # Se não encontrou nenhum PDF, retornar a URL original
-                logger.info(f"Nenhum PDF encontrado. Retornando URL original: {url_base}")
-                return url_base
-                
-            elif tipo_midia == 'Impresso':
-                # Buscar imagens em divs específicas
-                img_links = []
-                
-                # Buscar imagens na div da classe imagem-container e outras classes relevantes
-                for img_container in soup.select('div.imagem-container, div.image-container, div[data-v-6c6e7f38] div.imagem-container, div.figura'):
-                    # Buscar imagens dentro da div
-                    for img in img_container.find_all('img', src=True):
-                        img_links.append(img['src'])
-                        logger.info(f"Encontrada imagem em container específico: {img['src']}")
-                    
-                    # Buscar também elementos com data-src
-                    for img in img_container.find_all(attrs={'data-src': True}):
-                        img_links.append(img['data-src'])
-                        logger.info(f"Encontrada imagem com data-src em container: {img['data-src']}")
-                
-                # Buscar imagens com classe específica
-                if not img_links:
-                    for img in soup.select('img.imagem-full, img.materia-imagem, img.full-image'):
-                        if img.get('src'):
-                            img_links.append(img['src'])
-                            logger.info(f"Encontrada imagem com classe específica: {img['src']}")
-                
-                # Buscar imagens com nomes específicos
-                if not img_links:
-                    for img in soup.find_all('img', src=True):
-                        src = img['src'].lower()
-                        if any(pattern in src for pattern in ['site.jpg', 'impresso.jpg', 'noticia.jpg', 'materia']):
-                            img_links.append(img['src'])
-                            logger.info(f"Encontrada imagem com nome específico: {img['src']}")
-                
-                # Buscar qualquer imagem grande que possa ser a principal
-                if not img_links:
-                    for img in soup.find_all('img', src=True):
-                        src = img['src'].lower()
-                        if '.jpg' in src or '.jpeg' in src or '.png' in src:
-                            # Evitar ícones pequenos
-                            if 'icon' not in src and 'logo' not in src:
-                                img_links.append(img['src'])
-                                logger.info(f"Encontrada imagem JPG/JPEG/PNG: {img['src']}")
-                
-                # Se encontrou alguma imagem, retornar a primeira
-                if img_links:
-                    result = converter_para_url_absoluta(img_links[0], url_base)
-                    logger.info(f"Retornando link de imagem: {result}")
-                    return result
-                
-                # Se não encontrou nenhuma imagem, retornar URL com extensão .jpg
-                result = construir_url_padrao(url_base, tipo_midia)
-                logger.warning(f"Nenhuma imagem encontrada. Usando URL padrão: {result}")
-                return result
-                
-            elif tipo_midia == 'TV':
-                # Buscar vídeos em divs específicas
-                video_links = []
-                
-                # Buscar em divs específicas que possam conter vídeos
-                divs_video = soup.select('div.video-container, div.player, div.materia-video, div[data-v-6c6e7f38]')
-                
-                for div in divs_video:
-                    # Buscar elementos de vídeo dentro dessas divs
-                    for video in div.find_all('video'):
-                        # Buscar source mp4
-                        for source in video.find_all('source'):
-                            if source.get('src') and '.mp4' in source['src'].lower():
-                                video_links.append(source['src'])
-                                logger.info(f"Encontrado source MP4 em div específica: {source['src']}")
-                        
-                        # Verificar se o próprio vídeo tem src
-                        if video.get('src') and '.mp4' in video['src'].lower():
-                            video_links.append(video['src'])
-                            logger.info(f"Encontrado vídeo com src em div específica: {video['src']}")
-                    
-                    # Buscar links mp4
-                    for link in div.find_all('a', href=True):
-                        if '.mp4' in link['href'].lower():
-                            video_links.append(link['href'])
-                            logger.info(f"Encontrado link MP4 em div específica: {link['href']}")
-                    
-                    # Buscar iframes (YouTube, etc.)
-                    for iframe in div.find_all('iframe', src=True):
-                        video_links.append(iframe['src'])
-                        logger.info(f"Encontrado iframe em div específica: {iframe['src']}")
-                
-                # Se não encontrou em divs específicas, buscar em toda a página
-                if not video_links:
-                    # Buscar sources de vídeo MP4
-                    for source in soup.select('video source[src]'):
-                        src = source['src'].lower()
-                        if '.mp4' in src:
-                            video_links.append(source['src'])
-                            logger.info(f"Encontrado source de vídeo: {source['src']}")
-                    
-                    # Buscar links para arquivos MP4
-                    for link in soup.find_all('a', href=True):
-                        href = link['href'].lower()
-                        if '.mp4' in href:
-                            video_links.append(link['href'])
-                            logger.info(f"Encontrado link para vídeo: {link['href']}")
-                    
-                    # Buscar player de vídeo
-                    for video in soup.find_all('video', src=True):
-                        src = video['src'].lower()
-                        if '.mp4' in src:
-                            video_links.append(video['src'])
-                            logger.info(f"Encontrado elemento de vídeo: {video['src']}")
-                    
-                    # Buscar iframes para serviços de vídeo (YouTube, Vimeo)
-                    for iframe in soup.find_all('iframe', src=True):
-                        src = iframe['src'].lower()
-                        if 'youtube' in src or 'vimeo' in src or 'video' in src:
-                            video_links.append(iframe['src'])
-                            logger.info(f"Encontrado iframe de vídeo: {iframe['src']}")
-                
-                # Se encontrou algum vídeo, retornar o primeiro
-                if video_links:
-                    result = converter_para_url_absoluta(video_links[0], url_base)
-                    logger.info(f"Retornando link de vídeo: {result}")
-                    return result
-                
-                # Se não encontrou nenhum vídeo, retornar URL com extensão .mp4
-                result = construir_url_padrao(url_base, tipo_midia)
-                logger.warning(f"Nenhum vídeo encontrado. Usando URL padrão: {result}")
-                return result
-                
-            elif tipo_midia == 'Rádio':
-                # Buscar áudios em divs específicas
-                audio_links = []
-                
-                # Buscar em divs específicas que possam conter áudios
-                divs_audio = soup.select('div.audio-container, div.player, div.materia-audio, div[data-v-6c6e7f38]')
-                
-                for div in divs_audio:
-                    # Buscar elementos de áudio dentro dessas divs
-                    for audio in div.find_all('audio'):
-                        # Buscar source mp3
-                        for source in audio.find_all('source'):
-                            if source.get('src') and '.mp3' in source['src'].lower():
-                                audio_links.append(source['src'])
-                                logger.info(f"Encontrado source MP3 em div específica: {source['src']}")
-                        
-                        # Verificar se o próprio áudio tem src
-                        if audio.get('src') and '.mp3' in audio['src'].lower():
-                            audio_links.append(audio['src'])
-                            logger.info(f"Encontrado áudio com src em div específica: {audio['src']}")
-                    
-                    # Buscar links mp3
-                    for link in div.find_all('a', href=True):
-                        if '.mp3' in link['href'].lower():
-                            audio_links.append(link['href'])
-                            logger.info(f"Encontrado link MP3 em div específica: {link['href']}")
-                
-                # Se não encontrou em divs específicas, buscar em toda a página
-                if not audio_links:
-                    # Buscar sources de áudio MP3
-                    for source in soup.select('audio source[src]'):
-                        src = source['src'].lower()
-                        if '.mp3' in src:
-                            audio_links.append(source['src'])
-                            logger.info(f"Encontrado source de áudio: {source['src']}")
-                    
-                    # Buscar links para arquivos MP3
-                    for link in soup.find_all('a', href=True):
-                        href = link['href'].lower()
-                        if '.mp3' in href:
-                            audio_links.append(link['href'])
-                            logger.info(f"Encontrado link para áudio: {link['href']}")
-                    
-                    # Buscar player de áudio
-                    for audio in soup.find_all('audio', src=True):
-                        src = audio['src'].lower()
-                        if '.mp3' in src:
-                            audio_links.append(audio['src'])
-                            logger.info(f"Encontrado elemento de áudio: {audio['src']}")
-                
-                # Se encontrou algum áudio, retornar o primeiro
-                if audio_links:
-                    result = converter_para_url_absoluta(audio_links[0], url_base)
-                    logger.info(f"Retornando link de áudio: {result}")
-                    return result
-                
-                # Se não encontrou nenhum áudio, retornar URL com extensão .mp3
-                result = construir_url_padrao(url_base, tipo_midia)
-                logger.warning(f"Nenhum áudio encontrado. Usando URL padrão: {result}")
-                return result
-            
-            # Tipo de mídia não reconhecido ou não encontrou nada específico
-            logger.warning(f"Tipo de mídia não reconhecido: {tipo_midia}")
-            return url_base
-            
-        except Exception as e:
-            logger.error(f"Erro ao acessar URL: {str(e)}")
-            return url_base
+        return _analise_pagina(url_base, analises).link_por_tipo(tipo_midia)
             
     except Exception as e:
         logger.error(f"Erro ao extrair link para {tipo_midia}: {str(e)}", exc_info=True)
@@ -332,6 +284,638 @@ def obter_link_por_tipo_midia(url_base, tipo_midia):
         logger.info(f"Retornando URL base devido a erro: {url_base}")
         return url_base
 
+# Limites padrão de requisições simultâneas do resolvedor de links em lote
+LIMITE_GLOBAL_LOTE = 16
+LIMITE_POR_HOST_LOTE = 4
+
+def _url_valida(url):
+    """Verifica se o valor é uma URL http(s) que pode ser baixada."""
+    return isinstance(url, str) and url.startswith(('http://', 'https://'))
+
+async def resolver_links_em_lote(jobs, limite_global=LIMITE_GLOBAL_LOTE, limite_por_host=LIMITE_POR_HOST_LOTE,
+                                 analises=None):
+    """
+    Resolve em lote os links de uma lista de pares (url, tipo de mídia).
+    
+    As páginas são agrupadas por host: cada host tem um limite de requisições
+    simultâneas, além do limite global, e as conexões keep-alive do host são
+    reaproveitadas pelo pool da sessão compartilhada. Cada URL é baixada uma única vez,
+    mesmo que apareça em vários pares. Se o tipo de mídia for None, o
+    resultado é o tipo de mídia detectado na página.
+    
+    Args:
+        jobs: Lista de tuplas (url, tipo_midia)
+        limite_global: Máximo de páginas baixadas ao mesmo tempo
+        limite_por_host: Máximo de páginas baixadas ao mesmo tempo por host
+        analises: AnalisesPaginas da execução (padrão: uma nova, só para este lote)
+        
+    Yields:
+        Tuplas ((url, tipo_midia), resultado), na ordem em que terminam
+    """
+    if analises is None:
+        analises = AnalisesPaginas()
+    
+    def responder(url, tipo_midia):
+        if tipo_midia is None:
+            return detectar_tipo_midia(url, analises)
+        return obter_link_por_tipo_midia(url, tipo_midia, analises)
+    
+    # Agrupar os tipos pedidos por URL e as URLs por host
+    tipos_por_url = OrderedDict()
+    for url, tipo_midia in jobs:
+        tipos = tipos_por_url.setdefault(url, [])
+        if tipo_midia not in tipos:
+            tipos.append(tipo_midia)
+    
+    # URLs inválidas e, na detecção do tipo, links diretos para arquivos não exigem requisição
+    for url in [url for url in tipos_por_url
+                if not _url_valida(url) or (tipos_por_url[url] == [None] and tipo_por_url(url))]:
+        for tipo_midia in tipos_por_url.pop(url):
+            yield (url, tipo_midia), responder(url, tipo_midia)
+    
+    if not tipos_por_url:
+        return
+    
+    loop = asyncio.get_running_loop()
+    limite_global = max(1, limite_global)
+    limite_por_host = max(1, limite_por_host)
+    semaforo_global = asyncio.Semaphore(limite_global)
+    semaforos_hosts = {}
+    
+    async def resolver_url(url):
+        host = urlparse(url).netloc.lower()
+        if host not in semaforos_hosts:
+            semaforos_hosts[host] = asyncio.Semaphore(limite_por_host)
+        
+        async with semaforos_hosts[host]:
+            async with semaforo_global:
+                if tipos_por_url[url] == [None]:
+                    # Só o tipo de mídia: o classificador baixa a página apenas se necessário
+                    tipo_detectado = await loop.run_in_executor(executor, detectar_tipo_midia, url, analises)
+                    return url, [(None, tipo_detectado)]
+                await loop.run_in_executor(executor, analises.obter(url).carregar)
+        return url, [(tipo_midia, responder(url, tipo_midia)) for tipo_midia in tipos_por_url[url]]
+    
+    executor = ThreadPoolExecutor(max_workers=limite_global)
+    try:
+        tarefas = [asyncio.ensure_future(resolver_url(url)) for url in tipos_por_url]
+        for tarefa in asyncio.as_completed(tarefas):
+            url, respostas = await tarefa
+            for tipo_midia, resultado in respostas:
+                yield (url, tipo_midia), resultado
+    finally:
+        executor.shutdown(wait=False)
+
+def resolver_links(jobs, limite_global=LIMITE_GLOBAL_LOTE, limite_por_host=LIMITE_POR_HOST_LOTE, analises=None):
+    """
+    Versão síncrona de resolver_links_em_lote.
+    
+    Args:
+        jobs: Lista de tuplas (url, tipo_midia)
+        limite_global: Máximo de páginas baixadas ao mesmo tempo
+        limite_por_host: Máximo de páginas baixadas ao mesmo tempo por host
+        analises: AnalisesPaginas da execução (padrão: uma nova, só para este lote)
+        
+    Returns:
+        Dicionário {(url, tipo_midia): resultado}
+    """
+    async def coletar():
+        return {job: resultado async for job, resultado in
+                resolver_links_em_lote(jobs, limite_global, limite_por_host, analises)}
+    
+    if not jobs:
+        return {}
+    return asyncio.run(coletar())
+
+# Classes das divs que agrupam a mídia principal de cada tipo
+_CLASSES_CONTAINER_IMPRESSO = {'imagem-container', 'image-container', 'figura'}
+_CLASSES_CONTAINER_TV = {'video-container', 'player', 'materia-video'}
+_CLASSES_CONTAINER_RADIO = {'audio-container', 'player', 'materia-audio'}
+_ATRIBUTO_CONTAINER_PLAYER = 'data-v-6c6e7f38'
+
+# Classes de imagens que costumam ser a imagem principal da matéria
+_CLASSES_IMAGEM_PRINCIPAL = {'imagem-full', 'materia-imagem', 'full-image'}
+
+# Padrões de nomes de arquivos de imagem de matérias impressas
+_PADROES_NOME_IMPRESSO = ['site.jpg', 'impresso.jpg', 'noticia.jpg', 'materia']
+
+# Classes de elementos que podem conter palavras-chave
+_CLASSES_KEYWORD = {'tag', 'keyword', 'palavra-chave', 'assunto'}
+
+# Elementos lidos pelos extratores; no parse parcial, só eles (e o conteúdo deles) entram na árvore
+_ELEMENTOS_PARSE_PARCIAL = {'a', 'img', 'video', 'audio', 'source', 'iframe', 'embed', 'object', 'meta'}
+
+def _lista_classes(classes):
+    """Lista de classes do elemento (o BeautifulSoup pode entregar a lista ou o texto do atributo)."""
+    if not classes:
+        return ()
+    if isinstance(classes, str):
+        return classes.split()
+    return classes
+
+def _containers_abertos(nome, atributos, classes):
+    """
+    Indica quais containers de mídia o elemento abre.
+    
+    Returns:
+        Tupla (impresso, tv, radio) de booleanos; só divs abrem containers
+    """
+    if nome != 'div':
+        return False, False, False
+    container_player = _ATRIBUTO_CONTAINER_PLAYER in atributos
+    return (bool(_CLASSES_CONTAINER_IMPRESSO.intersection(classes)),
+            container_player or bool(_CLASSES_CONTAINER_TV.intersection(classes)),
+            container_player or bool(_CLASSES_CONTAINER_RADIO.intersection(classes)))
+
+def _elemento_usado(nome, atributos):
+    """Indica se o elemento é lido pelos extratores (critério do parse parcial)."""
+    if nome in _ELEMENTOS_PARSE_PARCIAL:
+        return True
+    classes = _lista_classes(atributos.get('class'))
+    if _CLASSES_KEYWORD.intersection(classes):
+        return True
+    return (nome == 'div' and 'q-chip__content' in classes) or any(_containers_abertos(nome, atributos, classes))
+
+_FILTRO_PARSE_PARCIAL = SoupStrainer(_elemento_usado)
+
+# O mesmo critério como seletor CSS do Lexbor. Em modo quirks as classes são comparadas
+# sem diferenciar maiúsculas, por isso as regras confirmam as classes no Python
+_SELETOR_LEXBOR = ', '.join(
+    sorted(_ELEMENTOS_PARSE_PARCIAL) +
+    [f'.{classe}' for classe in sorted(_CLASSES_KEYWORD)] +
+    ['div.q-chip__content', f'div[{_ATRIBUTO_CONTAINER_PLAYER}]'] +
+    [f'div.{classe}' for classe in sorted(_CLASSES_CONTAINER_IMPRESSO | _CLASSES_CONTAINER_TV |
+                                          _CLASSES_CONTAINER_RADIO)])
+
+def _nova_midia(src, extensao):
+    """Vídeo ou áudio de um container, com o src do próprio elemento se tiver a extensão."""
+    return {'sources': [], 'src': src if src and extensao in src.lower() else None}
+
+class CandidatosPagina:
+    """
+    Candidatos a link de mídia encontrados em uma página, separados por tipo
+    e por nível de prioridade.
+    
+    Todos os níveis são preenchidos em uma única passagem pela árvore DOM,
+    mantendo a ordem do documento. A escolha do link de cada tipo de mídia
+    passa a ser apenas a consulta do primeiro nível não vazio.
+    """
+    
+    def __init__(self):
+        # Portal: links getPDF, depois links .pdf e embeds/iframes/objects .pdf
+        self.portal_getpdf = []
+        self.portal_pdf = []
+        self.portal_pdf_embutido = []
+        
+        # Impresso: containers de imagem, classes específicas, nomes específicos e qualquer imagem
+        self.containers_impresso = []
+        self.impresso_classe = []
+        self.impresso_nome = []
+        self.impresso_imagem = []
+        
+        # TV: containers de vídeo e, na página inteira, sources, links, vídeos e iframes
+        self.containers_tv = []
+        self.tv_source = []
+        self.tv_link = []
+        self.tv_video = []
+        self.tv_iframe = []
+        
+        # Rádio: containers de áudio e, na página inteira, sources, links e áudios
+        self.containers_radio = []
+        self.radio_source = []
+        self.radio_link = []
+        self.radio_audio = []
+        
+        # Palavras-chave (texto dos elementos e conteúdo da meta tag)
+        self.keywords_chip = []
+        self.keywords_classe = []
+        self.meta_keywords = None
+        
+        # Sinais usados na detecção do tipo de mídia
+        self.tem_video_ou_iframe = False
+        self.tem_link_video = False
+        self.tem_audio = False
+        self.tem_link_audio = False
+        self.total_imagens = 0
+    
+    @classmethod
+    def coletar(cls, soup):
+        """
+        Percorre a árvore DOM uma única vez e distribui cada elemento
+        relevante entre os níveis de candidatos.
+        
+        Args:
+            soup: Árvore DOM da página (BeautifulSoup)
+            
+        Returns:
+            Objeto CandidatosPagina preenchido
+        """
+        candidatos = cls()
+        vazio = ()
+        # Cada item da pilha: elemento e os containers, vídeos e áudios que o envolvem
+        pilha = [(filho, vazio, vazio, vazio, vazio, vazio)
+                 for filho in reversed(soup.contents) if isinstance(filho, Tag)]
+        while pilha:
+            elemento, cont_imp, cont_tv, cont_radio, videos, audios = pilha.pop()
+            contexto = candidatos._registrar(elemento, cont_imp, cont_tv, cont_radio, videos, audios)
+            filhos = [filho for filho in elemento.contents if isinstance(filho, Tag)]
+            for filho in reversed(filhos):
+                pilha.append((filho,) + contexto)
+        return candidatos
+    
+    @classmethod
+    def coletar_lexbor(cls, arvore):
+        """
+        Preenche os mesmos níveis de coletar, na mesma ordem do documento,
+        com o Lexbor (selectolax).
+        
+        Uma única consulta CSS percorre a árvore em C e só os elementos usados
+        pelos extratores chegam ao Python, onde passam pelas mesmas regras do
+        BeautifulSoup; os containers consultam apenas os próprios descendentes.
+        
+        Args:
+            arvore: Árvore DOM da página (LexborHTMLParser)
+            
+        Returns:
+            Objeto CandidatosPagina preenchido
+        """
+        candidatos = cls()
+        vistos = set()
+        for elemento in arvore.css(_SELETOR_LEXBOR):
+            # Um elemento que atende a mais de um seletor da lista é entregue uma vez para cada
+            if elemento.mem_id in vistos:
+                continue
+            vistos.add(elemento.mem_id)
+            nome = elemento.tag
+            attrs = _atributos_lexbor(elemento)
+            classes = _lista_classes(attrs.get('class'))
+            em_video, em_audio = _midias_ancestrais_lexbor(elemento) if nome == 'source' else (False, False)
+            candidatos._registrar_elemento(nome, attrs, classes, elemento.text, em_video, em_audio)
+            
+            impresso, tv, radio = _containers_abertos(nome, attrs, classes)
+            if impresso:
+                candidatos.containers_impresso.append({
+                    'imagens': [_atributo_lexbor(img, 'src') for img in _descendentes_lexbor(elemento, 'img[src]')],
+                    'data_src': [_atributo_lexbor(filho, 'data-src')
+                                 for filho in _descendentes_lexbor(elemento, '[data-src]')]
+                })
+            if tv:
+                links = [_atributo_lexbor(link, 'href') for link in _descendentes_lexbor(elemento, 'a[href]')]
+                candidatos.containers_tv.append({
+                    'videos': [_midia_lexbor(video, '.mp4') for video in _descendentes_lexbor(elemento, 'video')],
+                    'links': [href for href in links if '.mp4' in href.lower()],
+                    'iframes': [_atributo_lexbor(iframe, 'src')
+                                for iframe in _descendentes_lexbor(elemento, 'iframe[src]')]
+                })
+            if radio:
+                links = [_atributo_lexbor(link, 'href') for link in _descendentes_lexbor(elemento, 'a[href]')]
+                candidatos.containers_radio.append({
+                    'audios': [_midia_lexbor(audio, '.mp3') for audio in _descendentes_lexbor(elemento, 'audio')],
+                    'links': [href for href in links if '.mp3' in href.lower()]
+                })
+        return candidatos
+    
+    def _registrar_elemento(self, nome, attrs, classes, texto, em_video, em_audio):
+        """
+        Regras da página inteira, comuns ao BeautifulSoup e ao Lexbor.
+        
+        Args:
+            nome: Nome da tag, em minúsculas
+            attrs: Atributos do elemento (atributos sem valor valem '')
+            classes: Lista de classes do elemento
+            texto: Função que retorna o texto do elemento (só chamada para palavras-chave)
+            em_video: O elemento está dentro de um <video>
+            em_audio: O elemento está dentro de um <audio>
+        """
+        if nome == 'a':
+            href = attrs.get('href')
+            if href is not None:
+                href_lower = href.lower()
+                if 'getpdf' in href_lower:
+                    self.portal_getpdf.append(href)
+                if '.pdf' in href_lower:
+                    self.portal_pdf.append(href)
+                if '.mp4' in href_lower:
+                    self.tv_link.append(href)
+                if '.mp3' in href_lower:
+                    self.radio_link.append(href)
+                if href and any(ext in href_lower for ext in ['.mp4', 'youtube', 'vimeo']):
+                    self.tem_link_video = True
+                if href and '.mp3' in href_lower:
+                    self.tem_link_audio = True
+        
+        elif nome == 'img':
+            src = attrs.get('src')
+            if src is not None:
+                src_lower = src.lower()
+                if any(padrao in src_lower for padrao in _PADROES_NOME_IMPRESSO):
+                    self.impresso_nome.append(src)
+                if ('.jpg' in src_lower or '.jpeg' in src_lower or '.png' in src_lower) and \
+                        'icon' not in src_lower and 'logo' not in src_lower:
+                    self.impresso_imagem.append(src)
+                if src and any(ext in src_lower for ext in ['.jpg', '.jpeg', '.png']):
+                    self.total_imagens += 1
+            if src and _CLASSES_IMAGEM_PRINCIPAL.intersection(classes):
+                self.impresso_classe.append(src)
+        
+        elif nome == 'video':
+            self.tem_video_ou_iframe = True
+            src = attrs.get('src')
+            if src is not None and '.mp4' in src.lower():
+                self.tv_video.append(src)
+        
+        elif nome == 'audio':
+            self.tem_audio = True
+            src = attrs.get('src')
+            if src is not None and '.mp3' in src.lower():
+                self.radio_audio.append(src)
+        
+        elif nome == 'source':
+            src = attrs.get('src')
+            if src is not None and em_video and '.mp4' in src.lower():
+                self.tv_source.append(src)
+            if src is not None and em_audio and '.mp3' in src.lower():
+                self.radio_source.append(src)
+        
+        elif nome == 'meta':
+            if self.meta_keywords is None and attrs.get('name') == 'keywords':
+                self.meta_keywords = attrs.get('content') or ''
+        
+        if nome in ('iframe', 'embed', 'object'):
+            src = attrs.get('src')
+            if nome == 'iframe':
+                self.tem_video_ou_iframe = True
+                if src is not None:
+                    src_lower = src.lower()
+                    if 'youtube' in src_lower or 'vimeo' in src_lower or 'video' in src_lower:
+                        self.tv_iframe.append(src)
+            if src is not None and '.pdf' in src.lower():
+                self.portal_pdf_embutido.append(src)
+        
+        if _CLASSES_KEYWORD.intersection(classes):
+            self.keywords_classe.append(texto())
+        
+        if nome == 'div' and 'q-chip__content' in classes:
+            self.keywords_chip.append(texto())
+    
+    def _registrar(self, elemento, cont_imp, cont_tv, cont_radio, videos, audios):
+        """Registra um elemento nos níveis adequados e retorna o contexto de seus filhos."""
+        nome = elemento.name
+        attrs = elemento.attrs
+        classes = _lista_classes(attrs.get('class'))
+        self._registrar_elemento(nome, attrs, classes, elemento.get_text, bool(videos), bool(audios))
+        
+        # Conteúdo dos containers, vídeos e áudios que envolvem o elemento
+        if nome == 'a':
+            href = attrs.get('href')
+            if href and '.mp4' in href.lower():
+                for container in cont_tv:
+                    container['links'].append(href)
+            if href and '.mp3' in href.lower():
+                for container in cont_radio:
+                    container['links'].append(href)
+        
+        elif nome == 'img':
+            src = attrs.get('src')
+            if src is not None:
+                for container in cont_imp:
+                    container['imagens'].append(src)
+        
+        elif nome == 'video':
+            video = _nova_midia(attrs.get('src'), '.mp4')
+            for container in cont_tv:
+                container['videos'].append(video)
+            videos = videos + (video,)
+        
+        elif nome == 'audio':
+            audio = _nova_midia(attrs.get('src'), '.mp3')
+            for container in cont_radio:
+                container['audios'].append(audio)
+            audios = audios + (audio,)
+        
+        elif nome == 'source':
+            src = attrs.get('src')
+            if src and '.mp4' in src.lower():
+                for video in videos:
+                    video['sources'].append(src)
+            if src and '.mp3' in src.lower():
+                for audio in audios:
+                    audio['sources'].append(src)
+        
+        elif nome == 'iframe':
+            src = attrs.get('src')
+            if src is not None:
+                for container in cont_tv:
+                    container['iframes'].append(src)
+        
+        # Elementos dentro de um container específico também contam com data-src
+        if cont_imp and 'data-src' in attrs:
+            for container in cont_imp:
+                container['data_src'].append(attrs['data-src'])
+        
+        impresso, tv, radio = _containers_abertos(nome, attrs, classes)
+        if impresso:
+            container = {'imagens': [], 'data_src': []}
+            self.containers_impresso.append(container)
+            cont_imp = cont_imp + (container,)
+        if tv:
+            container = {'videos': [], 'links': [], 'iframes': []}
+            self.containers_tv.append(container)
+            cont_tv = cont_tv + (container,)
+        if radio:
+            container = {'audios': [], 'links': []}
+            self.containers_radio.append(container)
+            cont_radio = cont_radio + (container,)
+        
+        return cont_imp, cont_tv, cont_radio, videos, audios
+
+def _atributo_lexbor(elemento, nome):
+    """Valor do atributo no selectolax; atributos sem valor viram '' como no BeautifulSoup."""
+    atributos = elemento.attributes
+    if nome not in atributos:
+        return None
+    return atributos[nome] or ''
+
+def _atributos_lexbor(elemento):
+    """Atributos do elemento no selectolax, com os sem valor como '' (igual ao BeautifulSoup)."""
+    return {nome: valor or '' for nome, valor in elemento.attributes.items()}
+
+def _midias_ancestrais_lexbor(elemento):
+    """
+    Indica se o elemento está dentro de um vídeo e/ou de um áudio.
+    
+    Returns:
+        Tupla (em_video, em_audio)
+    """
+    em_video = em_audio = False
+    ancestral = elemento.parent
+    while ancestral is not None:
+        if ancestral.tag == 'video':
+            em_video = True
+        elif ancestral.tag == 'audio':
+            em_audio = True
+        ancestral = ancestral.parent
+    return em_video, em_audio
+
+def _descendentes_lexbor(elemento, seletor):
+    """Descendentes que atendem ao seletor (no selectolax, css() inclui o próprio elemento)."""
+    return [no for no in elemento.css(seletor) if no.mem_id != elemento.mem_id]
+
+def _midia_lexbor(elemento, extensao):
+    """Vídeo ou áudio de um container: sources com a extensão e o src do próprio elemento."""
+    midia = _nova_midia(_atributo_lexbor(elemento, 'src'), extensao)
+    midia['sources'] = [fonte for fonte in (_atributo_lexbor(source, 'src')
+                                            for source in _descendentes_lexbor(elemento, 'source[src]'))
+                        if fonte and extensao in fonte.lower()]
+    return midia
+
+
+def coletar_candidatos(html, parser=None, parcial=None):
+    """
+    Monta a árvore DOM da página e coleta os candidatos a link.
+    
+    No parse parcial, os elementos que os extratores não leem (scripts,
+    blocos de comentários, menus) são descartados durante a leitura e os
+    elementos usados ficam na raiz da árvore, na ordem do documento. Como
+    os containers, vídeos e áudios são montados com todo o seu conteúdo,
+    os níveis de candidatos saem na mesma ordem da árvore completa.
+    
+    Args:
+        html: Conteúdo HTML da página
+        parser: Parser HTML (html.parser, lxml ou selectolax); None usa o configurado
+        parcial: Montar só os elementos usados pelos extratores; None usa o configurado
+        
+    Returns:
+        Objeto CandidatosPagina preenchido
+    """
+    if parcial is None:
+        parcial = parse_parcial_ativo()
+    parser, arvore = analisar_html(html, parser, _FILTRO_PARSE_PARCIAL if parcial else None)
+    if parser == 'selectolax':
+        return CandidatosPagina.coletar_lexbor(arvore)
+    return CandidatosPagina.coletar(arvore)
+
+def _primeiro_de_midia(midias):
+    """Retorna o primeiro source (ou, na falta dele, src) da lista de vídeos/áudios."""
+    for midia in midias:
+        if midia['sources']:
+            return midia['sources'][0]
+        if midia['src']:
+            return midia['src']
+    return None
+
+def _extrair_link_portal(candidatos, url_base):
+    """Escolhe o link do PDF da matéria (tipo Portal)."""
+    # Links com getPDF têm prioridade sobre outros PDFs
+    if candidatos.portal_getpdf:
+        result = converter_para_url_absoluta(candidatos.portal_getpdf[0], url_base)
+        logger.info(f"Retornando link PDF direto: {result}")
+        return result
+    
+    # Depois links .pdf e, por último, PDFs em embeds, iframes ou objects
+    pdf_links = candidatos.portal_pdf or candidatos.portal_pdf_embutido
+    if pdf_links:
+        result = converter_para_url_absoluta(pdf_links[0], url_base)
+        logger.info(f"Retornando link PDF: {result}")
+        return result
+    
+    # Se não encontrou nenhum PDF, retornar a URL original
+    logger.info(f"Nenhum PDF encontrado. Retornando URL original: {url_base}")
+    return url_base
+
+def _extrair_link_impresso(candidatos, url_base):
+    """Escolhe o link da imagem da matéria (tipo Impresso)."""
+    img_link = None
+    
+    # Imagens (ou elementos com data-src) no primeiro container específico que tiver alguma
+    for container in candidatos.containers_impresso:
+        if container['imagens'] or container['data_src']:
+            img_link = (container['imagens'] or container['data_src'])[0]
+            break
+    
+    # Depois imagens com classe específica, com nome específico e qualquer imagem JPG/PNG
+    if img_link is None:
+        for nivel in (candidatos.impresso_classe, candidatos.impresso_nome, candidatos.impresso_imagem):
+            if nivel:
+                img_link = nivel[0]
+                break
+    
+    if img_link is not None:
+        result = converter_para_url_absoluta(img_link, url_base)
+        logger.info(f"Retornando link de imagem: {result}")
+        return result
+    
+    # Se não encontrou nenhuma imagem, retornar URL com extensão .jpg
+    result = construir_url_padrao(url_base, 'Impresso')
+    logger.warning(f"Nenhuma imagem encontrada. Usando URL padrão: {result}")
+    return result
+
+def _extrair_link_tv(candidatos, url_base):
+    """Escolhe o link do vídeo da matéria (tipo TV)."""
+    video_link = None
+    
+    # Vídeos, links MP4 e iframes no primeiro container específico que tiver algum
+    for container in candidatos.containers_tv:
+        video_link = _primeiro_de_midia(container['videos'])
+        if video_link is None and (container['links'] or container['iframes']):
+            video_link = (container['links'] or container['iframes'])[0]
+        if video_link is not None:
+            break
+    
+    # Se não encontrou em divs específicas, buscar em toda a página
+    if video_link is None:
+        for nivel in (candidatos.tv_source, candidatos.tv_link, candidatos.tv_video, candidatos.tv_iframe):
+            if nivel:
+                video_link = nivel[0]
+                break
+    
+    if video_link is not None:
+        result = converter_para_url_absoluta(video_link, url_base)
+        logger.info(f"Retornando link de vídeo: {result}")
+        return result
+    
+    # Se não encontrou nenhum vídeo, retornar URL com extensão .mp4
+    result = construir_url_padrao(url_base, 'TV')
+    logger.warning(f"Nenhum vídeo encontrado. Usando URL padrão: {result}")
+    return result
+
+def _extrair_link_radio(candidatos, url_base):
+    """Escolhe o link do áudio da matéria (tipo Rádio)."""
+    audio_link = None
+    
+    # Áudios e links MP3 no primeiro container específico que tiver algum
+    for container in candidatos.containers_radio:
+        audio_link = _primeiro_de_midia(container['audios'])
+        if audio_link is None and container['links']:
+            audio_link = container['links'][0]
+        if audio_link is not None:
+            break
+    
+    # Se não encontrou em divs específicas, buscar em toda a página
+    if audio_link is None:
+        for nivel in (candidatos.radio_source, candidatos.radio_link, candidatos.radio_audio):
+            if nivel:
+                audio_link = nivel[0]
+                break
+    
+    if audio_link is not None:
+        result = converter_para_url_absoluta(audio_link, url_base)
+        logger.info(f"Retornando link de áudio: {result}")
+        return result
+    
+    # Se não encontrou nenhum áudio, retornar URL com extensão .mp3
+    result = construir_url_padrao(url_base, 'Rádio')
+    logger.warning(f"Nenhum áudio encontrado. Usando URL padrão: {result}")
+    return result
+
+# Função de extração usada para cada tipo de mídia
+_EXTRATORES_LINK = {
+    'Portal': _extrair_link_portal,
+    'Impresso': _extrair_link_impresso,
+    'TV': _extrair_link_tv,
+    'Rádio': _extrair_link_radio
+}
+
 def construir_url_padrao(url_base, tipo_midia):
     """
     Constrói uma URL padrão com a extensão adequada para o tipo de mídia.
@@ -375,8 +959,7 @@ def processar_planilha_keywords(caminho_arquivo):
         df = pd.read_excel(caminho_arquivo)
         
         # Exibir colunas disponíveis para debug
-        logger.info(f"Colunas disponíveis: {df.columns.tolist()}")
-        print("Colunas disponíveis:", df.columns.tolist())
+        logger.info(f"Colunas disponíveis: {list(df.columns)}")
         
         # Debug: Mostrar as primeiras linhas da planilha
         logger.info("Primeiras linhas da planilha:")
@@ -522,8 +1105,6 @@ def processar_planilha_keywords(caminho_arquivo):
                 if 'link web' in col_lower and 'imagem' in col_lower:
                     novo_df['LINK_WEB_IMAGEM'] = df[col]
                     logger.info(f"Coluna 'Link web - Imagem' encontrada como: {col}")
-                    # Debug: Mostrar valores da coluna encontrada
-                    logger.info(f"Valores da coluna '{col}': {df[col].tolist()}")
                     break
             
             # Se ainda não encontramos, procurar qualquer coluna que contenha "imagem"
@@ -533,12 +1114,7 @@ def processar_planilha_keywords(caminho_arquivo):
                     if 'imagem' in col_lower and ('link' in col_lower or 'url' in col_lower):
                         novo_df['LINK_WEB_IMAGEM'] = df[col]
                         logger.info(f"Coluna similar a 'Link web - Imagem' encontrada como: {col}")
-                        # Debug: Mostrar valores da coluna encontrada
-                        logger.info(f"Valores da coluna '{col}': {df[col].tolist()}")
                         break
-        else:
-            # Se já temos a coluna, mostrar os valores
-            logger.info(f"Valores da coluna 'LINK_WEB_IMAGEM': {novo_df['LINK_WEB_IMAGEM'].tolist()}")
         
         # Verificar se temos a coluna Link web - Texto
         if 'LINK_WEB_TEXTO' not in novo_df.columns:
@@ -548,14 +1124,10 @@ def processar_planilha_keywords(caminho_arquivo):
                 if 'link web' in col_lower and 'texto' in col_lower:
                     novo_df['LINK_WEB_TEXTO'] = df[col]
                     logger.info(f"Coluna 'Link web - Texto' encontrada como: {col}")
-                    # Debug: Mostrar valores da coluna encontrada
-                    logger.info(f"Valores da coluna '{col}': {df[col].tolist()}")
                     break
                 elif 'link materia' in col_lower:
                     novo_df['LINK_WEB_TEXTO'] = df[col]
                     logger.info(f"Coluna 'Link Materia' encontrada como: {col}")
-                    # Debug: Mostrar valores da coluna encontrada
-                    logger.info(f"Valores da coluna '{col}': {df[col].tolist()}")
                     break
             
             # Se ainda não encontramos, procurar qualquer coluna que contenha "texto" ou "materia"
@@ -565,12 +1137,7 @@ def processar_planilha_keywords(caminho_arquivo):
                     if ('texto' in col_lower or 'materia' in col_lower) and ('link' in col_lower or 'url' in col_lower):
                         novo_df['LINK_WEB_TEXTO'] = df[col]
                         logger.info(f"Coluna similar a 'Link web - Texto' encontrada como: {col}")
-                        # Debug: Mostrar valores da coluna encontrada
-                        logger.info(f"Valores da coluna '{col}': {df[col].tolist()}")
                         break
-        else:
-            # Se já temos a coluna, mostrar os valores
-            logger.info(f"Valores da coluna 'LINK_WEB_TEXTO': {novo_df['LINK_WEB_TEXTO'].tolist()}")
         
         # Verificar se temos a coluna de links cadastrados
         if 'LINK DA MATÉRIA CADASTRADA' not in novo_df.columns:
@@ -648,50 +1215,42 @@ def processar_planilha_keywords(caminho_arquivo):
         # Organizar os dados por palavra-chave
         resultado = {}
         
-        # Para cada palavra-chave, criar registros para cada tipo de mídia
+        # Cada página é baixada e analisada uma única vez nesta execução
+        analises = AnalisesPaginas()
+        
+        # Primeiro valor preenchido de cada coluna de link, por palavra-chave (um único groupby por coluna)
+        colunas_links = ['LINK_WEB_IMAGEM', 'LINK_WEB_TEXTO', 'LINK DA MATÉRIA CADASTRADA', 'LINK ORIGINAL']
+        primeiros_links = {coluna: _primeiro_valido_por_palavra(novo_df, coluna)
+                           for coluna in colunas_links if coluna in novo_df.columns}
+        for coluna in ['LINK_WEB_IMAGEM', 'LINK_WEB_TEXTO']:
+            if coluna not in primeiros_links:
+                logger.warning(f"Coluna {coluna} não encontrada")
+        
+        # Primeira linha de cada palavra-chave e primeira linha de cada par (palavra-chave, tipo de mídia)
+        primeiras_linhas = novo_df.drop_duplicates('PALAVRAS-CHAVE').set_index('PALAVRAS-CHAVE', drop=False)
+        primeiros_por_tipo = {
+            (registro['PALAVRAS-CHAVE'], registro['TIPO DE MÍDIA']): registro
+            for registro in novo_df[novo_df['TIPO DE MÍDIA'].isin(tipos_midia_padrao)]
+            .drop_duplicates(['PALAVRAS-CHAVE', 'TIPO DE MÍDIA']).to_dict('records')
+        }
+        
+        # Primeira etapa: identificar os links de cada palavra-chave
+        contextos = []
         for palavra in palavras_chave:
-            # Filtrar os dados pela palavra-chave
-            df_palavra = novo_df[novo_df['PALAVRAS-CHAVE'] == palavra].copy()
             logger.info(f"Processando palavra-chave: {palavra}")
-            logger.info(f"Colunas para esta palavra: {df_palavra.columns.tolist()}")
             
-            # Primeiro verificar se temos o "Link web - Imagem"
-            link_web_imagem = None
-            if 'LINK_WEB_IMAGEM' in df_palavra.columns:
-                for idx, row in df_palavra.iterrows():
-                    if row['LINK_WEB_IMAGEM'] and str(row['LINK_WEB_IMAGEM']).strip():
-                        link_web_imagem = str(row['LINK_WEB_IMAGEM']).strip()
-                        logger.info(f"Link web imagem encontrado para {palavra}: {link_web_imagem}")
-                        break
-                
-                # Se não encontrou link web imagem nos registros, mostrar todos os valores
-                if not link_web_imagem:
-                    logger.warning(f"Link web imagem não encontrado para {palavra} nos registros")
-                    logger.warning(f"Valores disponíveis: {df_palavra['LINK_WEB_IMAGEM'].tolist()}")
-            else:
-                logger.warning(f"Coluna LINK_WEB_IMAGEM não encontrada para {palavra}")
+            # Primeiro verificar se temos o "Link web - Imagem" e o "Link web - Texto"
+            link_web_imagem = primeiros_links.get('LINK_WEB_IMAGEM', {}).get(palavra)
+            if link_web_imagem:
+                logger.info(f"Link web imagem encontrado para {palavra}: {link_web_imagem}")
+            elif 'LINK_WEB_IMAGEM' in primeiros_links:
+                logger.warning(f"Link web imagem não encontrado para {palavra} nos registros")
             
-            # Verificar se temos o "Link web - Texto"
-            link_web_texto = None
-            if 'LINK_WEB_TEXTO' in df_palavra.columns:
-                for idx, row in df_palavra.iterrows():
-                    if row['LINK_WEB_TEXTO'] and str(row['LINK_WEB_TEXTO']).strip():
-                        link_web_texto = str(row['LINK_WEB_TEXTO']).strip()
-                        logger.info(f"Link web texto encontrado para {palavra}: {link_web_texto}")
-                        break
-                
-                # Se não encontrou link web texto nos registros, mostrar todos os valores
-                if not link_web_texto:
-                    logger.warning(f"Link web texto não encontrado para {palavra} nos registros")
-                    logger.warning(f"Valores disponíveis: {df_palavra['LINK_WEB_TEXTO'].tolist()}")
-            else:
-                logger.warning(f"Coluna LINK_WEB_TEXTO não encontrada para {palavra}")
-            
-            # Detectar o tipo de mídia a partir do link web imagem se disponível
-            tipo_midia_detectado = None
-            if link_web_imagem and link_web_imagem.startswith(('http://', 'https://')):
-                tipo_midia_detectado = detectar_tipo_midia(link_web_imagem)
-                logger.info(f"Tipo de mídia detectado para {palavra}: {tipo_midia_detectado}")
+            link_web_texto = primeiros_links.get('LINK_WEB_TEXTO', {}).get(palavra)
+            if link_web_texto:
+                logger.info(f"Link web texto encontrado para {palavra}: {link_web_texto}")
+            elif 'LINK_WEB_TEXTO' in primeiros_links:
+                logger.warning(f"Link web texto não encontrado para {palavra} nos registros")
             
             # Encontrar o link base para esta palavra-chave
             link_base = ''
@@ -705,65 +1264,78 @@ def processar_planilha_keywords(caminho_arquivo):
                 link_base = link_web_imagem
                 logger.info(f"Usando link web imagem como base: {link_base}")
             else:
-                # Tentar obter o link da matéria cadastrada
-                for idx, row in df_palavra.iterrows():
-                    if 'LINK DA MATÉRIA CADASTRADA' in row and row['LINK DA MATÉRIA CADASTRADA'] and str(row['LINK DA MATÉRIA CADASTRADA']).strip():
-                        link_base = str(row['LINK DA MATÉRIA CADASTRADA']).strip()
-                        break
-                
-                # Se não encontrou, tentar o link original
-                if not link_base and 'LINK ORIGINAL' in df_palavra.columns:
-                    for idx, row in df_palavra.iterrows():
-                        if row['LINK ORIGINAL'] and str(row['LINK ORIGINAL']).strip():
-                            link_base = str(row['LINK ORIGINAL']).strip()
-                            break
+                # Tentar obter o link da matéria cadastrada e, se não houver, o link original
+                link_base = (primeiros_links['LINK DA MATÉRIA CADASTRADA'].get(palavra)
+                             or primeiros_links.get('LINK ORIGINAL', {}).get(palavra)
+                             or '')
             
             # Se ainda não encontrou, usar um link padrão baseado na palavra-chave
             if not link_base:
                 link_base = f"https://braspub.com.br/materias/{palavra.replace(' ', '_').lower()}"
             
+            # Extrair data de cadastro e título da matéria da primeira linha da palavra-chave
+            primeira_linha = primeiras_linhas.loc[palavra]
+            data_cadastro = primeira_linha['DATA DE CADASTRO'] if 'DATA DE CADASTRO' in primeira_linha else ''
+            if not data_cadastro and 'DATA DE INCLUSÃO' in primeira_linha:
+                data_cadastro = primeira_linha['DATA DE INCLUSÃO']
+            titulo_materia = primeira_linha['TÍTULO DA MATÉRIA'] if 'TÍTULO DA MATÉRIA' in primeira_linha and str(primeira_linha['TÍTULO DA MATÉRIA']).strip() != '' else 'Matéria Não Cadastrada'
+            
+            contextos.append({
+                'palavra': palavra,
+                'link_web_imagem': link_web_imagem,
+                'link_web_texto': link_web_texto,
+                'link_base': link_base,
+                'data_cadastro': data_cadastro,
+                'titulo_materia': titulo_materia
+            })
+        
+        # Detectar, em lote, o tipo de mídia a partir dos links web imagem disponíveis
+        tipos_detectados = resolver_links([(contexto['link_web_imagem'], None) for contexto in contextos
+                                           if _url_valida(contexto['link_web_imagem'])], analises=analises)
+        for contexto in contextos:
+            contexto['tipo_midia_detectado'] = tipos_detectados.get((contexto['link_web_imagem'], None))
+            if contexto['tipo_midia_detectado']:
+                logger.info(f"Tipo de mídia detectado para {contexto['palavra']}: {contexto['tipo_midia_detectado']}")
+        
+        # Resolver, em lote, os links que precisam ser extraídos das páginas
+        jobs = []
+        for contexto in contextos:
+            contexto['links_diretos'] = {tipo_midia: _escolher_link_direto(contexto, tipo_midia)
+                                         for tipo_midia in tipos_midia_padrao}
+            for tipo_midia, link_direto in contexto['links_diretos'].items():
+                if link_direto is None:
+                    jobs.append((contexto['link_base'], tipo_midia))
+        links_resolvidos = resolver_links(jobs, analises=analises)
+        
+        # Segunda etapa: para cada palavra-chave, criar registros para cada tipo de mídia
+        for contexto in contextos:
+            palavra = contexto['palavra']
+            
             # Criar uma lista para armazenar os registros desta palavra-chave
             registros_palavra = []
             
-            # Extrair data de cadastro e título da matéria
-            data_cadastro = df_palavra['DATA DE CADASTRO'].iloc[0] if len(df_palavra) > 0 and 'DATA DE CADASTRO' in df_palavra.columns else ''
-            if not data_cadastro and len(df_palavra) > 0 and 'DATA DE INCLUSÃO' in df_palavra.columns:
-                data_cadastro = df_palavra['DATA DE INCLUSÃO'].iloc[0]
-            titulo_materia = df_palavra['TÍTULO DA MATÉRIA'].iloc[0] if len(df_palavra) > 0 and 'TÍTULO DA MATÉRIA' in df_palavra.columns and str(df_palavra['TÍTULO DA MATÉRIA'].iloc[0]).strip() != '' else 'Matéria Não Cadastrada'
-            
             # Para cada tipo de mídia, verificar se existe registro ou criar um vazio
             for tipo_midia in tipos_midia_padrao:
                 # Primeiro verifica se temos registros existentes para este tipo de mídia
-                registros_tipo = df_palavra[df_palavra['TIPO DE MÍDIA'] == tipo_midia]
+                registro_existente = primeiros_por_tipo.get((palavra, tipo_midia))
                 
                 # Determina qual link específico usar para este tipo de mídia
-                if tipo_midia == 'Impresso' and link_web_imagem:
-                    # Para Impresso, sempre usar o link web imagem se disponível
-                    link_especifico = link_web_imagem
-                    logger.info(f"Usando link web imagem para Impresso: {link_especifico}")
-                elif tipo_midia == 'Portal' and link_web_texto:
-                    # Para Portal, sempre usar o link web texto se disponível
-                    link_especifico = link_web_texto
-                    logger.info(f"Usando link web texto para Portal: {link_especifico}")
-                elif tipo_midia in ['TV', 'Rádio'] and link_web_imagem and tipo_midia_detectado == tipo_midia:
-                    # Para TV e Rádio, usar link web imagem apenas se o tipo detectado coincidir
-                    link_especifico = link_web_imagem
-                    logger.info(f"Usando link web imagem para {tipo_midia} (tipo detectado coincide): {link_especifico}")
-                else:
-                    # Em todos os outros casos, processar o link baseado no tipo de mídia
-                    link_especifico = obter_link_por_tipo_midia(link_base, tipo_midia)
+                link_especifico = contexto['links_diretos'][tipo_midia]
+                if link_especifico is None:
+                    # Em todos os outros casos, usar o link processado com base no tipo de mídia
+                    link_especifico = links_resolvidos[(contexto['link_base'], tipo_midia)]
                     logger.info(f"Usando link processado para {tipo_midia}: {link_especifico}")
                 
-                if len(registros_tipo) > 0:
+                if registro_existente is not None:
                     # Usar o primeiro registro encontrado, mas com o link específico para este tipo de mídia
-                    registro = registros_tipo.iloc[0].to_dict()
+                    registro = dict(registro_existente)
                     registro['LINK DA MATÉRIA CADASTRADA'] = link_especifico
                 else:
                     # Criar um registro para este tipo de mídia
                     registro = {
                         'PALAVRAS-CHAVE': palavra,
-                        'DATA DE CADASTRO': data_cadastro or datetime.now().strftime('%Y-%m-%d'),
-                        'TÍTULO DA MATÉRIA': titulo_materia,
+                        'DATA DE CADASTRO': contexto['data_cadastro'] or datetime.now().strftime('%Y-%m-%d'),
+                        'TÍTULO DA MATÉRIA': contexto['titulo_materia'],
                         'TIPO DE MÍDIA': tipo_midia,
                         'LINK DA MATÉRIA CADASTRADA': link_especifico
                     }
@@ -774,12 +1346,58 @@ def processar_planilha_keywords(caminho_arquivo):
             # Adicionar os registros ao resultado
             resultado[palavra] = registros_palavra
         
+        return resultado
+        
     except Exception as e:
         import traceback
         traceback_str = traceback.format_exc()
         logger.error(f"Erro ao processar planilha: {str(e)}\n{traceback_str}")
         return {'status': 'erro', 'mensagem': str(e), 'traceback': traceback_str}
 
+def _primeiro_valido_por_palavra(df, coluna):
+    """
+    Encontra, para cada palavra-chave, o primeiro valor preenchido de uma coluna.
+    
+    Args:
+        df: DataFrame com a coluna PALAVRAS-CHAVE
+        coluna: Nome da coluna
+        
+    Returns:
+        Dicionário {palavra-chave: valor sem espaços nas pontas}
+    """
+    valores = df[coluna]
+    textos = valores.astype(str).str.strip()
+    validos = valores.map(bool) & (textos != '')
+    return textos[validos].groupby(df.loc[validos, 'PALAVRAS-CHAVE'], sort=False).first().to_dict()
+
+def _escolher_link_direto(contexto, tipo_midia):
+    """
+    Escolhe o link de um tipo de mídia quando ele vem direto da planilha.
+    
+    Args:
+        contexto: Dados da palavra-chave (links web e tipo de mídia detectado)
+        tipo_midia: Tipo de mídia (Portal, Impresso, TV, Rádio)
+        
+    Returns:
+        O link a ser usado ou None se ele precisar ser extraído da página
+    """
+    link_web_imagem = contexto['link_web_imagem']
+    link_web_texto = contexto['link_web_texto']
+    
+    if tipo_midia == 'Impresso' and link_web_imagem:
+        # Para Impresso, sempre usar o link web imagem se disponível
+        logger.info(f"Usando link web imagem para Impresso: {link_web_imagem}")
+        return link_web_imagem
+    if tipo_midia == 'Portal' and link_web_texto:
+        # Para Portal, sempre usar o link web texto se disponível
+        logger.info(f"Usando link web texto para Portal: {link_web_texto}")
+        return link_web_texto
+    if tipo_midia in ['TV', 'Rádio'] and link_web_imagem and contexto['tipo_midia_detectado'] == tipo_midia:
+        # Para TV e Rádio, usar link web imagem apenas se o tipo detectado coincidir
+        logger.info(f"Usando link web imagem para {tipo_midia} (tipo detectado coincide): {link_web_imagem}")
+        return link_web_imagem
+    return None
+
 def exportar_planilha_keywords(dados, caminho_saida):
     """
     Exporta os dados de palavras-chave processados para uma planilha Excel.
@@ -807,8 +1425,11 @@ def exportar_planilha_keywords(dados, caminho_saida):
         # Definir a ordem dos tipos de mídia
         ordem_midia = ['Portal', 'Impresso', 'TV', 'Rádio']
         
-        # Criar um DataFrame final para armazenar todos os dados
-        final_df = pd.DataFrame(columns=ordem_colunas)
+        # Registros finais, na ordem em que serão escritos
+        registros_finais = []
+        
+        # Cada página é baixada e analisada uma única vez nesta exportação
+        analises = AnalisesPaginas()
         
         # Ordenar as palavras-chave para melhor organização
         palavras_chave_ordenadas = sorted(dados.keys())
@@ -816,36 +1437,39 @@ def exportar_planilha_keywords(dados, caminho_saida):
         # Processar cada palavra-chave
         for palavra in palavras_chave_ordenadas:
             registros = dados[palavra]
-            df_palavra = pd.DataFrame(registros)
             
             # Encontrar o link base para esta palavra-chave
             link_base = ''
-            for _, row in df_palavra.iterrows():
-                if 'LINK DA MATÉRIA CADASTRADA' in row and row['LINK DA MATÉRIA CADASTRADA'] and str(row['LINK DA MATÉRIA CADASTRADA']).strip():
-                    link_base = str(row['LINK DA MATÉRIA CADASTRADA']).strip()
+            for registro in registros:
+                if registro.get('LINK DA MATÉRIA CADASTRADA') and str(registro['LINK DA MATÉRIA CADASTRADA']).strip():
+                    link_base = str(registro['LINK DA MATÉRIA CADASTRADA']).strip()
                     break
             
             # Se não encontrou um link, usar um padrão
             if not link_base:
                 link_base = f"https://braspub.com.br/materias/{palavra.replace(' ', '_').lower()}"
             
+            # Primeiro registro de cada tipo de mídia
+            por_tipo = {}
+            for registro in registros:
+                por_tipo.setdefault(registro.get('TIPO DE MÍDIA'), registro)
+            
             # Criar registros ordenados para cada tipo de mídia
-            registros_ordenados = []
             for tipo in ordem_midia:
                 # Obter o link específico para este tipo de mídia
-                link_especifico = obter_link_por_tipo_midia(link_base, tipo)
+                link_especifico = obter_link_por_tipo_midia(link_base, tipo, analises)
                 
-                # Filtrar por tipo de mídia
-                filtro = df_palavra['TIPO DE MÍDIA'] == tipo
-                if filtro.any():
-                    # Obter o registro deste tipo de mídia
-                    registro = df_palavra[filtro].iloc[0].to_dict()
-                    # Definir o link específico para este tipo de mídia
-                    registro['LINK DA MATÉRIA CADASTRADA'] = link_especifico
+                if tipo in por_tipo:
+                    # Usar o registro deste tipo de mídia com o link específico
+                    registro_ordenado = dict(por_tipo[tipo])
+                    registro_ordenado['LINK DA MATÉRIA CADASTRADA'] = link_especifico
                 else:
-                    # Obter valores padrão da primeira linha
-                    data_cadastro = df_palavra['DATA DE CADASTRO'].iloc[0] if 'DATA DE CADASTRO' in df_palavra.columns and len(df_palavra) > 0 else ''
-                    titulo = df_palavra['TÍTULO DA MATÉRIA'].iloc[0] if 'TÍTULO DA MATÉRIA' in df_palavra.columns and len(df_palavra) > 0 and str(df_palavra['TÍTULO DA MATÉRIA'].iloc[0]).strip() != '' else 'Matéria Não Cadastrada'
+                    # Obter valores padrão do primeiro registro
+                    primeiro = registros[0] if registros else {}
+                    data_cadastro = primeiro.get('DATA DE CADASTRO', '')
+                    titulo = primeiro.get('TÍTULO DA MATÉRIA')
+                    if titulo is None or str(titulo).strip() == '':
+                        titulo = 'Matéria Não Cadastrada'
                     
                     # Criar registro para este tipo de mídia
                     registro_ordenado = {
@@ -856,56 +1480,26 @@ def exportar_planilha_keywords(dados, caminho_saida):
                         'LINK DA MATÉRIA CADASTRADA': link_especifico
                     }
                 
-                # Adicionar à lista de registros ordenados
-                registros_ordenados.append(registro_ordenado)
-            
-            # Adicionar ao DataFrame final
-            df_linhas = pd.DataFrame(registros_ordenados)
-            final_df = pd.concat([final_df, df_linhas], ignore_index=True)
-        
-        # Criar um objeto ExcelWriter
-        with pd.ExcelWriter(caminho_saida, engine='openpyxl') as writer:
-            # Escrever o DataFrame na planilha
-            final_df.to_excel(writer, sheet_name='Palavras-Chave', index=False)
-            
-            # Ajustar a largura das colunas automaticamente
-            worksheet = writer.sheets['Palavras-Chave']
-            
-            # Dicionário para armazenar a largura máxima de cada coluna
-            max_width = {}
-            
-            # Inicializar o dicionário com os tamanhos dos cabeçalhos
-            for idx, col in enumerate(final_df.columns):
-                max_width[idx] = len(str(col)) + 2  # +2 para dar um pouco de espaço extra
-            
-            # Calcular a largura máxima para cada coluna baseada nos dados
-            for idx, col in enumerate(final_df.columns):
-                # Converter todos os valores para string e obter o comprimento
-                column_width = max(
-                    final_df[col].astype(str).map(len).max(),  # Maior valor dos dados
-                    max_width[idx]  # Largura atual (cabeçalho)
-                )
-                
-                # Limitar a uma largura máxima razoável (opcional)
-                max_width[idx] = min(column_width + 2, 100)  # +2 para espaço e limite de 100
-            
-            # Aplicar as larguras às colunas
-            for idx, width in max_width.items():
-                col_letter = chr(65 + idx) if idx < 26 else chr(64 + idx // 26) + chr(65 + idx % 26)
-                worksheet.column_dimensions[col_letter].width = width
+                registros_finais.append(registro_ordenado)
+        
+        # Escrever as linhas direto no arquivo, com a largura das colunas ajustada ao conteúdo
+        colunas = colunas_registros(registros_finais, iniciais=ordem_colunas)
+        with EscritorPlanilha(caminho_saida) as escritor:
+            escritor.escrever_aba('Palavras-Chave', colunas, registros_finais)
     
         return {'status': 'sucesso', 'mensagem': f'Planilha de palavras-chave salva com sucesso em {caminho_saida}'}
         
     except Exception as e:
         return {'status': 'erro', 'mensagem': str(e)}
 
-def extrair_keywords_da_pagina(url_base):
+def extrair_keywords_da_pagina(url_base, analises=None):
     """
     Extrai as palavras-chave de uma página HTML, buscando dentro de
     divs com a classe 'q-chip__content'.
     
     Args:
         url_base: URL da página
+        analises: AnalisesPaginas da execução, para baixar cada página uma única vez (opcional)
         
     Returns:
         Lista de palavras-chave encontradas
@@ -917,61 +1511,55 @@ def extrair_keywords_da_pagina(url_base):
             return []
         
         logger.info(f"Buscando keywords na URL: {url_base}")
+        return _analise_pagina(url_base, analises).palavras_chave()
         
-        # Fazer requisição para a página
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url_base, headers=headers, timeout=15)
-        if response.status_code != 200:
-            logger.warning(f"Falha ao acessar URL: {url_base}, status: {response.status_code}")
-            return []
-        
-        logger.info(f"Página acessada com sucesso. Extraindo keywords.")
-        
-        # Analisar o HTML da página
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Buscar as divs com a classe 'q-chip__content'
-        keywords = []
-        for div in soup.select('div.q-chip__content'):
-            keyword = div.get_text().strip()
+    except Exception as e:
+        logger.error(f"Erro ao extrair keywords: {str(e)}", exc_info=True)
+        return []
+
+def _extrair_keywords(candidatos):
+    """Extrai as palavras-chave a partir dos candidatos da página."""
+    # Buscar as divs com a classe 'q-chip__content'
+    keywords = []
+    for texto in candidatos.keywords_chip:
+        keyword = texto.strip()
+        if keyword:
+            keywords.append(keyword)
+            logger.info(f"Encontrada keyword: {keyword}")
+    
+    # Se não encontrou nas divs específicas, tentar outras abordagens
+    if not keywords:
+        # Tentar buscar em elementos com classes que possam conter palavras-chave
+        for texto in candidatos.keywords_classe:
+            keyword = texto.strip()
             if keyword:
                 keywords.append(keyword)
-                logger.info(f"Encontrada keyword: {keyword}")
+                logger.info(f"Encontrada keyword em outro elemento: {keyword}")
         
-        # Se não encontrou nas divs específicas, tentar outras abordagens
-        if not keywords:
-            # Tentar buscar em elementos com classes que possam conter palavras-chave
-            for elem in soup.select('.tag, .keyword, .palavra-chave, .assunto'):
-                keyword = elem.get_text().strip()
+        # Tentar buscar em meta tags
+        content = candidatos.meta_keywords
+        if content:
+            for keyword in content.split(','):
+                keyword = keyword.strip()
                 if keyword:
                     keywords.append(keyword)
-                    logger.info(f"Encontrada keyword em outro elemento: {keyword}")
-            
-            # Tentar buscar em meta tags
-            meta_keywords = soup.find('meta', {'name': 'keywords'})
-            if meta_keywords and meta_keywords.get('content'):
-                content = meta_keywords['content']
-                for keyword in content.split(','):
-                    keyword = keyword.strip()
-                    if keyword:
-                        keywords.append(keyword)
-                        logger.info(f"Encontrada keyword em meta tag: {keyword}")
-        
-        return keywords
-        
-    except Exception as e:
-        logger.error(f"Erro ao extrair keywords: {str(e)}", exc_info=True)
-        return []
+                    logger.info(f"Encontrada keyword em meta tag: {keyword}")
+    
+    return keywords
 
 # Modificar a função de detecção de mídia para considerar elementos específicos
-def detectar_tipo_midia(url_base):
+def detectar_tipo_midia(url_base, analises=None):
     """
     Detecta o tipo de mídia predominante na página.
     
+    A página só é baixada e analisada em último caso: links diretos para
+    arquivos são classificados pela extensão (ou pelo host de vídeo) e os
+    demais, pelo Content-Type de um HEAD. Páginas já analisadas nesta
+    execução e endereços de páginas (.html, .php...) vão direto à análise.
+    
     Args:
         url_base: URL da página
+        analises: AnalisesPaginas da execução, para baixar cada página uma única vez (opcional)
         
     Returns:
         String com o tipo de mídia ('Portal', 'Impresso', 'TV', 'Rádio')
@@ -983,55 +1571,61 @@ def detectar_tipo_midia(url_base):
             return 'Portal'  # Valor padrão
         
         logger.info(f"Detectando tipo de mídia na URL: {url_base}")
+        tipo = tipo_por_url(url_base)
+        if tipo:
+            logger.info(f"Tipo de mídia pela URL: {tipo}")
+            return tipo
         
-        # Fazer requisição para a página
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url_base, headers=headers, timeout=15)
-        if response.status_code != 200:
-            logger.warning(f"Falha ao acessar URL: {url_base}, status: {response.status_code}")
+        analise = analises.carregada(url_base) if analises is not None else None
+        if analise is not None or extensao_url(url_base) in EXTENSOES_PAGINA:
+            return (analise or _analise_pagina(url_base, analises)).tipo_midia()
+        
+        verificacao = verificar_link(url_base)
+        if verificacao['tipo_midia']:
+            logger.info(f"Tipo de mídia pelo Content-Type ({verificacao['content_type']}): {verificacao['tipo_midia']}")
+            return verificacao['tipo_midia']
+        if verificacao['ativo'] is False:
+            logger.warning(f"Link inativo ({verificacao['status'] or verificacao['erro']}): {url_base}")
+            return 'Portal'
+        if verificacao['ativo'] and not content_type_html(verificacao['content_type']):
+            # Arquivo de outro tipo (zip, octet-stream...): não há HTML para analisar
+            logger.info(f"Conteúdo não é HTML ({verificacao['content_type']}). Tipo de mídia padrão: Portal")
             return 'Portal'
         
-        # Analisar o HTML da página
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Verificar elementos específicos para determinar o tipo de mídia
-        
-        # Verificar se há elementos de vídeo
-        videos = soup.find_all(['video', 'iframe'])
-        video_links = soup.find_all('a', href=lambda href: href and any(ext in href.lower() for ext in ['.mp4', 'youtube', 'vimeo']))
-        if videos or video_links:
-            logger.info(f"Detectado tipo de mídia: TV")
-            return 'TV'
-        
-        # Verificar se há elementos de áudio
-        audios = soup.find_all('audio')
-        audio_links = soup.find_all('a', href=lambda href: href and '.mp3' in href.lower())
-        if audios or audio_links:
-            logger.info(f"Detectado tipo de mídia: Rádio")
-            return 'Rádio'
-        
-        # Verificar se é uma página de conteúdo impresso
-        # Verificar padrões típicos de conteúdo impresso
-        if any(termo in response.text.lower() for termo in ['jornal impresso', 'versão impressa', 'edição impressa']):
-            logger.info(f"Detectado tipo de mídia: Impresso")
-            return 'Impresso'
-        
-        # Verificar a presença de muitas imagens (típico de conteúdo impresso)
-        images = soup.find_all('img', src=lambda src: src and any(ext in src.lower() for ext in ['.jpg', '.jpeg', '.png']))
-        if len(images) > 5:  # Se tiver muitas imagens, provavelmente é impresso
-            logger.info(f"Detectado tipo de mídia: Impresso (muitas imagens)")
-            return 'Impresso'
-        
-        # Se não detectou nenhum dos anteriores, considerar como Portal (padrão)
-        logger.info(f"Tipo de mídia padrão: Portal")
-        return 'Portal'
+        # Último caso: analisar o HTML da página
+        return _analise_pagina(url_base, analises).tipo_midia()
         
     except Exception as e:
         logger.error(f"Erro ao detectar tipo de mídia: {str(e)}", exc_info=True)
         return 'Portal'  # Valor padrão em caso de erro
 
+def _detectar_tipo(candidatos, html):
+    """Detecta o tipo de mídia a partir dos candidatos e do HTML da página."""
+    # Verificar se há elementos ou links de vídeo
+    if candidatos.tem_video_ou_iframe or candidatos.tem_link_video:
+        logger.info(f"Detectado tipo de mídia: TV")
+        return 'TV'
+    
+    # Verificar se há elementos ou links de áudio
+    if candidatos.tem_audio or candidatos.tem_link_audio:
+        logger.info(f"Detectado tipo de mídia: Rádio")
+        return 'Rádio'
+    
+    # Verificar se é uma página de conteúdo impresso
+    # Verificar padrões típicos de conteúdo impresso
+    if any(termo in html.lower() for termo in ['jornal impresso', 'versão impressa', 'edição impressa']):
+        logger.info(f"Detectado tipo de mídia: Impresso")
+        return 'Impresso'
+    
+    # Verificar a presença de muitas imagens (típico de conteúdo impresso)
+    if candidatos.total_imagens > 5:  # Se tiver muitas imagens, provavelmente é impresso
+        logger.info(f"Detectado tipo de mídia: Impresso (muitas imagens)")
+        return 'Impresso'
+    
+    # Se não detectou nenhum dos anteriores, considerar como Portal (padrão)
+    logger.info(f"Tipo de mídia padrão: Portal")
+    return 'Portal'
+
 def main():
     # Verificar argumentos
     if len(sys.argv) < 2:
@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import tracemalloc
+from parser_html import PARSERS_HTML, PARSER_HTML_FALLBACK, parser_html_disponivel
+from organizador_keywords import AnalisePagina, TIPOS_MIDIA_ANALISE
+
+# Páginas de referência com as estruturas que os extratores precisam reconhecer
+PAGINAS_REFERENCIA = {
+    'portal_getpdf': '''<!DOCTYPE html>
+<html><head><title>Matéria</title><meta name="keywords" content="Economia, Juros , Inflação"></head>
+<body>
+  <nav><a href="/">Início</a><a href="/sobre">Sobre</a></nav>
+  <article>
+    <p>Texto da matéria com <a href="/arquivos/anexo.PDF">anexo</a>.</p>
+    <a href="/clipping/getPDF?id=123&amp;tipo=1">Baixar PDF</a>
+    <embed src="/arquivos/embutido.pdf" type="application/pdf">
+  </article>
+</body></html>''',
+    'portal_embutido': '''<html><body>
+  <div class="conteudo">
+    <iframe src="https://docs.exemplo.com.br/visualizar/materia.pdf"></iframe>
+    <object data="x" src="/objeto/materia2.pdf"></object>
+  </div>
+</body></html>''',
+    'impresso_container': '''<!DOCTYPE html>
+<html><body>
+  <header><img src="/static/logo.png" alt="logo"><img src="/static/icon-busca.png"></header>
+  <div class="figura vazia"></div>
+  <div class="imagem-container">
+    <span data-src="/lazy/pagina-1.jpg"></span>
+    <div class="image-container"><img src="/jornal/pagina-1-impresso.jpg" class="imagem-full"></div>
+  </div>
+  <img src="/jornal/site.jpg">
+  <img class="materia-imagem" src="/jornal/capa.jpeg">
+</body></html>''',
+    'impresso_classe': '''<html><body>
+  <img src="/fotos/a.gif">
+  <img class="foto materia-imagem" src="/fotos/principal.png">
+  <img src="/fotos/noticia.jpg">
+  <img src="/fotos/qualquer.jpg">
+</body></html>''',
+    'tv_player': '''<!DOCTYPE html>
+<html><body>
+  <a href="https://www.youtube.com/watch?v=abc">Veja no YouTube</a>
+  <div data-v-6c6e7f38 class="bloco">
+    <video controls poster="/capa.jpg">
+      <source src="/videos/materia.webm" type="video/webm">
+      <source src="/videos/materia.mp4" type="video/mp4">
+    </video>
+  </div>
+  <div class="video-container"><iframe src="https://player.vimeo.com/video/1"></iframe></div>
+  <video src="/videos/solto.MP4"></video>
+</body></html>''',
+    'tv_sem_container': '''<html><body>
+  <p><a href="/midia/reportagem.mp4">Download</a></p>
+  <iframe src="https://www.youtube.com/embed/xyz"></iframe>
+  <video><source src="/midia/outra.mp4"></video>
+</body></html>''',
+    'radio_container': '''<!DOCTYPE html>
+<html><body>
+  <div class="materia-audio">
+    <p>Ouça</p>
+    <a href="/audios/boletim.mp3">baixar</a>
+  </div>
+  <div class="audio-container">
+    <audio controls><source src="/audios/entrevista.ogg"><source src="/audios/entrevista.mp3"></audio>
+  </div>
+  <audio src="/audios/solto.mp3"></audio>
+</body></html>''',
+    'keywords_chips': '''<!DOCTYPE html>
+<html><body>
+  <div class="q-chip row"><div class="q-chip__content col"> Saúde &amp; Bem-estar </div></div>
+  <div class="q-chip"><div class="q-chip__content"><span>Educação</span> <b>Pública</b></div></div>
+  <div class="q-chip"><div class="q-chip__content">   </div></div>
+  <span class="tag">Ignorada quando há chips</span>
+</body></html>''',
+    'keywords_classes': '''<html><head>
+  <meta name="description" content="Resumo">
+  <meta name="keywords" content="Política, , Eleições">
+  <meta name="keywords" content="Repetida">
+</head><body>
+  <ul><li class="tag">Câmara</li><li class="assunto principal">Orçamento</li><li class="TAG">Maiúscula</li></ul>
+  <a class="keyword" href="/tags/votacao">Votação<!-- comentário --></a>
+</body></html>''',
+    'portal_pesado': '''<!DOCTYPE html>
+<html><head>
+  <script>var html = '<a href="/falso/getpdf.pdf">falso</a><img src="falso.jpg">';</script>
+  <style>.tag { color: red } /* <div class="q-chip__content">falso</div> */</style>
+</head><body>
+  <!-- <a href="/comentado.pdf">comentado</a> -->
+  <h1>Edição impressa de domingo</h1>
+  <img src="/g/1.jpg"><img src="/g/2.jpg"><img src="/g/3.png"><img src="/g/4.jpeg"><img src="/g/5.jpg"><img src="/g/6.jpg">
+  <section class="comentarios">
+    <div class="comentario"><p>Primeiro comentário <a href="/perfil/1">autor</a></p></div>
+    <div class="comentario"><p>Segundo comentário com <em>ênfase</em></p></div>
+  </section>
+  <script type="application/ld+json">{"@type": "NewsArticle", "video": "/ld/video.mp4"}</script>
+</body></html>''',
+    'sem_midia': '''<html><body><p>Apenas texto, sem mídia nem palavras-chave.</p></body></html>''',
+    'atributos_variados': '''<HTML><BODY>
+  <A HREF>sem valor</A>
+  <IMG SRC="/Maiusculas/Materia.JPG" CLASS="Full-Image">
+  <img src>
+  <div class=player><a href=/radio/programa.mp3>programa</a><audio></audio></div>
+  <a href='/aspas/simples.pdf'>pdf</a>
+</BODY></HTML>''',
+    'html_malformado': '''<html><body>
+  <div class="noticia"><p>Texto com <a href="/anexos/nota.pdf">anexo<p>Outro parágrafo<li>item solto
+    <div class="imagem-container"><img src="/fotos/dentro.jpg"></div>
+  </div></span>
+  <img src="/fotos/fora.jpg" class="materia-imagem">
+  <div class="audio-container"><audio><source src="/a/um.mp3"></div>
+  <a href="/a/dois.mp3">dois</a>
+</body>'''
+}
+
+def carregar_paginas(diretorio=None):
+    """
+    Monta o corpus: as páginas de referência e, opcionalmente, os arquivos
+    .html de um diretório (por exemplo, páginas reais salvas pelo navegador).
+    
+    Returns:
+        Lista de tuplas (nome, HTML)
+    """
+    paginas = list(PAGINAS_REFERENCIA.items())
+    if diretorio:
+        for nome in sorted(os.listdir(diretorio)):
+            if nome.lower().endswith(('.html', '.htm')):
+                with open(os.path.join(diretorio, nome), encoding='utf-8', errors='replace') as f:
+                    paginas.append((nome, f.read()))
+    return paginas
+
+def analisar(nome, html, parser, parcial=False):
+    """Extrai links, palavras-chave e tipo de mídia da página com o parser informado."""
+    analise = AnalisePagina(f'https://exemplo.com.br/materias/{nome}')
+    if not analise.analisar(html, parser, parcial):
+        return None
+    return {
+        'links': {tipo: analise.links.get(tipo) for tipo in TIPOS_MIDIA_ANALISE},
+        'keywords': analise.keywords,
+        'tipo': analise.tipo_detectado
+    }
+
+def medir(paginas, parser, parcial, repeticoes):
+    """
+    Mede a análise das páginas com o parser informado.
+    
+    Returns:
+        Tupla (tempo médio por página em ms, maior pico de memória de uma página em MB)
+    """
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for nome, html in paginas:
+            analisar(nome, html, parser, parcial)
+    tempo = (time.perf_counter() - inicio) * 1000 / (repeticoes * len(paginas))
+    
+    pico = 0
+    tracemalloc.start()
+    for nome, html in paginas:
+        tracemalloc.reset_peak()
+        analisar(nome, html, parser, parcial)
+        pico = max(pico, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    return tempo, pico / (1024 * 1024)
+
+def main():
+    parser_args = argparse.ArgumentParser(
+        description="Verifica se todos os parsers HTML extraem os mesmos links, palavras-chave e tipos de mídia")
+    parser_args.add_argument('--diretorio', help='Diretório com páginas .html salvas a incluir no corpus')
+    parser_args.add_argument('--repeticoes', type=int, default=20,
+                             help='Repetições do corpus na medição de tempo (padrão: 20; 0 para não medir)')
+    args = parser_args.parse_args()
+    
+    # Os extratores registram cada link encontrado; aqui só interessam as divergências
+    logging.getLogger("ExtractorMidia").setLevel(logging.ERROR)
+    
+    paginas = carregar_paginas(args.diretorio)
+    referencia = {nome: analisar(nome, html, PARSER_HTML_FALLBACK) for nome, html in paginas}
+    print(f"Corpus: {len(paginas)} páginas; referência: {PARSER_HTML_FALLBACK} com a árvore completa")
+    
+    # O parse parcial só se aplica aos parsers do BeautifulSoup
+    variantes = [(parser, parcial) for parser in PARSERS_HTML
+                 for parcial in ((False,) if parser == 'selectolax' else (False, True))]
+    
+    divergencias = 0
+    for parser, parcial in variantes:
+        rotulo = f"{parser} (parcial)" if parcial else parser
+        if not parser_html_disponivel(parser):
+            print(f"{rotulo:>22}: não instalado")
+            continue
+        diferentes = []
+        for nome, html in paginas:
+            resultado = analisar(nome, html, parser, parcial)
+            if resultado != referencia[nome]:
+                diferentes.append((nome, resultado))
+        medidas = ''
+        if args.repeticoes > 0:
+            tempo, pico = medir(paginas, parser, parcial, args.repeticoes)
+            medidas = f"{tempo:8.2f} ms/página   pico {pico:6.1f} MB"
+        print(f"{rotulo:>22}: {len(paginas) - len(diferentes)}/{len(paginas)} idênticas   {medidas}")
+        for nome, resultado in diferentes:
+            print(f"{'':>24}{nome}\n{'':>26}esperado: {referencia[nome]}\n{'':>26}obtido:   {resultado}")
+        divergencias += len(diferentes)
+    
+    sys.exit(1 if divergencias else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import os
+import threading
+import logging
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger("ExtractorMidia")
+
+# Parsers de HTML suportados na análise das páginas:
+#   html.parser - BeautifulSoup com o parser do Python (padrão, sem dependências extras)
+#   lxml        - BeautifulSoup com o parser em C do lxml (pip install lxml)
+#   selectolax  - árvore e seletores CSS do Lexbor, em C, sem BeautifulSoup (pip install selectolax)
+PARSERS_HTML = ['html.parser', 'lxml', 'selectolax']
+PARSER_HTML_FALLBACK = 'html.parser'
+
+# Configuração padrão (pode ser alterada por variáveis de ambiente)
+PARSER_HTML_PADRAO = os.environ.get('BRASPUB_PARSER_HTML', PARSER_HTML_FALLBACK).strip().lower()
+PARSE_PARCIAL_PADRAO = os.environ.get('BRASPUB_PARSE_PARCIAL', '') in ('1', 'true', 'sim')  # só os elementos usados
+
+# Módulo que precisa estar instalado para cada parser opcional
+_MODULOS_PARSER = {
+    'lxml': 'lxml.etree',
+    'selectolax': 'selectolax.lexbor'
+}
+
+_parser_html = None
+_parse_parcial = PARSE_PARCIAL_PADRAO
+_parser_lock = threading.Lock()
+_disponibilidade = {}
+_avisos = set()
+
+def parser_html_disponivel(parser):
+    """
+    Verifica se o parser é conhecido e se a biblioteca dele está instalada.
+    
+    Args:
+        parser: Nome do parser (um de PARSERS_HTML)
+    
+    Returns:
+        True se o parser pode ser usado
+    """
+    if parser not in PARSERS_HTML:
+        return False
+    if parser not in _MODULOS_PARSER:
+        return True
+    if parser not in _disponibilidade:
+        try:
+            __import__(_MODULOS_PARSER[parser])
+            _disponibilidade[parser] = True
+        except ImportError:
+            _disponibilidade[parser] = False
+    return _disponibilidade[parser]
+
+def _resolver_parser(parser):
+    """Retorna o parser pedido ou, se ele não puder ser usado, o html.parser."""
+    if parser_html_disponivel(parser):
+        return parser
+    if parser in _avisos:
+        return PARSER_HTML_FALLBACK
+    _avisos.add(parser)
+    if parser in PARSERS_HTML:
+        logger.warning(f"Parser HTML '{parser}' não está instalado; usando '{PARSER_HTML_FALLBACK}'")
+    else:
+        logger.warning(f"Parser HTML desconhecido: '{parser}' (opções: {', '.join(PARSERS_HTML)}); "
+                       f"usando '{PARSER_HTML_FALLBACK}'")
+    return PARSER_HTML_FALLBACK
+
+def obter_parser_html():
+    """Retorna o parser configurado para a análise das páginas."""
+    global _parser_html
+    with _parser_lock:
+        if _parser_html is None:
+            _parser_html = _resolver_parser(PARSER_HTML_PADRAO)
+        return _parser_html
+
+def parse_parcial_ativo():
+    """Indica se as árvores do BeautifulSoup são montadas só com os elementos usados."""
+    return _parse_parcial
+
+def configurar_parser_html(parser=None, parcial=None):
+    """
+    Altera o parser usado na análise das páginas.
+    
+    Args:
+        parser: Nome do parser (um de PARSERS_HTML); se não estiver
+                instalado, o html.parser é usado. None mantém o atual
+        parcial: True para montar só os elementos usados pelos extratores
+                 (html.parser e lxml); None mantém o atual
+    
+    Returns:
+        O nome do parser efetivamente configurado
+    """
+    global _parser_html, _parse_parcial
+    with _parser_lock:
+        if parser is not None or _parser_html is None:
+            _parser_html = _resolver_parser((parser or PARSER_HTML_PADRAO).strip().lower())
+        if parcial is not None:
+            _parse_parcial = parcial
+        logger.info(f"Parser HTML configurado: {_parser_html}{' (parcial)' if _parse_parcial else ''}")
+        return _parser_html
+
+def analisar_html(html, parser=None, filtro=None):
+    """
+    Monta a árvore DOM do HTML com o parser informado (ou o configurado).
+    
+    Args:
+        html: Conteúdo HTML da página
+        parser: Nome do parser; None usa o configurado
+        filtro: SoupStrainer com os elementos a montar (html.parser e lxml);
+                os demais são descartados durante a leitura, mas os
+                descendentes dos elementos aceitos são montados por inteiro
+    
+    Returns:
+        Tupla (nome do parser usado, árvore). A árvore é um BeautifulSoup
+        para html.parser e lxml e um LexborHTMLParser para selectolax.
+    """
+    parser = _resolver_parser(parser) if parser else obter_parser_html()
+    if parser == 'selectolax':
+        # O Lexbor monta a árvore inteira em C; as consultas já só tocam os elementos usados
+        from selectolax.lexbor import LexborHTMLParser
+        arvore = LexborHTMLParser(html)
+        # Conteúdo de script/style não é texto da página no BeautifulSoup
+        arvore.strip_tags(['script', 'style', 'template'])
+        return parser, arvore
+    return parser, BeautifulSoup(html, parser, parse_only=filtro)
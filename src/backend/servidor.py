@@ -0,0 +1,315 @@
+import os
+import sys
+import time
+import signal
+import socket
+import logging
+import argparse
+import threading
+import importlib
+import multiprocessing
+
+logger = logging.getLogger('braspub_api')
+
+# Configuração padrão do servidor de produção (pode ser alterada por variáveis de ambiente)
+HOST_PADRAO = os.environ.get('BRASPUB_HOST', '127.0.0.1')  # 0.0.0.0 para aceitar conexões de outras máquinas
+PORTA_PADRAO = int(os.environ.get('BRASPUB_PORTA', 5000))
+PROCESSOS_PADRAO = int(os.environ.get('BRASPUB_PROCESSOS', 1))  # processos atendendo a mesma porta
+THREADS_PADRAO = int(os.environ.get('BRASPUB_THREADS', 8))  # requisições simultâneas por processo
+LIMITE_CORPO_PADRAO = int(os.environ.get('BRASPUB_LIMITE_CORPO_MB', 200)) * 1024 * 1024  # tamanho máximo do upload
+LIMITE_CABECALHO_PADRAO = int(os.environ.get('BRASPUB_LIMITE_CABECALHO_KB', 64)) * 1024
+LIMITE_CONEXOES_PADRAO = int(os.environ.get('BRASPUB_LIMITE_CONEXOES', 100))  # conexões abertas por processo
+TEMPO_CONEXAO_PADRAO = int(os.environ.get('BRASPUB_TEMPO_CONEXAO', 120))  # segundos até fechar conexões ociosas
+TEMPO_ENCERRAMENTO_PADRAO = int(os.environ.get('BRASPUB_TEMPO_ENCERRAMENTO', 30))  # espera pelas requisições no encerramento
+PRECARGA_ATIVA_PADRAO = os.environ.get('BRASPUB_SEM_PRECARGA', '') not in ('1', 'true', 'sim')
+
+# Módulos pesados que a API só importa quando precisa; com a precarga, são
+# carregados em segundo plano logo depois que o servidor começa a atender
+MODULOS_PRECARGA = ['pandas', 'numpy', 'openpyxl', 'leitor_planilhas', 'escritor_planilhas',
+                    'indice_palavras', 'gerenciador_downloads', 'organizador']
+
+def criar_socket(host, porta, backlog=1024):
+    """Abre o socket que recebe as conexões (compartilhado pelos processos)."""
+    familia = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(familia, socket.SOCK_STREAM)
+    if os.name != 'nt':
+        # No Windows, SO_REUSEADDR permitiria dois servidores na mesma porta
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, porta))
+    sock.listen(backlog)
+    return sock
+
+def precarregar_modulos(modulos=MODULOS_PRECARGA):
+    """Importa os módulos pesados, para que o primeiro processamento não espere por eles."""
+    inicio = time.time()
+    for modulo in modulos:
+        try:
+            importlib.import_module(modulo)
+        except Exception as e:
+            logger.warning(f"Não foi possível pré-carregar {modulo}: {str(e)}")
+    logger.info(f"Módulos pré-carregados em {time.time() - inicio:.2f}s")
+
+class ControleEncerramento:
+    """
+    Middleware WSGI que acompanha as requisições em andamento para o encerramento gracioso.
+    
+    Uma requisição conta como em andamento até a resposta ser consumida e
+    fechada (inclui respostas em streaming, como ZIP e SSE). Depois que o
+    encerramento começa, as novas requisições recebem 503.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self.ativas = 0
+        self.encerrando = False
+        self._condicao = threading.Condition()
+    
+    def __call__(self, environ, start_response):
+        with self._condicao:
+            recusar = self.encerrando
+            if not recusar:
+                self.ativas += 1
+        if recusar:
+            start_response('503 Service Unavailable', [('Content-Type', 'text/plain; charset=utf-8'),
+                                                       ('Retry-After', '5')])
+            return [b'Servidor em encerramento']
+        try:
+            resposta = self.app(environ, start_response)
+        except BaseException:
+            self._concluir()
+            raise
+        return _RespostaAcompanhada(resposta, self._concluir)
+    
+    def _concluir(self):
+        with self._condicao:
+            self.ativas -= 1
+            self._condicao.notify_all()
+    
+    def encerrar(self, tempo_encerramento):
+        """
+        Passa a recusar novas requisições e aguarda as em andamento.
+        
+        Returns:
+            True se todas terminaram dentro de tempo_encerramento segundos
+        """
+        with self._condicao:
+            self.encerrando = True
+            return self._condicao.wait_for(lambda: self.ativas == 0, tempo_encerramento)
+
+class _RespostaAcompanhada:
+    """Itera a resposta WSGI e avisa quando ela é fechada (uma única vez)."""
+    
+    def __init__(self, resposta, ao_fechar):
+        self._resposta = resposta
+        self._ao_fechar = ao_fechar
+    
+    def __iter__(self):
+        return iter(self._resposta)
+    
+    def close(self):
+        ao_fechar, self._ao_fechar = self._ao_fechar, None
+        try:
+            if hasattr(self._resposta, 'close'):
+                self._resposta.close()
+        finally:
+            if ao_fechar:
+                ao_fechar()
+
+def _fechar_servidor(servidor):
+    """
+    Fecha o servidor do waitress pela API pública (close).
+    
+    O run() do waitress já fecha o servidor ao receber KeyboardInterrupt;
+    a chamada extra cobre versões que não o façam e é ignorada se falhar.
+    """
+    try:
+        servidor.close()
+    except Exception as e:
+        logger.debug(f"Servidor já fechado: {str(e)}")
+
+def _encerrar_servidor(controle, tempo_encerramento, concluido):
+    """
+    Encerra o servidor sem interromper as requisições em andamento.
+    
+    Executada em uma thread separada: cancela os trabalhos em segundo plano,
+    aguarda as requisições terminarem (até tempo_encerramento segundos) e
+    sinaliza o processo de novo, para que o laço do waitress termine.
+    """
+    from trabalhos import obter_gerenciador_trabalhos
+    
+    obter_gerenciador_trabalhos().encerrar(aguardar=False)
+    if not controle.encerrar(tempo_encerramento):
+        logger.warning(f"Requisições ainda em andamento após {tempo_encerramento}s; encerrando assim mesmo")
+    concluido.set()
+    signal.raise_signal(signal.SIGINT)
+
+def _instalar_encerramento(controle, tempo_encerramento):
+    """Trata SIGINT/SIGTERM (e SIGBREAK no Windows) com encerramento gracioso; um segundo sinal encerra na hora."""
+    encerrando = threading.Event()
+    concluido = threading.Event()
+    
+    def ao_receber_sinal(sinal, frame):
+        if concluido.is_set():
+            # Requisições concluídas: o waitress fecha o servidor ao receber KeyboardInterrupt
+            raise KeyboardInterrupt()
+        if encerrando.is_set():
+            raise SystemExit(1)
+        encerrando.set()
+        logger.info(f"Sinal {sinal} recebido: encerrando o servidor (processo {os.getpid()})")
+        threading.Thread(target=_encerrar_servidor, args=(controle, tempo_encerramento, concluido),
+                         name='encerramento', daemon=True).start()
+    
+    for nome in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+        if hasattr(signal, nome):
+            signal.signal(getattr(signal, nome), ao_receber_sinal)
+
+def servir_processo(sock, opcoes):
+    """
+    Atende as requisições de um processo com o waitress, até ser encerrado.
+    
+    Args:
+        sock: Socket já aberto em que as conexões chegam
+        opcoes: Dicionário com processos, threads, limite_corpo, limite_cabecalho,
+                limite_conexoes, tempo_conexao, tempo_encerramento e precarga
+    """
+    from waitress import create_server
+    from api import app
+    
+    # Os trabalhos ficam na memória de um processo: com vários, as consultas se perderiam
+    app.config['TRABALHOS_ASSINCRONOS'] = opcoes['processos'] <= 1
+    controle = ControleEncerramento(app)
+    servidor = create_server(
+        controle,
+        sockets=[sock],
+        threads=opcoes['threads'],
+        max_request_body_size=opcoes['limite_corpo'],
+        max_request_header_size=opcoes['limite_cabecalho'],
+        connection_limit=opcoes['limite_conexoes'],
+        channel_timeout=opcoes['tempo_conexao'],
+        ident='BrasPub'
+    )
+    _instalar_encerramento(controle, opcoes['tempo_encerramento'])
+    logger.info(f"Processo {os.getpid()} atendendo com {opcoes['threads']} threads")
+    if opcoes['precarga']:
+        threading.Thread(target=precarregar_modulos, name='precarga', daemon=True).start()
+    try:
+        servidor.run()
+    finally:
+        _fechar_servidor(servidor)
+        sock.close()
+    logger.info(f"Processo {os.getpid()} encerrado")
+
+def _processo_filho(sock, opcoes):
+    """Ponto de entrada dos processos filhos."""
+    try:
+        servir_processo(sock, opcoes)
+    except KeyboardInterrupt:
+        pass
+
+def servir(host=HOST_PADRAO, porta=PORTA_PADRAO, processos=PROCESSOS_PADRAO, threads=THREADS_PADRAO,
+           limite_corpo=LIMITE_CORPO_PADRAO, limite_cabecalho=LIMITE_CABECALHO_PADRAO,
+           limite_conexoes=LIMITE_CONEXOES_PADRAO, tempo_conexao=TEMPO_CONEXAO_PADRAO,
+           tempo_encerramento=TEMPO_ENCERRAMENTO_PADRAO, precarga=PRECARGA_ATIVA_PADRAO):
+    """
+    Serve a API com um servidor WSGI de produção (waitress).
+    
+    Com mais de um processo, todos atendem o mesmo socket e o sistema
+    distribui as conexões entre eles. A intenção é processar planilhas
+    (limitado pelo GIL dentro de um processo) em paralelo, mas o ganho
+    depende de haver vários núcleos e não foi verificado: no teste_carga.py
+    em uma máquina com uma CPU, mais processos não aumentaram a vazão.
+    Os trabalhos em segundo plano (?assincrono=1) ficam na memória do
+    processo que os criou, por isso só ficam disponíveis com um processo;
+    com vários, esses pedidos e a API /api/trabalhos respondem 501.
+    
+    Args:
+        host: Endereço em que o servidor escuta
+        porta: Porta do servidor
+        processos: Quantidade de processos
+        threads: Requisições atendidas ao mesmo tempo em cada processo
+        limite_corpo: Tamanho máximo do corpo da requisição em bytes (acima dele: 413)
+        limite_cabecalho: Tamanho máximo dos cabeçalhos em bytes
+        limite_conexoes: Conexões abertas por processo
+        tempo_conexao: Segundos até fechar uma conexão ociosa
+        tempo_encerramento: Segundos de espera pelas requisições em andamento no encerramento
+        precarga: Importar os módulos pesados em segundo plano depois de começar a atender
+    """
+    opcoes = {
+        'processos': max(1, processos),
+        'threads': max(1, threads),
+        'limite_corpo': limite_corpo,
+        'limite_cabecalho': limite_cabecalho,
+        'limite_conexoes': limite_conexoes,
+        'tempo_conexao': tempo_conexao,
+        'tempo_encerramento': tempo_encerramento,
+        'precarga': precarga
+    }
+    sock = criar_socket(host, porta)
+    logger.info(f"Servidor de produção em http://{host}:{porta} "
+                f"({max(1, processos)} processo(s), {opcoes['threads']} threads cada)")
+    
+    if processos <= 1:
+        servir_processo(sock, opcoes)
+        return
+    
+    logger.warning("Com mais de um processo, os trabalhos em segundo plano (?assincrono=1) ficam desativados")
+    contexto = multiprocessing.get_context('spawn')
+    filhos = [contexto.Process(target=_processo_filho, args=(sock, opcoes), name=f'servidor-{i + 1}')
+              for i in range(processos)]
+    for filho in filhos:
+        filho.start()
+    sock.close()
+    
+    def ao_receber_sinal(sinal, frame):
+        # Repassar o encerramento aos processos (com Ctrl+C eles já recebem o sinal)
+        if sinal != getattr(signal, 'SIGINT', None):
+            for filho in filhos:
+                if filho.is_alive():
+                    filho.terminate()
+    
+    for nome in ('SIGINT', 'SIGTERM', 'SIGBREAK'):
+        if hasattr(signal, nome):
+            signal.signal(getattr(signal, nome), ao_receber_sinal)
+    
+    for filho in filhos:
+        filho.join()
+    logger.info("Servidor encerrado")
+
+def main():
+    """Ponto de entrada do backend (também usado pelo executável do PyInstaller)."""
+    parser = argparse.ArgumentParser(description="Servidor da API do Organizador de Planilhas")
+    parser.add_argument('--host', default=HOST_PADRAO, help=f'Endereço do servidor (padrão: {HOST_PADRAO})')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help=f'Porta do servidor (padrão: {PORTA_PADRAO})')
+    parser.add_argument('--processos', type=int, default=PROCESSOS_PADRAO,
+                        help=f'Processos atendendo a porta (padrão: {PROCESSOS_PADRAO})')
+    parser.add_argument('--threads', type=int, default=THREADS_PADRAO,
+                        help=f'Requisições simultâneas por processo (padrão: {THREADS_PADRAO})')
+    parser.add_argument('--limite-corpo-mb', type=int, default=LIMITE_CORPO_PADRAO // (1024 * 1024),
+                        help='Tamanho máximo do upload em MB')
+    parser.add_argument('--limite-conexoes', type=int, default=LIMITE_CONEXOES_PADRAO,
+                        help='Conexões abertas por processo')
+    parser.add_argument('--tempo-encerramento', type=int, default=TEMPO_ENCERRAMENTO_PADRAO,
+                        help='Segundos de espera pelas requisições em andamento ao encerrar')
+    parser.add_argument('--sem-precarga', action='store_true',
+                        help='Não carregar pandas e os módulos de processamento antes da primeira requisição')
+    parser.add_argument('--dev', action='store_true',
+                        help='Usar o servidor de desenvolvimento do Flask (debug, um processo)')
+    args = parser.parse_args()
+    
+    # Carregar a API também configura o log
+    from api import app
+    if args.dev:
+        app.run(debug=True, host=args.host, port=args.porta)
+        return
+    
+    servir(host=args.host, porta=args.porta, processos=args.processos, threads=args.threads,
+           limite_corpo=args.limite_corpo_mb * 1024 * 1024, limite_conexoes=args.limite_conexoes,
+           tempo_encerramento=args.tempo_encerramento, precarga=PRECARGA_ATIVA_PADRAO and not args.sem_precarga)
+
+if __name__ == "__main__":
+    # Necessário para os processos filhos no executável do PyInstaller
+    multiprocessing.freeze_support()
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(0)
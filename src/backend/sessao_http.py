@@ -0,0 +1,85 @@
+import os
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("ExtractorMidia")
+
+# Cabeçalhos enviados em todas as requisições
+HEADERS_PADRAO = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Configuração padrão do pool de conexões (pode ser alterada por variáveis de ambiente)
+TIMEOUT_PADRAO = float(os.environ.get('BRASPUB_HTTP_TIMEOUT', 15))  # segundos
+POOL_HOSTS_PADRAO = int(os.environ.get('BRASPUB_HTTP_POOL_HOSTS', 32))  # hosts mantidos no pool
+POOL_POR_HOST_PADRAO = int(os.environ.get('BRASPUB_HTTP_POOL_POR_HOST', 16))  # conexões por host
+
+class SessaoHTTP(requests.Session):
+    """
+    Sessão HTTP compartilhada, com keep-alive, cabeçalhos padrão e timeout
+    padrão definidos em um só lugar.
+    
+    O pool de conexões do urllib3 é thread-safe, então a mesma sessão pode
+    ser usada pelos workers concorrentes e pelas threads do Flask.
+    """
+    
+    def __init__(self, timeout=TIMEOUT_PADRAO, pool_hosts=POOL_HOSTS_PADRAO,
+                 pool_por_host=POOL_POR_HOST_PADRAO, pools_especificos=None):
+        super().__init__()
+        self.timeout = timeout
+        self.headers.update(HEADERS_PADRAO)
+        
+        adaptador = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_por_host)
+        self.mount('http://', adaptador)
+        self.mount('https://', adaptador)
+        
+        # Hosts com tamanho de pool próprio (ex.: {'https://clipping.exemplo.com.br': 32})
+        for prefixo, tamanho in (pools_especificos or {}).items():
+            self.mount(prefixo, HTTPAdapter(pool_connections=1, pool_maxsize=tamanho))
+    
+    def request(self, method, url, **kwargs):
+        # Aplicar o timeout padrão quando a chamada não definir um
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+# Instância compartilhada da sessão
+_sessao = None
+_sessao_lock = threading.Lock()
+
+def obter_sessao():
+    """Retorna a sessão HTTP compartilhada, criando-a na primeira chamada."""
+    global _sessao
+    with _sessao_lock:
+        if _sessao is None:
+            _sessao = SessaoHTTP()
+        return _sessao
+
+def configurar_sessao(timeout=None, pool_hosts=None, pool_por_host=None, pools_especificos=None):
+    """
+    Recria a sessão HTTP compartilhada com uma nova configuração.
+    
+    Args:
+        timeout: Timeout padrão das requisições em segundos
+        pool_hosts: Quantidade de hosts mantidos no pool de conexões
+        pool_por_host: Conexões mantidas abertas por host
+        pools_especificos: Dicionário {prefixo de URL: conexões} para hosts com pool próprio
+    
+    Returns:
+        A nova sessão compartilhada
+    """
+    global _sessao
+    with _sessao_lock:
+        anterior = _sessao
+        _sessao = SessaoHTTP(
+            timeout=timeout if timeout is not None else TIMEOUT_PADRAO,
+            pool_hosts=pool_hosts if pool_hosts is not None else POOL_HOSTS_PADRAO,
+            pool_por_host=pool_por_host if pool_por_host is not None else POOL_POR_HOST_PADRAO,
+            pools_especificos=pools_especificos
+        )
+        if anterior is not None:
+            anterior.close()
+        logger.info(f"Sessão HTTP configurada (timeout={_sessao.timeout}s)")
+        return _sessao
@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+import statistics
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from openpyxl import Workbook
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.abspath(__file__))
+
+def gerar_planilha(caminho, linhas):
+    """Gera uma planilha de teste com as colunas usadas pelos endpoints de processamento."""
+    aleatorio = random.Random(42)
+    palavras = ['Saúde', 'Educação', 'Economia', 'Segurança', 'Cultura', 'Esporte', 'Política', 'Meio Ambiente']
+    tipos = ['Portal', 'Impresso', 'TV', 'Rádio']
+    extensoes = ['.jpg', '.pdf', '.mp4', '.mp3']
+    book = Workbook(write_only=True)
+    aba = book.create_sheet('Planilha')
+    aba.append(['Palavras-chave', 'Título', 'Data de inclusão', 'Tipo de Mídia',
+                'Link web - Imagem', 'Link web - Texto', 'URL'])
+    for i in range(linhas):
+        aba.append([
+            ', '.join(aleatorio.sample(palavras, aleatorio.randint(1, 3))),
+            f'Matéria {i}',
+            datetime(2024, 1, 1) + timedelta(days=aleatorio.randint(0, 90)),
+            aleatorio.choice(tipos),
+            f'https://exemplo.com.br/midia/{i}{aleatorio.choice(extensoes)}',
+            f'https://exemplo.com.br/materia/{i}',
+            f'https://exemplo.com.br/{i}'
+        ])
+    book.save(caminho)
+
+def iniciar_servidor(porta, processos, threads):
+    """Inicia o servidor de produção em outro processo e aguarda /api/status responder."""
+    comando = [sys.executable, os.path.join(DIRETORIO_BACKEND, 'servidor.py'), '--porta', str(porta),
+               '--processos', str(processos), '--threads', str(threads)]
+    processo = subprocess.Popen(comando, cwd=tempfile.gettempdir(),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.time() + 120
+    while time.time() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"Servidor terminou ao iniciar (código {processo.returncode})")
+        try:
+            if requests.get(f'http://127.0.0.1:{porta}/api/status', timeout=1).ok:
+                return processo
+        except requests.RequestException:
+            time.sleep(0.2)
+    processo.kill()
+    raise RuntimeError("Servidor não respondeu a tempo")
+
+def parar_servidor(processo):
+    """Encerra o servidor (sinal de encerramento gracioso, com limite de espera)."""
+    processo.terminate()
+    try:
+        processo.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+        processo.wait()
+
+def gerar_carga(url, planilha, clientes, duracao):
+    """
+    Envia a planilha repetidamente com vários clientes simultâneos.
+    
+    Returns:
+        Tupla (latências das requisições bem-sucedidas em segundos, quantidade de erros, tempo total)
+    """
+    with open(planilha, 'rb') as f:
+        conteudo = f.read()
+    fim = time.time() + duracao
+    
+    def cliente():
+        sessao = requests.Session()
+        latencias, erros = [], 0
+        while time.time() < fim:
+            inicio = time.time()
+            try:
+                resposta = sessao.post(url, files={'arquivo': ('carga.xlsx', conteudo)}, timeout=300)
+                if resposta.ok:
+                    latencias.append(time.time() - inicio)
+                else:
+                    erros += 1
+            except requests.RequestException:
+                erros += 1
+        return latencias, erros
+    
+    inicio = time.time()
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        resultados = list(executor.map(lambda _: cliente(), range(clientes)))
+    total = time.time() - inicio
+    latencias = [latencia for parcial, _ in resultados for latencia in parcial]
+    return latencias, sum(erros for _, erros in resultados), total
+
+def percentil(valores, p):
+    if not valores:
+        return float('nan')
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Teste de carga do servidor de produção: vazão com diferentes quantidades de processos e threads")
+    parser.add_argument('--configuracoes', default='1x1,1x4,2x4,4x4',
+                        help='Lista de PROCESSOSxTHREADS a testar (padrão: 1x1,1x4,2x4,4x4)')
+    parser.add_argument('--clientes', type=int, default=8, help='Clientes enviando ao mesmo tempo (padrão: 8)')
+    parser.add_argument('--duracao', type=float, default=15, help='Segundos de carga por configuração (padrão: 15)')
+    parser.add_argument('--linhas', type=int, default=3000, help='Linhas da planilha enviada (padrão: 3000)')
+    parser.add_argument('--rota', default='/api/processar-planilha-download',
+                        help='Endpoint que recebe a planilha (padrão: /api/processar-planilha-download)')
+    parser.add_argument('--porta', type=int, default=5077, help='Porta usada pelo servidor de teste')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as diretorio:
+        planilha = os.path.join(diretorio, 'carga.xlsx')
+        gerar_planilha(planilha, args.linhas)
+        print(f"Planilha de {args.linhas} linhas, {args.clientes} clientes, {args.duracao:g}s por configuração, rota {args.rota}")
+        print(f"{'processos x threads':>20} {'requisições':>12} {'req/s':>8} {'p50 (s)':>8} {'p95 (s)':>8} {'erros':>6}")
+        
+        base = None
+        for configuracao in args.configuracoes.split(','):
+            processos, threads = (int(valor) for valor in configuracao.lower().split('x'))
+            servidor = iniciar_servidor(args.porta, processos, threads)
+            try:
+                # Aquecimento: a primeira requisição de cada processo carrega os módulos
+                gerar_carga(f'http://127.0.0.1:{args.porta}{args.rota}', planilha, processos * threads, 1)
+                latencias, erros, total = gerar_carga(f'http://127.0.0.1:{args.porta}{args.rota}',
+                                                      planilha, args.clientes, args.duracao)
+            finally:
+                parar_servidor(servidor)
+            vazao = len(latencias) / total
+            base = base or vazao
+            print(f"{configuracao:>20} {len(latencias):>12} {vazao:>8.2f} {statistics.median(latencias) if latencias else float('nan'):>8.2f} "
+                  f"{percentil(latencias, 0.95):>8.2f} {erros:>6}   ({vazao / base:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+
+# Os módulos do backend são importados pelo nome, como no executável
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Logs, cache HTTP e arquivos temporários dos módulos ficam fora do repositório
+_DIRETORIO_TESTES = tempfile.mkdtemp(prefix='braspub_testes_')
+os.environ.setdefault('BRASPUB_CACHE_CAMINHO', os.path.join(_DIRETORIO_TESTES, 'cache_http.sqlite3'))
+os.chdir(_DIRETORIO_TESTES)
+
+class _Requisicao(BaseHTTPRequestHandler):
+    """Encaminha cada requisição para a rota cadastrada no servidor de testes."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def enviar(self, status, corpo=b'', headers=None, fechar=False):
+        """
+        Envia a resposta.
+        
+        Args:
+            status: Código HTTP
+            corpo: Bytes do corpo (não enviados em HEAD)
+            headers: Cabeçalhos extras (Content-Length padrão: tamanho do corpo)
+            fechar: Se True, fecha a conexão depois da resposta
+        """
+        headers = dict(headers or {})
+        headers.setdefault('Content-Length', str(len(corpo)))
+        self.send_response(status)
+        for nome, valor in headers.items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(corpo)
+        if fechar:
+            self.close_connection = True
+    
+    def _responder(self):
+        caminho = self.path.split('?')[0]
+        self.server.requisicoes.append((self.command, caminho, dict(self.headers)))
+        rota = self.server.rotas.get(caminho)
+        if rota is None:
+            self.enviar(404, b'nao encontrado')
+        else:
+            rota(self)
+    
+    do_GET = _responder
+    do_HEAD = _responder
+
+@pytest.fixture
+def servidor():
+    """
+    Servidor HTTP local. Cadastre as rotas em servidor.rotas[caminho] como
+    funções que recebem a requisição e chamam requisicao.enviar(...).
+    """
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), _Requisicao)
+    srv.daemon_threads = True
+    srv.rotas = {}
+    srv.requisicoes = []
+    srv.url = lambda caminho: f'http://127.0.0.1:{srv.server_port}{caminho}'
+    thread = threading.Thread(target=srv.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
@@ -0,0 +1,53 @@
+import io
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import api
+
+@pytest.fixture
+def cliente_varios_processos():
+    api.app.config['TRABALHOS_ASSINCRONOS'] = False
+    try:
+        yield api.app.test_client()
+    finally:
+        api.app.config['TRABALHOS_ASSINCRONOS'] = True
+
+def test_trabalhos_recusados_com_varios_processos(cliente_varios_processos):
+    arquivos_antes = set(os.listdir(api.TEMP_DIR))
+    resposta = cliente_varios_processos.post('/api/processar?assincrono=1',
+                                             data={'arquivo': (io.BytesIO(b'planilha'), 'dados.xlsx')})
+    
+    assert resposta.status_code == 501
+    assert resposta.get_json()['status'] == 'erro'
+    assert set(os.listdir(api.TEMP_DIR)) == arquivos_antes
+    
+    for caminho in ('/api/trabalhos/abc', '/api/trabalhos/abc/resultado', '/api/trabalhos/abc/eventos'):
+        assert cliente_varios_processos.get(caminho).status_code == 501
+    assert cliente_varios_processos.post('/api/trabalhos/abc/cancelar').status_code == 501
+
+def _formatar_data_por_linha(valor, padrao):
+    """Conversão anterior, feita linha a linha."""
+    if pd.isna(valor):
+        return padrao
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d')
+    data_obj = pd.to_datetime(str(valor).strip(), errors='coerce')
+    return padrao if pd.isna(data_obj) else data_obj.strftime('%Y-%m-%d')
+
+@pytest.mark.filterwarnings('ignore::UserWarning')
+def test_formatar_datas_igual_a_conversao_por_linha():
+    valores = pd.Series([
+        datetime(2024, 3, 15, 10, 30), pd.Timestamp('2023-12-31'), date(2024, 2, 29),
+        '2024-01-05', ' 2024-01-05 ', '2024-01-05 08:00:00', '2024-01-05 08:00:00.250',
+        '2024-02-30', '15/03/2024', '03/15/2024', '2024/03/15', '5 de março', 'March 5, 2024',
+        '', 'sem data', None, np.nan, '2024-01-05', datetime(2024, 3, 15, 10, 30)
+    ], dtype=object)
+    
+    formatadas = api.formatar_datas(valores, '2000-01-01')
+    
+    assert list(formatadas.index) == list(valores.index)
+    assert list(formatadas) == [_formatar_data_por_linha(valor, '2000-01-01') for valor in valores]
@@ -0,0 +1,88 @@
+import math
+from datetime import datetime, date
+from decimal import Decimal
+from openpyxl import load_workbook
+from escritor_planilhas import EscritorPlanilha, LARGURA_MAXIMA_COLUNA
+
+def _abrir(caminho):
+    book = load_workbook(caminho)
+    abas = {aba.title: aba for aba in book.worksheets}
+    return book, abas
+
+def _larguras(aba, quantidade):
+    return [aba.column_dimensions[letra].width for letra in 'ABCDEFGH'[:quantidade]]
+
+def test_escreve_cabecalho_valores_e_larguras(tmp_path):
+    caminho = str(tmp_path / 'saida.xlsx')
+    colunas = ['Texto', 'Inteiro', 'Real', 'Lógico', 'Data', 'Dia', 'Outro']
+    registros = [
+        {'Texto': 'curto', 'Inteiro': 7, 'Real': 1.5, 'Lógico': True, 'Data': datetime(2024, 5, 1, 10, 30),
+         'Dia': date(2024, 5, 2), 'Outro': Decimal('3.25')},
+        # Colunas ausentes e NaN ficam vazias
+        {'Texto': 'x' * 150, 'Real': math.nan, 'Outro': ['a', 'b']}
+    ]
+    
+    with EscritorPlanilha(caminho) as escritor:
+        assert escritor.escrever_aba('Dados/2024: [maio]', colunas, registros) == 2
+    
+    book, abas = _abrir(caminho)
+    try:
+        aba = abas['Dados_2024 maio']
+        linhas = [[celula.value for celula in linha] for linha in aba.iter_rows()]
+        assert linhas == [
+            colunas,
+            ['curto', 7, 1.5, True, datetime(2024, 5, 1, 10, 30), datetime(2024, 5, 2), '3.25'],
+            ['x' * 150, None, None, None, None, None, "['a', 'b']"]
+        ]
+        assert type(linhas[1][1]) is int and type(linhas[1][3]) is bool
+        
+        for celula in aba[1]:
+            assert celula.font.bold
+            assert celula.border.left.style == celula.border.bottom.style == 'thin'
+            assert (celula.alignment.horizontal, celula.alignment.vertical) == ('center', 'top')
+        assert not aba['A2'].font.bold
+        
+        # Maior texto da coluna + 2, limitado a LARGURA_MAXIMA_COLUNA
+        assert _larguras(aba, 7) == [LARGURA_MAXIMA_COLUNA, 9, 6, 8, 21, 12, 12]
+    finally:
+        book.close()
+
+def test_amostra_largura_mede_so_as_primeiras_linhas_e_escreve_todas(tmp_path):
+    caminho = str(tmp_path / 'saida.xlsx')
+    linhas_geradas = []
+    
+    def registros():
+        for idx in range(5):
+            linhas_geradas.append(idx)
+            yield ('a' * (idx + 1), idx)
+    
+    with EscritorPlanilha(caminho, amostra_largura=2) as escritor:
+        assert escritor.escrever_aba('Amostra', ['T', 'N'], registros()) == 5
+    with EscritorPlanilha(str(tmp_path / 'completa.xlsx'), amostra_largura=0) as escritor:
+        assert escritor.escrever_aba('Completa', ['T', 'N'], registros()) == 5
+    
+    assert linhas_geradas == list(range(5)) * 2
+    book, abas = _abrir(caminho)
+    try:
+        assert [linha for linha in abas['Amostra'].iter_rows(min_row=2, values_only=True)] == \
+            [('a' * (idx + 1), idx) for idx in range(5)]
+        assert _larguras(abas['Amostra'], 2) == [4, 3]
+    finally:
+        book.close()
+    book, abas = _abrir(str(tmp_path / 'completa.xlsx'))
+    try:
+        assert _larguras(abas['Completa'], 2) == [7, 3]
+    finally:
+        book.close()
+
+def test_planilha_sem_abas_recebe_aba_vazia(tmp_path):
+    caminho = str(tmp_path / 'vazia.xlsx')
+    
+    with EscritorPlanilha(caminho):
+        pass
+    
+    book, abas = _abrir(caminho)
+    try:
+        assert list(abas) == ['Sheet1']
+    finally:
+        book.close()
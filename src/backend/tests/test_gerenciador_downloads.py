@@ -0,0 +1,244 @@
+import io
+import os
+import re
+import hashlib
+import zipfile
+import pytest
+from gerenciador_downloads import (GerenciadorDownloads, ArquivoAlterado, SUFIXO_PARCIAL, SUFIXO_INCOMPLETO_ZIP,
+                                  baixar_para_arquivo, obter_manifesto)
+
+def _gerenciador():
+    # Sem espera entre requisições ao mesmo host
+    return GerenciadorDownloads(workers=2, taxa_por_host=1000, rajada_por_host=1000)
+
+def test_zip_repete_download_que_falha_antes_do_primeiro_byte(servidor):
+    conteudo = b'conteudo do arquivo ' * 5000
+    tentativas = []
+    
+    def instavel(requisicao):
+        tentativas.append(requisicao.headers.get('Range'))
+        if len(tentativas) == 1:
+            # Cabeçalhos enviados e conexão encerrada antes do corpo
+            requisicao.enviar(200, headers={'Content-Length': str(len(conteudo))}, fechar=True)
+        else:
+            requisicao.enviar(200, conteudo)
+    
+    servidor.rotas['/instavel.pdf'] = instavel
+    servidor.rotas['/estavel.pdf'] = lambda requisicao: requisicao.enviar(200, b'outro arquivo')
+    tarefas = [
+        {'link': servidor.url('/instavel.pdf'), 'arquivo_zip': '2024-01-01/Portal/instavel.pdf'},
+        {'link': servidor.url('/estavel.pdf'), 'arquivo_zip': '2024-01-01/Portal/estavel.pdf'}
+    ]
+    
+    resultados = []
+    dados = b''.join(_gerenciador().transmitir_zip(tarefas, ao_concluir=resultados.append))
+    
+    assert tentativas == [None, None]
+    assert [(r['tarefa']['arquivo_zip'], r['sucesso']) for r in resultados] == [
+        ('2024-01-01/Portal/instavel.pdf', True),
+        ('2024-01-01/Portal/estavel.pdf', True)
+    ]
+    assert resultados[0]['bytes'] == len(conteudo)
+    with zipfile.ZipFile(io.BytesIO(dados)) as zf:
+        assert zf.read('2024-01-01/Portal/instavel.pdf') == conteudo
+        assert zf.read('2024-01-01/Portal/estavel.pdf') == b'outro arquivo'
+
+def test_zip_marca_entrada_truncada_por_falha_no_meio_do_corpo(servidor):
+    conteudo = b'x' * 300000
+    
+    def interrompido(requisicao):
+        # Sem ETag nem Last-Modified: não há como retomar com segurança
+        requisicao.send_response(200)
+        requisicao.send_header('Content-Length', str(len(conteudo)))
+        requisicao.end_headers()
+        requisicao.wfile.write(conteudo[:len(conteudo) // 2])
+        requisicao.wfile.flush()
+        requisicao.close_connection = True
+    
+    servidor.rotas['/video.mp4'] = interrompido
+    tarefas = [{'link': servidor.url('/video.mp4'), 'arquivo_zip': '2024-01-01/TV/video.mp4'}]
+    
+    resultados = []
+    dados = b''.join(_gerenciador().transmitir_zip(tarefas, ao_concluir=resultados.append))
+    
+    assert resultados[0]['sucesso'] is False
+    with zipfile.ZipFile(io.BytesIO(dados)) as zf:
+        assert zf.namelist() == ['2024-01-01/TV/video.mp4', '2024-01-01/TV/video.mp4' + SUFIXO_INCOMPLETO_ZIP]
+        assert len(zf.read('2024-01-01/TV/video.mp4')) < len(conteudo)
+        marcador = zf.read('2024-01-01/TV/video.mp4' + SUFIXO_INCOMPLETO_ZIP).decode('utf-8')
+    assert f"de {len(conteudo)} bytes" in marcador
+
+def test_baixar_deduplica_por_url_e_por_conteudo(servidor, tmp_path):
+    servidor.rotas['/a.pdf'] = lambda requisicao: requisicao.enviar(200, b'arquivo A')
+    servidor.rotas['/copia-de-a.pdf'] = lambda requisicao: requisicao.enviar(200, b'arquivo A')
+    url = servidor.url('/a.pdf')
+    tarefas = [
+        {'link': url, 'caminho': str(tmp_path / 'um.pdf')},
+        # Mesma URL depois da normalização (host em maiúsculas, fragmento)
+        {'link': url.replace('127.0.0.1', '127.0.0.1'.upper()) + '#pagina=2', 'caminho': str(tmp_path / 'dois.pdf')},
+        {'link': servidor.url('/copia-de-a.pdf'), 'caminho': str(tmp_path / 'tres.pdf')}
+    ]
+    gerenciador = _gerenciador()
+    
+    resultados = {os.path.basename(r['tarefa']['caminho']): r for r in gerenciador.baixar(tarefas)}
+    
+    assert all(r['sucesso'] for r in resultados.values())
+    assert [c for m, c, _ in servidor.requisicoes if m == 'GET'].count('/a.pdf') == 1
+    assert resultados['dois.pdf']['deduplicado'] == 'url'
+    # O primeiro download a terminar fica como original; o outro vira hardlink dele
+    assert {resultados['um.pdf'].get('deduplicado'), resultados['tres.pdf'].get('deduplicado')} == {None, 'conteudo'}
+    assert len({(tmp_path / nome).stat().st_ino for nome in resultados}) == 1
+    assert (tmp_path / 'um.pdf').read_bytes() == b'arquivo A'
+    assert gerenciador.economia['requisicoes'] == 1
+    assert gerenciador.economia['bytes_transferencia'] == len(b'arquivo A')
+
+def _arquivo_com_range(conteudo, etag, total=None):
+    """Rota que atende Range com If-Range, como um servidor de arquivos (total: tamanho anunciado no Content-Range)."""
+    def responder(requisicao):
+        intervalo = requisicao.headers.get('Range')
+        if intervalo and requisicao.headers.get('If-Range') == etag:
+            inicio, fim = intervalo[len('bytes='):].split('-')
+            inicio, fim = int(inicio), int(fim) if fim else len(conteudo) - 1
+            requisicao.enviar(206, conteudo[inicio:fim + 1], {
+                'ETag': etag, 'Accept-Ranges': 'bytes',
+                'Content-Range': f'bytes {inicio}-{fim}/{total or len(conteudo)}'
+            })
+        else:
+            requisicao.enviar(200, conteudo, {'ETag': etag, 'Accept-Ranges': 'bytes'})
+    return responder
+
+def _interromper_primeira(rota, conteudo, etag):
+    """Na primeira requisição, envia só metade do corpo e fecha a conexão."""
+    chamadas = []
+    
+    def responder(requisicao):
+        chamadas.append(1)
+        if len(chamadas) > 1:
+            return rota(requisicao)
+        requisicao.send_response(200)
+        requisicao.send_header('Content-Length', str(len(conteudo)))
+        requisicao.send_header('ETag', etag)
+        requisicao.send_header('Accept-Ranges', 'bytes')
+        requisicao.end_headers()
+        requisicao.wfile.write(conteudo[:len(conteudo) // 2])
+        requisicao.wfile.flush()
+        requisicao.close_connection = True
+    return responder
+
+def test_download_interrompido_e_retomado_com_range_e_if_range(servidor, tmp_path):
+    conteudo = bytes(range(256)) * 2000
+    servidor.rotas['/video.mp4'] = _interromper_primeira(_arquivo_com_range(conteudo, '"v1"'), conteudo, '"v1"')
+    destino = tmp_path / 'video.mp4'
+    
+    resultado = baixar_para_arquivo(servidor.url('/video.mp4'), str(destino))
+    
+    headers = [h for _, _, h in servidor.requisicoes]
+    assert 'Range' not in headers[0]
+    # A retomada começa no fim do que chegou a ser gravado no .part
+    inicio = int(re.fullmatch(r'bytes=(\d+)-', headers[1]['Range']).group(1))
+    assert 0 < inicio <= len(conteudo) // 2
+    assert headers[1]['If-Range'] == '"v1"'
+    assert resultado['retomado'] is True
+    assert resultado['bytes'] == len(conteudo) - inicio
+    assert resultado['sha256'] == hashlib.sha256(conteudo).hexdigest()
+    assert destino.read_bytes() == conteudo
+    assert not (tmp_path / ('video.mp4' + SUFIXO_PARCIAL)).exists()
+
+def test_parcial_de_arquivo_alterado_e_baixado_de_novo(servidor, tmp_path):
+    conteudo = b'versao nova do arquivo ' * 1000
+    servidor.rotas['/video.mp4'] = _arquivo_com_range(conteudo, '"v2"')
+    destino = tmp_path / 'video.mp4'
+    # Download anterior interrompido, de outra versão do arquivo
+    (tmp_path / ('video.mp4' + SUFIXO_PARCIAL)).write_bytes(b'versao antiga')
+    obter_manifesto(str(tmp_path)).registrar('video.mp4', {'url': servidor.url('/video.mp4'), 'tamanho': 5000,
+                                                            'etag': '"v1"', 'concluido': False})
+    
+    resultado = baixar_para_arquivo(servidor.url('/video.mp4'), str(destino))
+    
+    assert servidor.requisicoes[0][2]['If-Range'] == '"v1"'
+    assert resultado['retomado'] is False
+    assert destino.read_bytes() == conteudo
+    
+    # Arquivo completo e sem alterações: não é transferido de novo
+    repetido = baixar_para_arquivo(servidor.url('/video.mp4'), str(destino))
+    assert repetido['pulado'] is True
+    assert servidor.requisicoes[-1][2]['If-None-Match'] == '"v2"'
+
+def _ranges(servidor):
+    return [h.get('Range') for metodo, _, h in servidor.requisicoes if metodo == 'GET']
+
+def test_download_segmentado_grava_cada_segmento_na_sua_posicao(servidor, tmp_path):
+    conteudo = os.urandom(200000)
+    servidor.rotas['/video.mp4'] = _arquivo_com_range(conteudo, '"v1"')
+    destino = tmp_path / 'video.mp4'
+    
+    resultado = baixar_para_arquivo(servidor.url('/video.mp4'), str(destino), segmentos=4, limiar_segmentado=1000)
+    
+    # O primeiro segmento vem da resposta inicial; os outros, de requisições Range com If-Range
+    ranges = _ranges(servidor)
+    assert ranges[0] is None
+    assert sorted(ranges[1:]) == ['bytes=100000-149999', 'bytes=150000-199999', 'bytes=50000-99999']
+    assert all(h['If-Range'] == '"v1"' for _, _, h in servidor.requisicoes[1:])
+    assert destino.read_bytes() == conteudo
+    assert resultado['sha256'] == hashlib.sha256(conteudo).hexdigest()
+    assert obter_manifesto(str(tmp_path)).obter('video.mp4')['concluido'] is True
+
+def test_download_segmentado_retoma_os_segmentos_pendentes_do_manifesto(servidor, tmp_path):
+    conteudo = os.urandom(200000)
+    servidor.rotas['/video.mp4'] = _arquivo_com_range(conteudo, '"v1"')
+    destino = tmp_path / 'video.mp4'
+    # Primeiro segmento completo e segundo pela metade
+    parcial = bytearray(len(conteudo))
+    parcial[:75000] = conteudo[:75000]
+    (tmp_path / ('video.mp4' + SUFIXO_PARCIAL)).write_bytes(bytes(parcial))
+    obter_manifesto(str(tmp_path)).registrar('video.mp4', {
+        'url': servidor.url('/video.mp4'), 'tamanho': len(conteudo), 'etag': '"v1"', 'last_modified': None,
+        'concluido': False,
+        'segmentos': [[0, 49999, 50000], [50000, 99999, 25000], [100000, 149999, 0], [150000, 199999, 0]]
+    })
+    
+    resultado = baixar_para_arquivo(servidor.url('/video.mp4'), str(destino), segmentos=4, limiar_segmentado=1000)
+    
+    assert sorted(_ranges(servidor)) == ['bytes=100000-149999', 'bytes=150000-199999', 'bytes=75000-99999']
+    assert resultado['retomado'] is True
+    assert resultado['bytes'] == len(conteudo) - 75000
+    assert destino.read_bytes() == conteudo
+
+def _segmentado_pendente(servidor, tmp_path, conteudo):
+    """Registra um download segmentado com o primeiro segmento completo."""
+    parcial = bytearray(len(conteudo))
+    parcial[:50000] = conteudo[:50000]
+    (tmp_path / ('video.mp4' + SUFIXO_PARCIAL)).write_bytes(bytes(parcial))
+    obter_manifesto(str(tmp_path)).registrar('video.mp4', {
+        'url': servidor.url('/video.mp4'), 'tamanho': len(conteudo), 'etag': '"v1"', 'last_modified': None,
+        'concluido': False, 'segmentos': [[0, 49999, 50000], [50000, 99999, 0]]
+    })
+
+def test_segmento_respondido_com_200_indica_arquivo_alterado(servidor, tmp_path):
+    conteudo = os.urandom(100000)
+    novo = os.urandom(120000)
+    # O ETag mudou: o servidor ignora o Range e devolve o arquivo novo inteiro
+    servidor.rotas['/video.mp4'] = _arquivo_com_range(novo, '"v2"')
+    destino = tmp_path / 'video.mp4'
+    _segmentado_pendente(servidor, tmp_path, conteudo)
+    
+    with pytest.raises(ArquivoAlterado):
+        baixar_para_arquivo(servidor.url('/video.mp4'), str(destino), tentativas=1, segmentos=2,
+                            limiar_segmentado=1000)
+    assert not (tmp_path / ('video.mp4' + SUFIXO_PARCIAL)).exists()
+    assert 'segmentos' not in obter_manifesto(str(tmp_path)).obter('video.mp4')
+    
+    # A próxima tentativa baixa o arquivo novo desde o início
+    baixar_para_arquivo(servidor.url('/video.mp4'), str(destino), tentativas=1, segmentos=2, limiar_segmentado=1000)
+    assert destino.read_bytes() == novo
+
+def test_segmento_com_outro_tamanho_total_indica_arquivo_alterado(servidor, tmp_path):
+    conteudo = os.urandom(100000)
+    # Mesmo ETag, mas o Content-Range anuncia outro tamanho de arquivo
+    servidor.rotas['/video.mp4'] = _arquivo_com_range(conteudo, '"v1"', total=150000)
+    _segmentado_pendente(servidor, tmp_path, conteudo)
+    
+    with pytest.raises(ArquivoAlterado):
+        baixar_para_arquivo(servidor.url('/video.mp4'), str(tmp_path / 'video.mp4'), tentativas=1, segmentos=2,
+                            limiar_segmentado=1000)
+
@@ -0,0 +1,22 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from indice_palavras import IndicePalavras
+
+def _contains(textos, palavras):
+    """Resultado anterior: um Series.str.contains por palavra."""
+    return {palavra: list(np.flatnonzero(textos.str.contains(palavra, case=False, regex=False)))
+            for palavra in dict.fromkeys(palavras)}
+
+def test_mesmas_linhas_que_str_contains():
+    aleatorio = random.Random(42)
+    alfabeto = 'abAB çÇãÃ ßẞ-1'
+    valores = [''.join(aleatorio.choice(alfabeto) for _ in range(aleatorio.randint(0, 12))) for _ in range(300)]
+    valores += [None, np.nan, 42, 3.5, 'Straße', 'STRASSE', 'ação', 'AÇÃO']
+    textos = pd.Series(valores, dtype=object).astype(str)
+    palavras = [''.join(aleatorio.choice(alfabeto) for _ in range(aleatorio.randint(1, 4))) for _ in range(80)]
+    palavras += ['', 'nan', '42', 'ss', 'ß', 'Ação', 'ab', 'b', 'aba', 'ab']
+    
+    assert IndicePalavras(palavras).linhas_por_palavra(textos) == _contains(textos, palavras)
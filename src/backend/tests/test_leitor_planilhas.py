@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from leitor_planilhas import LeitorPlanilha
+
+def _planilha(tmp_path, linhas):
+    book = Workbook()
+    aba = book.active
+    for linha in linhas:
+        aba.append(linha)
+    caminho = str(tmp_path / 'planilha.xlsx')
+    book.save(caminho)
+    return caminho
+
+@pytest.fixture
+def planilha(tmp_path):
+    return _planilha(tmp_path, [
+        # Cabeçalho com nomes repetidos e vazios
+        ['Título', 'Título', None, 'Data', 'Número', 'Misto', 'Título'],
+        ['Matéria A', 'x', 1, datetime(2024, 5, 1), 1, 'texto', None],
+        ['Matéria B', None, 2, datetime(2024, 5, 2, 13, 45), 2, 3, None],
+        # Linha vazia no meio dos dados
+        [None, None, None, None, None, None, None],
+        [None, 'y', 3.5, '03/05/2024', None, 4.5, 'z'],
+        ['Matéria D', 'w', 4, None, 5, datetime(2024, 5, 4), None],
+        # Linhas vazias no fim (ignoradas pelo pandas)
+        [None, None, None, None, None, None, None],
+        ['', None, None, None, None, None, None]
+    ])
+
+def test_ler_igual_ao_read_excel(planilha):
+    esperado = pd.read_excel(planilha)
+    
+    with LeitorPlanilha(planilha) as leitor:
+        assert leitor.colunas == list(esperado.columns)
+        df = leitor.ler()
+    
+    pd.testing.assert_frame_equal(df, esperado)
+
+@pytest.mark.parametrize('colunas', [['Título.1', 'Data'], ['Misto', 'Unnamed: 2', 'Título.2'], ['Número']])
+def test_ler_colunas_igual_ao_read_excel(planilha, colunas):
+    with LeitorPlanilha(planilha) as leitor:
+        df = leitor.ler(colunas)
+    
+    pd.testing.assert_frame_equal(df, pd.read_excel(planilha)[colunas])
+
+@pytest.mark.parametrize('limite_linhas', [1, 2, 3, 4, 10])
+def test_ler_com_limite_igual_ao_read_excel(planilha, limite_linhas):
+    with LeitorPlanilha(planilha) as leitor:
+        df = leitor.ler(['Título', 'Data', 'Misto'], limite_linhas=limite_linhas)
+    
+    pd.testing.assert_frame_equal(df, pd.read_excel(planilha, nrows=limite_linhas)[['Título', 'Data', 'Misto']])
+
+def test_ler_so_cabecalho_igual_ao_read_excel(tmp_path):
+    caminho = _planilha(tmp_path, [['Título', 'Data'], [None, None]])
+    
+    with LeitorPlanilha(caminho) as leitor:
+        df = leitor.ler()
+    
+    esperado = pd.read_excel(caminho)
+    assert list(df.columns) == list(esperado.columns)
+    assert len(df) == len(esperado) == 0
@@ -0,0 +1,82 @@
+import time
+from datetime import datetime
+from openpyxl import Workbook, load_workbook
+from organizador import processar_planilha, _mapear_em_ordem, _salvar_planilha_processada
+
+def test_mapear_em_ordem_mantem_a_ordem_com_varios_workers():
+    def lento_no_inicio(item):
+        time.sleep((10 - item) * 0.01)
+        return item * 2
+    
+    assert list(_mapear_em_ordem(lento_no_inicio, range(10), workers=4)) == [item * 2 for item in range(10)]
+
+def test_processar_planilha_com_workers_mantem_a_ordem_das_linhas(servidor, tmp_path):
+    total = 6
+    for i in range(total):
+        def pagina(requisicao, i=i):
+            # As primeiras linhas respondem por último
+            time.sleep((total - i) * 0.05)
+            corpo = f'<html><body><video src="/videos/{i}.mp4"></video></body></html>'.encode()
+            requisicao.enviar(200, corpo, {'Content-Type': 'text/html; charset=utf-8'})
+        servidor.rotas[f'/materia/{i}'] = pagina
+    
+    book = Workbook()
+    aba = book.active
+    aba.append(['URL', 'Título'])
+    for i in range(total):
+        aba.append([servidor.url(f'/materia/{i}'), None])
+    caminho = str(tmp_path / 'planilha.xlsx')
+    book.save(caminho)
+    
+    resultado = processar_planilha(caminho, workers=4)
+    
+    assert resultado['status'] == 'sucesso'
+    assert [r['url'] for r in resultado['resultados']] == [servidor.url(f'/materia/{i}') for i in range(total)]
+    assert [r['video'] for r in resultado['resultados']] == [servidor.url(f'/videos/{i}.mp4') for i in range(total)]
+    processada = load_workbook(resultado['arquivo_saida'])
+    try:
+        videos = [linha[0] for linha in processada.active.iter_rows(min_row=2, min_col=9, max_col=9, values_only=True)]
+    finally:
+        processada.close()
+    assert videos == [servidor.url(f'/videos/{i}.mp4') for i in range(total)]
+
+def _valores_planilha(caminho):
+    book = load_workbook(caminho)
+    try:
+        return {aba.title: [[(celula.value, celula.number_format) for celula in linha]
+                            for linha in aba.iter_rows(min_row=1, max_col=11)]
+                for aba in book.worksheets}
+    finally:
+        book.close()
+
+def test_copia_em_streaming_tem_os_mesmos_valores_da_copia_completa(tmp_path):
+    book = Workbook()
+    aba = book.active
+    aba.title = 'Dados'
+    aba.append(['URL', 'Título', 'Publicação', 'Data'])
+    aba.append(['http://a', None, None, None])
+    # Coluna fora das colunas atualizadas (2 a 10)
+    aba['K2'] = datetime(2024, 5, 1, 10, 30)
+    aba['A4'] = 'http://b'
+    aba['K4'] = 0.25
+    aba['K4'].number_format = '0%'
+    outra = book.create_sheet('Outra')
+    outra.append(['não', 'muda'])
+    caminho = str(tmp_path / 'planilha.xlsx')
+    book.save(caminho)
+    atualizacoes = {
+        2: ['Título A', 'Jornal', '01/05/2024', 'Texto', 'a, b', None, 'http://a/img.jpg', None, None],
+        # Linha depois da última gravada na aba
+        6: ['Título C', None, None, 'Vídeo', '', None, None, 'http://c/v.mp4', None]
+    }
+    
+    _salvar_planilha_processada(caminho, 'Dados', atualizacoes, str(tmp_path / 'streaming.xlsx'))
+    _salvar_planilha_processada(caminho, 'Dados', atualizacoes, str(tmp_path / 'completa.xlsx'), completa=True)
+    
+    streaming = _valores_planilha(str(tmp_path / 'streaming.xlsx'))
+    assert streaming == _valores_planilha(str(tmp_path / 'completa.xlsx'))
+    assert [valor for valor, _ in streaming['Dados'][1][:3]] == ['http://a', 'Título A', 'Jornal']
+    assert streaming['Dados'][1][10] == (datetime(2024, 5, 1, 10, 30), 'yyyy-mm-dd h:mm:ss')
+    assert streaming['Dados'][3][10] == (0.25, '0%')
+    assert streaming['Dados'][5][8][0] == 'http://c/v.mp4'
+    assert streaming['Outra'][0][:2] == [('não', 'General'), ('muda', 'General')]
@@ -0,0 +1,189 @@
+import math
+from datetime import datetime
+from openpyxl import Workbook
+from organizador_keywords import (AnalisesPaginas, obter_link_por_tipo_midia, extrair_keywords_da_pagina,
+                                  detectar_tipo_midia, _escolher_link_direto, processar_planilha_keywords)
+
+PAGINA_TV = b'''<html><body>
+  <div class="q-chip"><div class="q-chip__content">Economia</div></div>
+  <div class="video-container"><video src="/videos/materia.mp4"></video></div>
+</body></html>'''
+
+def _pagina(status):
+    def responder(requisicao):
+        requisicao.enviar(status, PAGINA_TV, {'Content-Type': 'text/html; charset=utf-8'})
+    return responder
+
+def _gets(servidor, caminho):
+    return sum(1 for metodo, c, _ in servidor.requisicoes if metodo == 'GET' and c == caminho)
+
+def test_analises_da_execucao_baixam_cada_pagina_uma_vez(servidor):
+    servidor.rotas['/materia'] = _pagina(200)
+    url = servidor.url('/materia')
+    analises = AnalisesPaginas()
+    
+    assert obter_link_por_tipo_midia(url, 'TV', analises) == servidor.url('/videos/materia.mp4')
+    assert extrair_keywords_da_pagina(url, analises) == ['Economia']
+    assert detectar_tipo_midia(url, analises) == 'TV'
+    assert _gets(servidor, '/materia') == 1
+
+def test_falha_ao_carregar_a_pagina_nao_fica_guardada(servidor):
+    servidor.rotas['/materia'] = _pagina(503)
+    url = servidor.url('/materia')
+    analises = AnalisesPaginas()
+    
+    assert obter_link_por_tipo_midia(url, 'TV', analises) == url
+    servidor.rotas['/materia'] = _pagina(200)
+    assert obter_link_por_tipo_midia(url, 'TV', analises) == servidor.url('/videos/materia.mp4')
+    assert _gets(servidor, '/materia') == 2
+
+def test_execucoes_diferentes_nao_compartilham_analises(servidor):
+    servidor.rotas['/materia'] = _pagina(200)
+    url = servidor.url('/materia')
+    primeira, segunda = AnalisesPaginas(), AnalisesPaginas()
+    
+    assert primeira.obter(url) is not segunda.obter(url)
+    assert primeira.obter(url) is primeira.obter(url)
+
+def test_links_diretos_classificados_pela_extensao_sem_requisicao(servidor):
+    assert detectar_tipo_midia(servidor.url('/arquivos/reportagem.MP4')) == 'TV'
+    assert detectar_tipo_midia(servidor.url('/arquivos/pagina-3.jpg?v=2')) == 'Impresso'
+    assert detectar_tipo_midia(servidor.url('/arquivos/boletim.mp3')) == 'Rádio'
+    assert detectar_tipo_midia(servidor.url('/arquivos/edicao.pdf')) == 'Portal'
+    assert detectar_tipo_midia('https://www.youtube.com/watch?v=abc') == 'TV'
+    assert servidor.requisicoes == []
+
+def test_link_sem_extensao_classificado_pelo_content_type(servidor):
+    servidor.rotas['/midia/123'] = lambda requisicao: requisicao.enviar(200, b'ID3', {'Content-Type': 'audio/mpeg'})
+    
+    assert detectar_tipo_midia(servidor.url('/midia/123')) == 'Rádio'
+    assert [metodo for metodo, _, _ in servidor.requisicoes] == ['HEAD']
+
+def test_pagina_html_continua_sendo_analisada(servidor):
+    servidor.rotas['/materia.html'] = _pagina(200)
+    
+    assert detectar_tipo_midia(servidor.url('/materia.html'), AnalisesPaginas()) == 'TV'
+    assert [metodo for metodo, _, _ in servidor.requisicoes] == ['GET']
+
+def _contexto(link_web_imagem, link_web_texto=None):
+    return {'link_web_imagem': link_web_imagem, 'link_web_texto': link_web_texto,
+            'tipo_midia_detectado': detectar_tipo_midia(link_web_imagem)}
+
+def test_link_direto_de_video_usado_para_tv(servidor):
+    contexto = _contexto(servidor.url('/arquivos/reportagem.mp4'))
+    
+    assert _escolher_link_direto(contexto, 'TV') == servidor.url('/arquivos/reportagem.mp4')
+    assert _escolher_link_direto(contexto, 'Rádio') is None
+    assert _escolher_link_direto(contexto, 'Portal') is None
+
+def test_link_direto_de_audio_usado_para_radio(servidor):
+    contexto = _contexto(servidor.url('/arquivos/boletim.mp3'), servidor.url('/materia'))
+    
+    assert _escolher_link_direto(contexto, 'Rádio') == servidor.url('/arquivos/boletim.mp3')
+    assert _escolher_link_direto(contexto, 'TV') is None
+    assert _escolher_link_direto(contexto, 'Portal') == servidor.url('/materia')
+    # Para Impresso o link web imagem é sempre usado
+    assert _escolher_link_direto(contexto, 'Impresso') == servidor.url('/arquivos/boletim.mp3')
+
+PAGINA_ECONOMIA = b'''<html><body>
+  <div class="q-chip"><div class="q-chip__content">Economia</div></div>
+  <img src="/img/economia.jpg">
+  <video src="/videos/economia.mp4"></video>
+  <audio src="/audio/economia.mp3"></audio>
+</body></html>'''
+PAGINA_SAUDE = b'''<html><body><img src="/img/saude.png"><a href="/docs/saude.pdf">PDF</a></body></html>'''
+
+def _rotas_keywords(servidor):
+    def html(corpo):
+        return lambda requisicao: requisicao.enviar(200, corpo, {'Content-Type': 'text/html; charset=utf-8'})
+    servidor.rotas['/materia/economia'] = html(PAGINA_ECONOMIA)
+    servidor.rotas['/materia/saude'] = html(PAGINA_SAUDE)
+    servidor.rotas['/arquivos/foto.jpg'] = lambda requisicao: requisicao.enviar(200, b'0' * 16, {'Content-Type': 'image/jpeg'})
+
+def _salvar(caminho, linhas):
+    book = Workbook()
+    for linha in linhas:
+        book.active.append(linha)
+    book.save(caminho)
+    return str(caminho)
+
+def _registro(palavra, data, titulo, tipo, link, imagem=None, texto=None):
+    registro = {'PALAVRAS-CHAVE': palavra, 'DATA DE CADASTRO': data, 'TÍTULO DA MATÉRIA': titulo,
+                'TIPO DE MÍDIA': tipo, 'LINK DA MATÉRIA CADASTRADA': link}
+    # Registros copiados de uma linha da planilha trazem também as colunas de link web
+    if imagem is not None:
+        registro.update({'LINK_WEB_IMAGEM': imagem, 'LINK_WEB_TEXTO': texto})
+    return registro
+
+def _sem_nan(resultado):
+    """Troca NaN por None para comparar os registros com ==."""
+    return {palavra: [{chave: None if isinstance(valor, float) and math.isnan(valor) else valor
+                       for chave, valor in registro.items()} for registro in registros]
+            for palavra, registros in resultado.items()}
+
+# Os valores esperados são a saída da versão original de processar_planilha_keywords
+# (que montava o mesmo dicionário) para as mesmas planilhas e páginas
+def test_processar_planilha_keywords_igual_a_versao_original(servidor, tmp_path):
+    _rotas_keywords(servidor)
+    u = servidor.url
+    caminho = _salvar(tmp_path / 'com_links.xlsx', [
+        ['Palavras-chave', 'Data', 'Título', 'Tipo de mídia', 'Link web - Texto', 'Link web - Imagem'],
+        # Primeira linha da palavra sem links: valem os primeiros links preenchidos nas seguintes
+        ['Economia', datetime(2024, 5, 1), 'Juros sobem', 'Portal', None, None],
+        ['Economia', None, None, 'TV', u('/materia/economia'), u('/arquivos/foto.jpg')],
+        [' Saúde ', datetime(2024, 5, 2), None, 'Impresso', u('/materia/saude'), u('/arquivos/foto.jpg')],
+        [None, None, 'Sem palavra', 'Portal', u('/materia/saude'), None],
+        ['Saúde', datetime(2024, 5, 3), 'Vacina', 'Online', None, None],
+        ['Economia', datetime(2024, 5, 4), 'Rádio', 'Rádio', None, u('/arquivos/foto.jpg')]
+    ])
+    
+    resultado = processar_planilha_keywords(caminho)
+    
+    assert list(resultado) == ['Economia', 'Saúde']
+    assert _sem_nan(resultado) == {
+        'Economia': [
+            _registro('Economia', '2024-05-01', 'Juros sobem', 'Portal', u('/materia/economia'), imagem='', texto=''),
+            _registro('Economia', '2024-05-01', 'Juros sobem', 'Impresso', u('/arquivos/foto.jpg')),
+            _registro('Economia', None, '', 'TV', u('/videos/economia.mp4'),
+                      imagem=u('/arquivos/foto.jpg'), texto=u('/materia/economia')),
+            _registro('Economia', '2024-05-04', 'Rádio', 'Rádio', u('/audio/economia.mp3'),
+                      imagem=u('/arquivos/foto.jpg'), texto='')
+        ],
+        'Saúde': [
+            _registro('Saúde', '2024-05-03', 'Vacina', 'Portal', u('/materia/saude'), imagem='', texto=''),
+            _registro('Saúde', '2024-05-02', '', 'Impresso', u('/arquivos/foto.jpg'),
+                      imagem=u('/arquivos/foto.jpg'), texto=u('/materia/saude')),
+            _registro('Saúde', '2024-05-02', 'Matéria Não Cadastrada', 'TV', u('/materia/saude.mp4')),
+            _registro('Saúde', '2024-05-02', 'Matéria Não Cadastrada', 'Rádio', u('/materia/saude.mp3'))
+        ]
+    }
+
+def test_processar_planilha_keywords_sem_colunas_de_link_web_igual_a_versao_original(servidor, tmp_path):
+    _rotas_keywords(servidor)
+    u = servidor.url
+    hoje = datetime.now().strftime('%Y-%m-%d')
+    caminho = _salvar(tmp_path / 'sem_links.xlsx', [
+        ['Assunto', 'Tipo', 'URL'],
+        ['Economia', None, None],
+        ['Economia', 'TV', u('/materia/economia')],
+        ['Saúde', 'Portal', u('/materia/saude')],
+        ['Saúde', None, u('/materia/economia')]
+    ])
+    
+    resultado = processar_planilha_keywords(caminho)
+    
+    assert list(resultado) == ['Economia', 'Saúde']
+    assert _sem_nan(resultado) == {
+        'Economia': [
+            _registro('Economia', hoje, 'Economia', 'Portal', u('/materia/economia')),
+            _registro('Economia', hoje, 'Economia', 'Impresso', u('/img/economia.jpg')),
+            _registro('Economia', '', 'Economia', 'TV', u('/videos/economia.mp4')),
+            _registro('Economia', hoje, 'Economia', 'Rádio', u('/audio/economia.mp3'))
+        ],
+        'Saúde': [
+            _registro('Saúde', '', 'Saúde', 'Portal', u('/docs/saude.pdf')),
+            _registro('Saúde', hoje, 'Saúde', 'Impresso', u('/img/saude.png')),
+            _registro('Saúde', hoje, 'Saúde', 'TV', u('/materia/saude.mp4')),
+            _registro('Saúde', hoje, 'Saúde', 'Rádio', u('/materia/saude.mp3'))
+        ]
+    }
@@ -0,0 +1,64 @@
+import logging
+
+import pytest
+
+from paridade_parsers import PAGINAS_REFERENCIA, analisar
+from parser_html import PARSERS_HTML, parser_html_disponivel
+
+# O parse parcial só se aplica aos parsers do BeautifulSoup
+VARIANTES = [(parser, parcial) for parser in PARSERS_HTML
+             for parcial in ((False,) if parser == 'selectolax' else (False, True))]
+
+# Resultado esperado de cada página: links encontrados (nos demais tipos, a própria
+# matéria no Portal e a URL com a extensão padrão nos outros),
+# palavras-chave e tipo de mídia detectado
+ESPERADO = {
+    'portal_getpdf': ({'Portal': 'https://exemplo.com.br/clipping/getPDF?id=123&tipo=1'},
+                      ['Economia', 'Juros', 'Inflação'], 'Portal'),
+    'portal_embutido': ({'Portal': 'https://docs.exemplo.com.br/visualizar/materia.pdf'}, [], 'TV'),
+    'impresso_container': ({'Impresso': 'https://exemplo.com.br/jornal/pagina-1-impresso.jpg'}, [], 'Portal'),
+    'impresso_classe': ({'Impresso': 'https://exemplo.com.br/fotos/principal.png'}, [], 'Portal'),
+    'tv_player': ({'TV': 'https://exemplo.com.br/videos/materia.mp4'}, [], 'TV'),
+    'tv_sem_container': ({'TV': 'https://exemplo.com.br/midia/outra.mp4'}, [], 'TV'),
+    'radio_container': ({'Rádio': 'https://exemplo.com.br/audios/boletim.mp3'}, [], 'Rádio'),
+    'keywords_chips': ({}, ['Saúde & Bem-estar', 'Educação Pública'], 'Portal'),
+    'keywords_classes': ({}, ['Câmara', 'Orçamento', 'Votação', 'Política', 'Eleições'], 'Portal'),
+    'portal_pesado': ({'Impresso': 'https://exemplo.com.br/g/1.jpg'}, [], 'Impresso'),
+    'sem_midia': ({}, [], 'Portal'),
+    'atributos_variados': ({'Portal': 'https://exemplo.com.br/aspas/simples.pdf',
+                            'Impresso': 'https://exemplo.com.br/Maiusculas/Materia.JPG',
+                            'Rádio': 'https://exemplo.com.br/radio/programa.mp3'}, [], 'Rádio'),
+    'html_malformado': ({'Portal': 'https://exemplo.com.br/anexos/nota.pdf',
+                         'Impresso': 'https://exemplo.com.br/fotos/dentro.jpg',
+                         'Rádio': 'https://exemplo.com.br/a/um.mp3'}, [], 'Rádio'),
+}
+
+@pytest.fixture(autouse=True)
+def silenciar_extratores():
+    # Os extratores registram cada link encontrado
+    logger = logging.getLogger("ExtractorMidia")
+    nivel = logger.level
+    logger.setLevel(logging.ERROR)
+    yield
+    logger.setLevel(nivel)
+
+def test_corpus_tem_resultado_esperado_para_cada_pagina():
+    assert set(ESPERADO) == set(PAGINAS_REFERENCIA)
+
+@pytest.mark.parametrize('nome', sorted(PAGINAS_REFERENCIA))
+@pytest.mark.parametrize('parser,parcial', VARIANTES,
+                         ids=[f"{parser}-parcial" if parcial else parser for parser, parcial in VARIANTES])
+def test_parsers_extraem_o_mesmo_resultado(parser, parcial, nome):
+    if not parser_html_disponivel(parser):
+        pytest.skip(f"{parser} não instalado")
+    url = f'https://exemplo.com.br/materias/{nome}'
+    links, keywords, tipo = ESPERADO[nome]
+    padrao = {'Portal': url, 'Impresso': f'{url}.jpg', 'TV': f'{url}.mp4', 'Rádio': f'{url}.mp3'}
+    
+    resultado = analisar(nome, PAGINAS_REFERENCIA[nome], parser, parcial)
+    
+    assert resultado == {
+        'links': {**padrao, **links},
+        'keywords': keywords,
+        'tipo': tipo
+    }
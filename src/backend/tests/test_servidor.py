@@ -0,0 +1,47 @@
+import pytest
+
+from servidor import ControleEncerramento
+
+def _app(environ, start_response):
+    if environ.get('PATH_INFO') == '/erro':
+        raise RuntimeError('falhou')
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return iter([b'parte 1', b'parte 2'])
+
+def _chamar(controle, caminho='/'):
+    respostas = []
+    corpo = controle({'PATH_INFO': caminho}, lambda status, headers: respostas.append(status))
+    return respostas, corpo
+
+def test_encerramento_aguarda_a_resposta_ser_fechada():
+    controle = ControleEncerramento(_app)
+    status, corpo = _chamar(controle)
+    
+    assert status == ['200 OK']
+    assert controle.ativas == 1
+    assert b''.join(corpo) == b'parte 1parte 2'
+    # Consumida mas não fechada: o servidor ainda está enviando a resposta
+    assert controle.encerrar(0.05) is False
+    
+    corpo.close()
+    corpo.close()
+    assert controle.ativas == 0
+    assert controle.encerrar(0.05) is True
+
+def test_encerramento_recusa_novas_requisicoes():
+    controle = ControleEncerramento(_app)
+    assert controle.encerrar(0.05) is True
+    
+    status, corpo = _chamar(controle)
+    
+    assert status == ['503 Service Unavailable']
+    assert b''.join(corpo) == b'Servidor em encerramento'
+    assert controle.ativas == 0
+
+def test_requisicao_com_erro_nao_fica_em_andamento():
+    controle = ControleEncerramento(_app)
+    
+    with pytest.raises(RuntimeError):
+        _chamar(controle, '/erro')
+    
+    assert controle.ativas == 0
@@ -0,0 +1,20 @@
+from trabalhos import Trabalho, TrabalhoAvulso
+
+def test_eventos_guardados_sao_limitados_e_mantem_as_posicoes():
+    trabalho = Trabalho('teste', max_eventos=3)
+    for linha in range(5):
+        trabalho.publicar('linha', {'linha': linha})
+    
+    assert len(trabalho.eventos) == 3
+    assert trabalho.eventos_desde(0) == [(2, ('linha', {'linha': 2})), (3, ('linha', {'linha': 3})),
+                                         (4, ('linha', {'linha': 4}))]
+    assert trabalho.eventos_desde(4) == [(4, ('linha', {'linha': 4}))]
+    assert trabalho.eventos_desde(5) == []
+
+def test_trabalho_avulso_nao_guarda_eventos():
+    trabalho = TrabalhoAvulso('teste')
+    trabalho.publicar('linha', {'linha': 1})
+    trabalho.atualizar(total=2, incremento=1)
+    
+    assert trabalho.eventos_desde(0) == []
+    assert trabalho.resumo()['progresso']['concluidos'] == 1
@@ -0,0 +1,328 @@
+import os
+import time
+import uuid
+import threading
+import logging
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('braspub_api')
+
+# Configuração padrão dos trabalhos em segundo plano (pode ser alterada por variáveis de ambiente)
+WORKERS_TRABALHOS_PADRAO = int(os.environ.get('BRASPUB_TRABALHOS_WORKERS', 2))  # trabalhos executados ao mesmo tempo
+RETENCAO_TRABALHOS_PADRAO = int(os.environ.get('BRASPUB_TRABALHOS_RETENCAO', 60 * 60))  # segundos após o término
+MAX_EVENTOS_TRABALHO_PADRAO = int(os.environ.get('BRASPUB_TRABALHOS_MAX_EVENTOS', 5000))  # eventos guardados por trabalho
+
+# Estados de um trabalho
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+CANCELADO = 'cancelado'
+ESTADOS_FINAIS = (CONCLUIDO, ERRO, CANCELADO)
+
+class TrabalhoCancelado(Exception):
+    """Levantada dentro do trabalho quando o cancelamento é pedido."""
+
+class Trabalho:
+    """
+    Trabalho de processamento executado em segundo plano.
+    
+    A função executada recebe o próprio trabalho para informar o progresso
+    (atualizar), publicar resultados parciais (publicar) e verificar se o
+    cancelamento foi pedido (verificar_cancelamento). Fora do gerenciador,
+    um TrabalhoAvulso serve para executar a mesma função dentro da requisição.
+    
+    Cada mudança incrementa a versão do trabalho, e aguardar_mudanca permite
+    acompanhar o trabalho sem consultas repetidas (ex.: Server-Sent Events).
+    """
+    
+    def __init__(self, tipo, max_eventos=MAX_EVENTOS_TRABALHO_PADRAO):
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.estado = PENDENTE
+        self.criado_em = time.time()
+        self.iniciado_em = None
+        self.concluido_em = None
+        self.total = None
+        self.concluidos = 0
+        self.contadores = {}
+        self.atual = None
+        self.eventos = deque(maxlen=max(0, max_eventos))
+        self.eventos_descartados = 0
+        self.resultado = None
+        self.codigo_http = None
+        self.erro = None
+        self._cancelamento = threading.Event()
+        self._lock = threading.Lock()
+        self._mudanca = threading.Condition(self._lock)
+        self._versao = 0
+        self._futuro = None
+        self._ao_finalizar = None
+    
+    @property
+    def cancelamento_pedido(self):
+        return self._cancelamento.is_set()
+    
+    def atualizar(self, concluidos=None, total=None, incremento=0, atual=None, **contadores):
+        """
+        Atualiza o progresso.
+        
+        Args:
+            concluidos: Quantidade de itens concluídos (substitui o valor atual)
+            total: Quantidade total de itens, quando conhecida
+            incremento: Itens concluídos desde a última atualização
+            atual: Descrição do item em andamento (ex.: a URL sendo acessada)
+            **contadores: Contadores adicionais (ex.: erros=2), somados aos atuais
+        """
+        with self._lock:
+            if total is not None:
+                self.total = total
+            if concluidos is not None:
+                self.concluidos = concluidos
+            self.concluidos += incremento
+            if atual is not None:
+                self.atual = atual
+            for nome, valor in contadores.items():
+                self.contadores[nome] = self.contadores.get(nome, 0) + valor
+            self._notificar()
+    
+    def publicar(self, tipo, dados):
+        """
+        Registra um evento do trabalho, como o resultado de uma linha já concluída.
+        
+        Os eventos ficam guardados na ordem em que foram publicados, para que
+        quem acompanha o trabalho receba também os anteriores à sua conexão.
+        Só os max_eventos mais recentes são mantidos; as posições continuam
+        contando os descartados.
+        
+        Args:
+            tipo: Tipo do evento (ex.: 'linha')
+            dados: Conteúdo do evento (serializável em JSON)
+        """
+        with self._lock:
+            if len(self.eventos) == self.eventos.maxlen:
+                self.eventos_descartados += 1
+            self.eventos.append((tipo, dados))
+            self._notificar()
+    
+    def _notificar(self):
+        """Marca uma mudança e acorda quem aguarda o trabalho (chamar com o lock)."""
+        self._versao += 1
+        self._mudanca.notify_all()
+    
+    def definir_estado(self, estado):
+        """Altera o estado do trabalho, avisando quem o acompanha."""
+        with self._lock:
+            self.estado = estado
+            if estado == EXECUTANDO:
+                self.iniciado_em = time.time()
+            elif estado in ESTADOS_FINAIS:
+                self.concluido_em = time.time()
+            self._notificar()
+    
+    def aguardar_mudanca(self, versao, timeout=None):
+        """
+        Aguarda até que o trabalho mude em relação à versão informada.
+        
+        Args:
+            versao: Última versão conhecida (0 na primeira chamada)
+            timeout: Tempo máximo de espera em segundos
+        
+        Returns:
+            A versão atual (igual à informada se o tempo acabou sem mudanças)
+        """
+        with self._lock:
+            self._mudanca.wait_for(lambda: self._versao != versao, timeout)
+            return self._versao
+    
+    def eventos_desde(self, posicao):
+        """
+        Retorna os eventos publicados a partir da posição informada, com as posições.
+        
+        Se os eventos dessa posição já foram descartados, começa pelo mais
+        antigo ainda guardado (o salto aparece nas posições).
+        """
+        with self._lock:
+            inicio = max(posicao, self.eventos_descartados)
+            return list(enumerate(islice(self.eventos, inicio - self.eventos_descartados, None), start=inicio))
+    
+    def _estimar_restante(self):
+        """Segundos estimados até o fim, pela média de tempo por item concluído."""
+        if self.estado != EXECUTANDO or not self.total or not self.concluidos or not self.iniciado_em:
+            return None
+        decorrido = time.time() - self.iniciado_em
+        restantes = max(self.total - self.concluidos, 0)
+        return round(decorrido / self.concluidos * restantes, 1)
+    
+    def verificar_cancelamento(self):
+        """Interrompe o trabalho (TrabalhoCancelado) se o cancelamento foi pedido."""
+        if self._cancelamento.is_set():
+            raise TrabalhoCancelado(f"Trabalho {self.id} cancelado")
+    
+    def resumo(self):
+        """Estado e progresso do trabalho, para a resposta da API."""
+        with self._lock:
+            percentual = None
+            if self.estado == CONCLUIDO:
+                percentual = 100.0
+            elif self.total:
+                percentual = round(min(self.concluidos / self.total, 1.0) * 100, 1)
+            resumo = {
+                'id': self.id,
+                'tipo': self.tipo,
+                'estado': self.estado,
+                'criado_em': self.criado_em,
+                'iniciado_em': self.iniciado_em,
+                'concluido_em': self.concluido_em,
+                'progresso': {
+                    'total': self.total,
+                    'concluidos': self.concluidos,
+                    'percentual': percentual,
+                    'restante_estimado': self._estimar_restante(),
+                    'atual': self.atual,
+                    **self.contadores
+                }
+            }
+        if self.erro:
+            resumo['mensagem'] = self.erro
+        return resumo
+
+class TrabalhoAvulso(Trabalho):
+    """
+    Trabalho executado dentro da requisição.
+    
+    Ninguém acompanha os eventos de uma execução síncrona, então eles não
+    são guardados; o progresso e o cancelamento funcionam como no Trabalho.
+    """
+    
+    def __init__(self, tipo):
+        super().__init__(tipo, max_eventos=0)
+    
+    def publicar(self, tipo, dados):
+        pass
+
+class GerenciadorTrabalhos:
+    """
+    Executa trabalhos em um pool limitado de threads.
+    
+    Os trabalhos ficam guardados (com o resultado) até RETENCAO_TRABALHOS_PADRAO
+    segundos depois de terminarem, para consulta do estado e do resultado.
+    """
+    
+    def __init__(self, workers=WORKERS_TRABALHOS_PADRAO, retencao=RETENCAO_TRABALHOS_PADRAO):
+        self.workers = max(1, workers)
+        self.retencao = retencao
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='trabalho')
+        self._trabalhos = {}
+        self._lock = threading.Lock()
+    
+    def submeter(self, tipo, funcao, *args, ao_finalizar=None):
+        """
+        Coloca um trabalho na fila.
+        
+        Args:
+            tipo: Nome do tipo de trabalho (ex.: 'processar_keywords')
+            funcao: Função executada como funcao(trabalho, *args); deve retornar
+                    a tupla (resultado, código HTTP)
+            *args: Argumentos da função
+            ao_finalizar: Função chamada sem argumentos quando o trabalho termina
+                          (ou é cancelado antes de começar), ex.: remover arquivos temporários
+        
+        Returns:
+            O Trabalho criado
+        """
+        self._remover_antigos()
+        trabalho = Trabalho(tipo)
+        trabalho._ao_finalizar = ao_finalizar
+        with self._lock:
+            self._trabalhos[trabalho.id] = trabalho
+        trabalho._futuro = self._executor.submit(self._executar, trabalho, funcao, args)
+        logger.info(f"Trabalho {trabalho.id} ({tipo}) na fila")
+        return trabalho
+    
+    def _executar(self, trabalho, funcao, args):
+        estado = ERRO
+        try:
+            trabalho.definir_estado(EXECUTANDO)
+            logger.info(f"Trabalho {trabalho.id} ({trabalho.tipo}) iniciado")
+            try:
+                trabalho.resultado, trabalho.codigo_http = funcao(trabalho, *args)
+                estado = CONCLUIDO if trabalho.codigo_http < 400 else ERRO
+                if estado == ERRO:
+                    trabalho.erro = trabalho.resultado.get('mensagem')
+            except TrabalhoCancelado:
+                estado = CANCELADO
+            except Exception as e:
+                logger.error(f"Erro no trabalho {trabalho.id} ({trabalho.tipo}): {str(e)}", exc_info=True)
+                trabalho.resultado, trabalho.codigo_http = {'status': 'erro', 'mensagem': str(e)}, 500
+                trabalho.erro = str(e)
+                estado = ERRO
+        finally:
+            self._finalizar(trabalho, estado)
+    
+    def _finalizar(self, trabalho, estado):
+        trabalho.definir_estado(estado)
+        logger.info(f"Trabalho {trabalho.id} ({trabalho.tipo}) terminou: {trabalho.estado}")
+        if trabalho._ao_finalizar:
+            try:
+                trabalho._ao_finalizar()
+            except Exception as e:
+                logger.warning(f"Erro ao finalizar o trabalho {trabalho.id}: {str(e)}")
+    
+    def obter(self, trabalho_id):
+        """Retorna o trabalho com o id informado, ou None."""
+        self._remover_antigos()
+        with self._lock:
+            return self._trabalhos.get(trabalho_id)
+    
+    def cancelar(self, trabalho_id):
+        """
+        Pede o cancelamento de um trabalho.
+        
+        Um trabalho na fila não chega a ser executado; um em execução para no
+        próximo ponto de verificação.
+        
+        Returns:
+            O trabalho, ou None se ele não existir
+        """
+        trabalho = self.obter(trabalho_id)
+        if trabalho is None or trabalho.estado in ESTADOS_FINAIS:
+            return trabalho
+        trabalho._cancelamento.set()
+        logger.info(f"Cancelamento pedido para o trabalho {trabalho.id} ({trabalho.tipo})")
+        if trabalho._futuro.cancel():
+            # Ainda estava na fila: não será executado
+            self._finalizar(trabalho, CANCELADO)
+        return trabalho
+    
+    def _remover_antigos(self):
+        """Esquece os trabalhos terminados há mais tempo que a retenção."""
+        limite = time.time() - self.retencao
+        with self._lock:
+            antigos = [trabalho_id for trabalho_id, trabalho in self._trabalhos.items()
+                       if trabalho.concluido_em is not None and trabalho.concluido_em < limite]
+            for trabalho_id in antigos:
+                del self._trabalhos[trabalho_id]
+    
+    def encerrar(self, aguardar=True):
+        """Cancela os trabalhos pendentes e encerra o pool."""
+        with self._lock:
+            trabalhos = list(self._trabalhos.values())
+        for trabalho in trabalhos:
+            if trabalho.estado not in ESTADOS_FINAIS:
+                self.cancelar(trabalho.id)
+        self._executor.shutdown(wait=aguardar)
+
+# Instância compartilhada do gerenciador de trabalhos
+_gerenciador = None
+_gerenciador_lock = threading.Lock()
+
+def obter_gerenciador_trabalhos():
+    """Retorna o gerenciador de trabalhos compartilhado, criando-o na primeira chamada."""
+    global _gerenciador
+    with _gerenciador_lock:
+        if _gerenciador is None:
+            _gerenciador = GerenciadorTrabalhos()
+        return _gerenciador
@@ -21,7 +21,7 @@ function setupBackend() {
   }
 
   try {
-    const backendPath = path.join(process.resourcesPath, 'OrganizadorPlanilhas.exe');
+    const backendPath = path.join(process.resourcesPath, 'OrganizadorPlanilhas', 'OrganizadorPlanilhas.exe');
     
     if (fs.existsSync(backendPath)) {
       console.log(`Iniciando backend: ${backendPath}`);